@@ -1,155 +1,126 @@
 import os
-import re
-from time import sleep
-
-from bs4 import BeautifulSoup
-import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
-
-# Webdriver options; set to headless
-options = webdriver.ChromeOptions()
-options.add_argument("--headless")
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service, options=options)
+
+from minted_print_page import open_print_page
+from minted_print_page import print_page_frame
+from minted_session import cookie_dict
+from minted_session import load_session
+from minted_session import save_session
+from minted_session import session_is_valid
+from minted_waits import REPORT
+from minted_writers import frame_records
+from minted_writers import write_records
 
 # URL for minted addressbook
 URL = "https://www.minted.com/addressbook/my-account/finalize/0?it=utility_nav"
 
 
-states = {
-    "AK": "Alaska",
-    "AL": "Alabama",
-    "AR": "Arkansas",
-    "AS": "American Samoa",
-    "AZ": "Arizona",
-    "CA": "California",
-    "CO": "Colorado",
-    "CT": "Connecticut",
-    "DC": "District of Columbia",
-    "DE": "Delaware",
-    "FL": "Florida",
-    "GA": "Georgia",
-    "GU": "Guam",
-    "HI": "Hawaii",
-    "IA": "Iowa",
-    "ID": "Idaho",
-    "IL": "Illinois",
-    "IN": "Indiana",
-    "KS": "Kansas",
-    "KY": "Kentucky",
-    "LA": "Louisiana",
-    "MA": "Massachusetts",
-    "MD": "Maryland",
-    "ME": "Maine",
-    "MI": "Michigan",
-    "MN": "Minnesota",
-    "MO": "Missouri",
-    "MP": "Northern Mariana Islands",
-    "MS": "Mississippi",
-    "MT": "Montana",
-    "NA": "National",
-    "NC": "North Carolina",
-    "ND": "North Dakota",
-    "NE": "Nebraska",
-    "NH": "New Hampshire",
-    "NJ": "New Jersey",
-    "NM": "New Mexico",
-    "NV": "Nevada",
-    "NY": "New York",
-    "OH": "Ohio",
-    "OK": "Oklahoma",
-    "OR": "Oregon",
-    "PA": "Pennsylvania",
-    "PR": "Puerto Rico",
-    "RI": "Rhode Island",
-    "SC": "South Carolina",
-    "SD": "South Dakota",
-    "TN": "Tennessee",
-    "TX": "Texas",
-    "UT": "Utah",
-    "VA": "Virginia",
-    "VI": "Virgin Islands",
-    "VT": "Vermont",
-    "WA": "Washington",
-    "WI": "Wisconsin",
-    "WV": "West Virginia",
-    "WY": "Wyoming",
-}
-
-
-# Set your minted.com email and password as the env vars:
-# minted_email and minted_password
-try:
-    minted_email = os.environ["minted_email"]
-except KeyError:
-    minted_email = input("Enter your minted.com email address:")
-try:
-    minted_password = os.environ["minted_password"]
-except KeyError:
-    minted_password = input("Enter your minted.com password:")
-
-driver.get(URL)
-
-# Login form
-email_elem = driver.find_element(By.NAME, "email")
-email_elem.send_keys(minted_email)
-password_elem = driver.find_element(By.NAME, "password")
-password_elem.send_keys(minted_password)
-login_submit = driver.find_element(
-    By.XPATH, "/html/body/div/div[3]/div/form/div[2]/button[1]"
-)
-login_submit.click()
-
-sleep(5)  # to load JS and be nice
-
-driver.get("https://addressbook.minted.com/api/contacts/contacts/print/?")
-
-html = driver.page_source
-soup = BeautifulSoup(html, "lxml")
-listings = soup.find("main")
-
-address_book = pd.DataFrame()
-addressees = listings.find_all("span", {"class": "contact-name"})
-address_book["name"] = [name.text.strip() for name in addressees]
-addresses = listings.find_all("span", {"class": "contact-address"})
-street_details = [
-    "".join(street.text.strip().split("\n")[:-1]).strip() for street in addresses
-]
-address_book["address"] = [" ".join(street.split()) for street in street_details]
-city_details = [street.text.strip().split("\n")[-1].strip() for street in addresses]
-address_book["locality"] = list(city_details)
-
-
-def pull_state(address):
-    """Isolates and formats State portion of address, if available"""
-    try:
-        field = re.findall(r"([a-zA-Z]{2,}) (\d{5})", address)[0][0]
-        state = states.get(field.upper(), field)
-    except:
-        state = ""
-    return state
+def _submit_login(driver, minted_email, minted_password):
+    """Fill in and submit the login form, then wait for the redirect."""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+
+    from minted_waits import document_ready
+    from minted_waits import wait_for
+
+    # Login form
+    email_elem = driver.find_element(By.NAME, "email")
+    email_elem.send_keys(minted_email)
+    password_elem = driver.find_element(By.NAME, "password")
+    password_elem.send_keys(minted_password)
+    login_submit = driver.find_element(
+        By.XPATH, "/html/body/div/div[3]/div/form/div[2]/button[1]"
+    )
+    login_page_url = driver.current_url
+    login_submit.click()
+
+    # Wait for the login to navigate away, then for the page to finish loading
+    wait_for(
+        driver,
+        EC.url_changes(login_page_url),
+        timeout=30,
+        phase="login redirect",
+        fixed_delay=5,
+    )
+    wait_for(driver, document_ready, timeout=10, phase="login redirect", fixed_delay=0)
+
 
+def login_for_cookies(minted_email):
+    """Log in with a headless browser and return its cookies."""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+
+    from minted_driver import resolve_chromedriver
 
-def pull_zip(address):
-    """Isolates and formats zipcode of address, if available"""
     try:
-        zipcode = re.findall(r"([a-zA-Z]{2,}) (\d{5})", address)[0][1]
-    except:
-        zipcode = ""
-    return zipcode
+        minted_password = os.environ["minted_password"]
+    except KeyError:
+        minted_password = input("Enter your minted.com password:")
+
+    # Webdriver options; set to headless
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless")
+    service = Service(resolve_chromedriver())
+    driver = webdriver.Chrome(service=service, options=options)
+
+    driver.get(URL)
 
+    _submit_login(driver, minted_email, minted_password)
+    session_cookies = driver.get_cookies()
+    save_session(minted_email, session_cookies)
 
-address_book["state"] = address_book["locality"].apply(pull_state)
-address_book["zipcode"] = address_book["locality"].apply(pull_zip)
-address_book["town"] = address_book["locality"].map(lambda x: x.split(",")[0])
+    # The print page itself is fetched over plain HTTP with these cookies
+    driver.close()
+    return session_cookies
 
-column_titles = ["Name", "Address", "Town", "State", "Zipcode"]
-address_book = address_book.reindex(columns=[col.lower() for col in column_titles])
 
-address_book.to_excel("./data/minted-addresses.xlsx", header=column_titles)
-address_book.to_csv("./data/minted-addresses.csv", index=False, header=column_titles)
+def parse_print_page(source, expand_states=True):
+    """
+    Build the address book DataFrame from print page HTML.
 
-driver.close()
+    source may be a string, bytes or a binary file such as a streamed
+    response body. States are spelled out in full unless expand_states is
+    False.
+    """
+    address_book = print_page_frame(source, expand_states=expand_states)
+    address_book = address_book.rename(columns={"zip": "zipcode", "city": "town"})
+    return address_book[["name", "address", "locality", "state", "zipcode", "town"]]
+
+
+def main():
+    """Export the Minted print page address book to ./data."""
+    # Set your minted.com email and password as the env vars:
+    # minted_email and minted_password
+    try:
+        minted_email = os.environ["minted_email"]
+    except KeyError:
+        minted_email = input("Enter your minted.com email address:")
+
+    # Reuse cookies from a previous run if Minted still accepts them
+    session_cookies = load_session(minted_email)
+    if not (session_cookies and session_is_valid(session_cookies)):
+        session_cookies = login_for_cookies(minted_email)
+
+    # Parse the print page as it downloads
+    with open_print_page(cookie_dict(session_cookies)) as body:
+        address_book = parse_print_page(body)
+
+    column_titles = ["Name", "Address", "Town", "State", "Zipcode"]
+    write_records(
+        frame_records(address_book),
+        "./data",
+        "minted-addresses",
+        {
+            "xlsx": {
+                "header": column_titles,
+                "columns": {"zipcode": {"format": "@"}},
+            },
+            "csv": {"header": column_titles},
+        },
+        fieldnames=[col.lower() for col in column_titles],
+    )
+
+    REPORT.print_summary()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,51 @@
-import json
+import argparse
 
-import pandas as pd
+from minted_contact import Contact
+from minted_contact import CONTACT_FIELDS
+from minted_json import iter_json_array
+from minted_writers import DEFAULT_FORMATS
+from minted_writers import parse_formats
+from minted_writers import write_records
 
-# Update './contacts.json' to match the path of your downloaded json file, if applicable
-with open("./contacts.json", encoding="utf-8") as f:
-    data = json.load(f)
 
-address_book = pd.DataFrame(data)
-address_book.to_excel("./data/minted-addresses-converted.xlsx")
-address_book.to_csv("./data/minted-addresses-converted.csv", index=False)
+def convert_file(
+    json_path,
+    output_dir="./data",
+    formats=None,
+    basename="minted-addresses-converted",
+):
+    """
+    Stream a downloaded contacts.json file into each requested format.
+
+    Returns (count, paths) as minted_writers.write_records does.
+    """
+    with open(json_path, "rb") as f:
+        contacts = (Contact.from_api(record).to_dict() for record in iter_json_array(f))
+        return write_records(contacts, output_dir, basename, formats, CONTACT_FIELDS)
+
+
+def main(argv=None):
+    """Convert a downloaded contacts.json file."""
+    parser = argparse.ArgumentParser(description="Convert a downloaded contacts.json.")
+    parser.add_argument(
+        "input",
+        nargs="?",
+        default="./contacts.json",
+        help="downloaded JSON file (default: %(default)s)",
+    )
+    parser.add_argument("--output-dir", default="./data")
+    parser.add_argument("--basename", default="minted-addresses-converted")
+    parser.add_argument("--format", dest="formats", default=",".join(DEFAULT_FORMATS))
+    args = parser.parse_args(argv)
+    try:
+        formats = parse_formats(args.formats)
+    except ValueError as e:
+        parser.error(str(e))
+
+    count, paths = convert_file(args.input, args.output_dir, formats, args.basename)
+    for path in paths.values():
+        print(f"Converted {count} contacts to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Minted Export
+
+One entry point for the exporter's commands, and the functions to import
+when driving an export from Python instead of a subprocess:
+
+    python minted.py export --format csv,parquet
+    python minted.py convert ./contacts.json --output-dir ./data
+    python minted.py sync
+
+    import minted
+
+    for contact in minted.iter_contacts("me@example.com"):
+        print(contact.name, contact.postal_code)
+
+Commands are the scripts' own `main()`s, so `python minted.py <command>
+--help` shows the same options as running the script directly. Modules
+are imported only when their command runs, so e.g. `convert` never loads
+selenium.
+"""
+
+import importlib
+import sys
+
+COMMANDS = {
+    "export": ("minted_address_export", "Export an account's address book"),
+    "convert": ("convert_json", "Convert a downloaded contacts.json"),
+    "sync": ("minted_sync", "Incrementally sync the API export"),
+    "batch": ("minted_batch", "Export many accounts from a manifest"),
+    "dedupe": ("minted_dedupe", "Find or merge duplicate contacts"),
+    "diff": ("minted_diff", "Compare two exports"),
+    "enrich": ("minted_enrich", "Check addresses against a ZIP code table"),
+    "standin": ("minted_standin", "Run a local stand-in Minted server"),
+    "bench": ("minted_bench", "Benchmark the export strategies"),
+}
+
+# Library API: name -> (module, attribute), imported on first use
+API = {
+    "iter_contacts": ("minted_address_export", "iter_contacts"),
+    "session_cookies": ("minted_address_export", "session_cookies"),
+    "export": ("minted_address_export", "run_export"),
+    "convert": ("convert_json", "convert_file"),
+    "sync": ("minted_sync", "sync_contacts"),
+    "read_contacts": ("minted_contact", "iter_contacts_file"),
+    "find_duplicates": ("minted_dedupe", "find_duplicates"),
+    "dedupe": ("minted_dedupe", "dedupe"),
+    "diff_exports": ("minted_diff", "diff_exports"),
+    "enrich": ("minted_enrich", "enrich"),
+    "Contact": ("minted_contact", "Contact"),
+}
+
+
+def write_contacts(
+    contacts, output_dir="./data", basename="minted-addresses", formats=None
+):
+    """
+    Write Contacts (e.g. from iter_contacts) in each requested format.
+
+    Contacts are consumed as they arrive. Returns (count, paths) as
+    minted_writers.write_records does.
+    """
+    from minted_contact import CONTACT_FIELDS
+    from minted_writers import write_records
+
+    records = (contact.to_dict() for contact in contacts)
+    return write_records(records, output_dir, basename, formats, CONTACT_FIELDS)
+
+
+def __getattr__(name):
+    if name not in API:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module, attribute = API[name]
+    value = getattr(importlib.import_module(module), attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(API))
+
+
+def usage():
+    """Text listing the commands."""
+    width = max(map(len, COMMANDS))
+    lines = ["usage: python minted.py <command> [options]", "", "commands:"]
+    lines += [
+        f"  {name:<{width}}  {description}"
+        for name, (_, description) in COMMANDS.items()
+    ]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Run the command named by the first argument with the rest."""
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0 if argv else 2
+    command, args = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"Unknown command {command!r}\n\n{usage()}", file=sys.stderr)
+        return 2
+
+    module = importlib.import_module(COMMANDS[command][0])
+    sys.argv[0] = f"minted.py {command}"
+    return module.main(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
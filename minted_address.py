@@ -0,0 +1,183 @@
+"""
+Minted Address Normalization
+
+Shared parsing of "City, ST 12345-6789, Country" locality strings into
+city, state, ZIP, ZIP+4 and country, for single values and whole columns.
+"""
+
+import re
+
+# Expanded state and territory names, keyed by postal abbreviation
+STATES = {
+    "AK": "Alaska",
+    "AL": "Alabama",
+    "AR": "Arkansas",
+    "AS": "American Samoa",
+    "AZ": "Arizona",
+    "CA": "California",
+    "CO": "Colorado",
+    "CT": "Connecticut",
+    "DC": "District of Columbia",
+    "DE": "Delaware",
+    "FL": "Florida",
+    "GA": "Georgia",
+    "GU": "Guam",
+    "HI": "Hawaii",
+    "IA": "Iowa",
+    "ID": "Idaho",
+    "IL": "Illinois",
+    "IN": "Indiana",
+    "KS": "Kansas",
+    "KY": "Kentucky",
+    "LA": "Louisiana",
+    "MA": "Massachusetts",
+    "MD": "Maryland",
+    "ME": "Maine",
+    "MI": "Michigan",
+    "MN": "Minnesota",
+    "MO": "Missouri",
+    "MP": "Northern Mariana Islands",
+    "MS": "Mississippi",
+    "MT": "Montana",
+    "NA": "National",
+    "NC": "North Carolina",
+    "ND": "North Dakota",
+    "NE": "Nebraska",
+    "NH": "New Hampshire",
+    "NJ": "New Jersey",
+    "NM": "New Mexico",
+    "NV": "Nevada",
+    "NY": "New York",
+    "OH": "Ohio",
+    "OK": "Oklahoma",
+    "OR": "Oregon",
+    "PA": "Pennsylvania",
+    "PR": "Puerto Rico",
+    "RI": "Rhode Island",
+    "SC": "South Carolina",
+    "SD": "South Dakota",
+    "TN": "Tennessee",
+    "TX": "Texas",
+    "UT": "Utah",
+    "VA": "Virginia",
+    "VI": "Virgin Islands",
+    "VT": "Vermont",
+    "WA": "Washington",
+    "WI": "Wisconsin",
+    "WV": "West Virginia",
+    "WY": "Wyoming",
+}
+
+# City, ST 12345 line shown in an expanded address book row; multiline so it
+# also finds the line within a whole row's text
+CITY_STATE_ZIP = re.compile(
+    r"^([^,\n]+),[ \t]*([A-Z]{2})[ \t]+(\d{5}(?:-\d{4})?)[ \t]*$", re.MULTILINE
+)
+
+# State (or province) word followed by a ZIP, anywhere in a locality
+STATE_ZIP = re.compile(r"([a-zA-Z]{2,})\s+(\d{5})(?:-(\d{4}))?")
+
+# Anything after a trailing comma following the ZIP is the country
+TRAILING_COUNTRY = re.compile(r"\s*,\s*([A-Za-z][A-Za-z .'-]*?)\s*$")
+
+# Named-group versions of the patterns above for column-wise extraction; the
+# lazy prefix finds the same first match as STATE_ZIP.search
+LOCALITY_GROUPS = (
+    r"^.*?(?P<state>[a-zA-Z]{2,})\s+(?P<zip>\d{5})(?:-(?P<zip4>\d{4}))?(?P<rest>.*)$"
+)
+COUNTRY_GROUPS = r"^\s*,\s*(?P<country>[A-Za-z][A-Za-z .'-]*?)\s*$"
+
+LOCALITY_COLUMNS = ["city", "state", "zip", "zip4", "country"]
+LOCALITY_DTYPES = {
+    "city": "string",
+    "state": "category",
+    "zip": "string",
+    "zip4": "string",
+    "country": "category",
+}
+
+
+def parse_locality(locality, expand_states=False):
+    """
+    Split a locality string into (city, state, zip, zip4, country).
+
+    Missing parts are returned as empty strings. With expand_states, known
+    abbreviations such as "NY" become "New York".
+    """
+    locality = locality or ""
+    city = locality.split(",", 1)[0].strip()
+    match = STATE_ZIP.search(locality)
+    if not match:
+        return city, "", "", "", ""
+
+    state, zipcode, zip4 = match.group(1), match.group(2), match.group(3) or ""
+    if expand_states:
+        state = STATES.get(state.upper(), state)
+    country = TRAILING_COUNTRY.match(locality, match.end())
+    return city, state, zipcode, zip4, country.group(1) if country else ""
+
+
+def _parse_column_arrow(localities, expand_states):
+    """Parse a column with pyarrow's vectorized RE2 kernels."""
+    # pyarrow.compute generates its functions at import time
+    # pylint: disable=no-member
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    values = pa.array(localities.fillna("").astype(str), type=pa.string())
+    city = pc.utf8_trim_whitespace(
+        pc.list_element(pc.split_pattern(values, ",", max_splits=1), 0)
+    )
+    parts = pc.extract_regex(values, LOCALITY_GROUPS)
+    country = pc.extract_regex(
+        pc.fill_null(pc.struct_field(parts, "rest"), ""), COUNTRY_GROUPS
+    )
+
+    def field(struct, name):
+        return pc.fill_null(pc.struct_field(struct, name), "").to_pandas()
+
+    columns = {
+        "city": city.to_pandas(),
+        "state": field(parts, "state").astype("category"),
+        "zip": field(parts, "zip"),
+        "zip4": field(parts, "zip4"),
+        "country": field(country, "country").astype("category"),
+    }
+    if expand_states:
+        # Mapping the categories, not renaming them: "HI" and "Hawaii" (or
+        # "ny" and "NY") both become "Hawaii", so they can collide
+        columns["state"] = (
+            columns["state"]
+            .map(lambda state: STATES.get(state.upper(), state))
+            .astype("category")
+        )
+    return pd.DataFrame(columns).set_axis(localities.index)
+
+
+def _parse_column_python(localities, expand_states):
+    """Parse each distinct locality once and broadcast the results."""
+    import pandas as pd
+
+    codes, uniques = pd.factorize(localities.fillna("").astype(str))
+    parsed = pd.DataFrame(
+        [parse_locality(value, expand_states) for value in uniques],
+        columns=LOCALITY_COLUMNS,
+    )
+    return parsed.take(codes).set_axis(localities.index)
+
+
+def parse_locality_column(localities, expand_states=False):
+    """
+    Parse a pandas Series of localities into typed columns in one pass.
+
+    Uses pyarrow's vectorized regex kernels when the optional pyarrow is
+    installed, and otherwise parses each distinct locality once with the
+    precompiled patterns. Returns a DataFrame with string city/zip/zip4 and categorical
+    state/country columns, indexed like localities.
+    """
+    try:
+        parsed = _parse_column_arrow(localities, expand_states)
+    except ImportError:
+        parsed = _parse_column_python(localities, expand_states)
+    return parsed.astype(LOCALITY_DTYPES)
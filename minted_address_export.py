@@ -7,39 +7,136 @@ This script logs into Minted, navigates to the address book,
 and exports all contacts to CSV and Excel formats.
 """
 
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+import json
+import math
 import os
-from time import sleep
-
-import pandas as pd
-import requests
-from selenium.common.exceptions import NoSuchElementException
-from selenium.common.exceptions import TimeoutException
-from selenium.webdriver import Chrome
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
-from webdriver_manager.chrome import ChromeDriverManager
+import time
+
+from minted_address import CITY_STATE_ZIP
+from minted_api_client import API_ENDPOINTS
+from minted_api_client import ContactsClient
+from minted_api_client import PRINT_URL
+from minted_contact import Contact
+from minted_contact import CONTACT_FIELDS
+from minted_discovery import describe
+from minted_discovery import load_discovery
+from minted_discovery import plan_strategies
+from minted_discovery import record_attempt
+from minted_discovery import save_discovery
+from minted_driver import resolve_chromedriver
+from minted_journal import ExportJournal
+from minted_journal import journal_path
+from minted_metrics import METRICS
+from minted_metrics import METRICS_FILENAME
+from minted_metrics import profiled
+from minted_pipeline import background
+from minted_print_page import iter_print_rows
+from minted_print_page import open_print_page
+from minted_session import apply_session
+from minted_session import clear_session
+from minted_session import cookie_dict
+from minted_session import load_session
+from minted_session import save_session
+from minted_session import session_is_valid
+from minted_waits import document_ready
+from minted_waits import network_idle
+from minted_waits import REPORT
+from minted_waits import url_excludes
+from minted_waits import wait_for
+from minted_writers import DEFAULT_FORMATS
+from minted_writers import parse_formats
+from minted_writers import write_records
+from minted_writers import WRITERS
+
+EXPORT_BASENAME = "minted-addresses"
+
+# run_export method name for each kind of strategy
+STRATEGY_METHODS = {"api": "api", "print": "print", "dom": "scrape"}
+
+LOGIN_URL = "https://login.minted.com/"
+ADDRESS_BOOK_URL = "https://www.minted.com/addressbook/my-account/finalize/0"
+
+# Returns the Next.js hydration payload, which may already hold every contact
+HYDRATED_STATE_SCRIPT = """
+const el = document.getElementById("__NEXT_DATA__");
+return el ? el.textContent : null;
+"""
 
+# Pulls name, street and every leaf text line of all rows in one round trip
+BULK_EXTRACT_SCRIPT = """
+const rows = document.querySelectorAll("[data-cy='abk_contactRow']");
+return Array.from(rows, (row) => {
+  const name = row.querySelector(".css-f8pz0c");
+  const street = row.querySelector(".css-1mzdrva div:first-child");
+  const lines = [];
+  row.querySelectorAll("*").forEach((el) => {
+    const text = el.children.length ? "" : el.textContent.trim();
+    if (text) lines.push(text);
+  });
+  return {
+    name: name ? name.textContent.trim() : "",
+    street_line1: street ? street.textContent.trim() : "",
+    lines: lines,
+  };
+});
+"""
 
-def get_credentials():
-    """Get Minted credentials from environment variables or user input."""
+# Inputs that are only present while the edit contact modal is open
+MODAL_FIELDS_SELECTOR = (
+    "#addressLine1, #city, #zipCode, [name='addressLine1'], [name='city'], "
+    "[name='zipCode']"
+)
+
+# Hydrated contact fields mapped onto the scraped contact keys
+STATE_FIELD_MAPPINGS = {
+    "name": "name",
+    "firstName": "first_name",
+    "lastName": "last_name",
+    "address1": "street_line1",
+    "addressLine1": "street_line1",
+    "address2": "street_line2",
+    "addressLine2": "street_line2",
+    "locality": "city",
+    "city": "city",
+    "administrative_area": "state",
+    "state": "state",
+    "postal_code": "zip",
+    "zipCode": "zip",
+    "country": "country",
+}
+
+
+def get_email():
+    """Get the Minted email from the environment or user input."""
     try:
-        email = os.environ["minted_email"]
+        return os.environ["minted_email"]
     except KeyError:
-        email = input("Enter your minted.com email address: ")
+        return input("Enter your minted.com email address: ")
 
+
+def get_password():
+    """Get the Minted password from the environment or user input."""
     try:
-        password = os.environ["minted_password"]
+        return os.environ["minted_password"]
     except KeyError:
-        password = input("Enter your minted.com password: ")
+        return input("Enter your minted.com password: ")
 
-    return email, password
 
+def get_credentials():
+    """Get Minted credentials from environment variables or user input."""
+    return get_email(), get_password()
 
+
+@METRICS.timed()
 def setup_driver(headless=False):
     """Set up Chrome WebDriver with options."""
+    from selenium.webdriver import Chrome
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+
     options = Options()
     if headless:
         options.add_argument("--headless=new")
@@ -53,7 +150,7 @@ def setup_driver(headless=False):
     options.add_experimental_option("detach", False)
 
     print("Starting Chrome browser (window should appear)...")
-    service = Service(ChromeDriverManager().install())
+    service = Service(resolve_chromedriver())
     driver = Chrome(service=service, options=options)
 
     # Further avoid detection
@@ -61,27 +158,38 @@ def setup_driver(headless=False):
         "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
     )
 
-    # Make sure window is visible and positioned on screen
-    sleep(1)
-    driver.set_window_position(100, 100)
-    driver.set_window_size(1200, 900)
-    sleep(1)
+    # Make sure window is visible and positioned on screen; these calls
+    # block until the window has moved, so no settling delay is needed
+    with REPORT.phase("setup_driver", fixed_delay=2):
+        driver.set_window_position(100, 100)
+        driver.set_window_size(1200, 900)
     print("Browser window should now be visible")
 
     return driver
 
 
+@METRICS.timed()
 def login_to_minted(driver, email, password):
     """Log in to Minted via the login page."""
-    login_url = "https://login.minted.com/"
-    print(f"Navigating to login page: {login_url}")
-    driver.get(login_url)
+    from selenium.common.exceptions import NoSuchElementException
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
 
-    wait = WebDriverWait(driver, 20)
+    print(f"Navigating to login page: {LOGIN_URL}")
+    driver.get(LOGIN_URL)
+    # We're logged in once the browser has been redirected away from here
+    login_page = LOGIN_URL.split("://", 1)[-1].rstrip("/")
 
     try:
-        # Wait for page to load
-        sleep(2)
+        # Wait for the login form to render
+        wait_for(
+            driver,
+            EC.presence_of_element_located((By.TAG_NAME, "input")),
+            timeout=20,
+            phase="login page load",
+            fixed_delay=2,
+        )
 
         # Try multiple selectors for email field
         email_field = None
@@ -113,7 +221,13 @@ def login_to_minted(driver, email, password):
                 )
             return False
 
-        sleep(0.5)
+        wait_for(
+            driver,
+            EC.element_to_be_clickable(email_field),
+            timeout=5,
+            phase="login form",
+            fixed_delay=0.5,
+        )
         email_field.clear()
         email_field.send_keys(email)
         print("Entered email")
@@ -144,8 +258,6 @@ def login_to_minted(driver, email, password):
         password_field.send_keys(password)
         print("Entered password")
 
-        sleep(1)  # Small delay before clicking
-
         # Find and click login button - try multiple selectors
         login_button = None
         button_selectors = [
@@ -171,6 +283,13 @@ def login_to_minted(driver, email, password):
                 continue
 
         if login_button:
+            wait_for(
+                driver,
+                EC.element_to_be_clickable(login_button),
+                timeout=5,
+                phase="login form",
+                fixed_delay=1,
+            )
             # Use JavaScript click as it's more reliable
             driver.execute_script("arguments[0].click();", login_button)
             print(f"Clicked login button: {login_button.text or 'submit'}")
@@ -184,14 +303,17 @@ def login_to_minted(driver, email, password):
         # Wait for login to complete - check for redirect away from login page
         print("Waiting for login to complete...")
         max_wait = 30  # seconds
-        for i in range(max_wait):
-            sleep(1)
-            current_url = driver.current_url
-            if "login.minted.com" not in current_url:
+        for waited in range(5, max_wait + 1, 5):
+            current_url = wait_for(
+                driver,
+                url_excludes(login_page),
+                timeout=5,
+                phase="login redirect",
+            )
+            if current_url:
                 print(f"Login successful! Redirected to: {current_url}")
                 return True
-            if i % 5 == 4:
-                print(f"  Still on login page after {i+1} seconds...")
+            print(f"  Still on login page after {waited} seconds...")
 
         # If we're still on login page, check for error messages
         print(f"Current URL after {max_wait}s: {driver.current_url}")
@@ -221,10 +343,13 @@ def login_to_minted(driver, email, password):
 
         try:
             input("\n>>> Press Enter when logged in: ")
-            sleep(2)  # Give page time to settle
+            # Give page time to settle
+            wait_for(
+                driver, document_ready, timeout=10, phase="manual login", fixed_delay=2
+            )
             current_url = driver.current_url
             print(f"Current URL: {current_url}")
-            if "login.minted.com" not in current_url:
+            if login_page not in current_url:
                 print("Login successful!")
                 return True
             else:
@@ -242,65 +367,236 @@ def login_to_minted(driver, email, password):
         return False
 
 
-def try_api_export(driver):
-    """Try to export contacts via the API (legacy method)."""
-    print("Attempting API export...")
-    cookies = {c["name"]: c["value"] for c in driver.get_cookies()}
+@METRICS.timed()
+def stream_api_export(
+    cookies, output_dir="./data", formats=None, journal=None, endpoints=None
+):
+    """
+    Stream contacts from the API straight into the export files.
 
-    api_endpoints = [
-        "https://addressbook.minted.com/api/contacts/contacts/?format=json",
-        "https://addressbook.minted.com/api/contacts/?format=json",
-    ]
+    Records are written as they are decoded, so the full contact list is
+    never held in memory. With a journal, contacts captured by an earlier
+    run are replayed rather than fetched again, and new ones are journaled.
+    endpoints defaults to every known API endpoint, tried in order; an
+    endpoint that fails part way leaves any earlier export files as they
+    were. Returns the number of contacts written.
+    """
+    print("Attempting streamed API export...")
 
-    for endpoint in api_endpoints:
+    with ContactsClient(cookies=cookies) as client:
         try:
-            response = requests.get(endpoint, cookies=cookies, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                if data:
-                    print(f"API export successful from {endpoint}")
-                    return data
-        except Exception as e:
-            print(f"API endpoint {endpoint} failed: {e}")
+            for endpoint in endpoints or API_ENDPOINTS:
+                try:
+                    done = journal.api_contacts(endpoint) if journal else []
+                    if done:
+                        print(f"Resuming after {len(done)} journaled contacts")
+                    records = client.iter_contacts(
+                        endpoint, stream=True, skip=len(done)
+                    )
+                    if journal:
+                        records = chain(done, journal.record_api(endpoint, records))
+                    # Fetching, normalizing and each writer overlap
+                    records = background(records, "fetch")
+                    records = background(
+                        (Contact.from_api(r).to_dict() for r in records), "normalize"
+                    )
+                    count, paths = write_records(
+                        records, output_dir, EXPORT_BASENAME, formats, CONTACT_FIELDS
+                    )
+                    if count:
+                        print(f"API export successful from {endpoint}")
+                        for path in paths.values():
+                            print(f"Exported {count} contacts to {path}")
+                        return count
+                except Exception as e:
+                    print(f"API endpoint {endpoint} failed: {e}")
+        finally:
+            client.scheduler.stats.print_summary()
+            METRICS.detail("requests", client.scheduler.stats.summary())
+
+    print("API export not available")
+    return 0
+
+
+@METRICS.timed()
+def print_page_export(cookies, output_dir="./data", formats=None, url=PRINT_URL):
+    """
+    Export contacts from the address book's print page HTML.
+
+    Needs no browser, so it sits between the JSON API and DOM scraping.
+    Contacts are parsed and written while the page downloads. Returns the
+    number of contacts written.
+    """
+    print("Attempting print page export...")
+    try:
+        with open_print_page(cookies, url) as body:
+            rows = background(iter_print_rows(body), "fetch")
+            return export_contacts(
+                (Contact.from_print_row(row) for row in rows), output_dir, formats
+            )
+    except Exception as e:
+        print(f"Print page {url} failed: {e}")
+        return 0
 
-    print("API export not available, falling back to page scraping")
-    return None
 
+def open_address_book(driver):
+    """
+    Load the address book page and wait for its rows to render.
 
-def scrape_address_book(driver):
-    """Scrape contacts from the address book page."""
-    address_book_url = "https://www.minted.com/addressbook/my-account/finalize/0"
-    print(f"Navigating to address book: {address_book_url}")
-    driver.get(address_book_url)
+    Raises TimeoutException if the contacts table never appears.
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
 
-    wait = WebDriverWait(driver, 20)
-    contacts = []
+    print(f"Navigating to address book: {ADDRESS_BOOK_URL}")
+    driver.get(ADDRESS_BOOK_URL)
 
-    try:
-        # Wait for contacts table to load
-        wait.until(
-            EC.presence_of_element_located(
-                (By.CSS_SELECTOR, "[data-cy='abk_contactsTable']")
-            )
+    # Wait for contacts table to load
+    WebDriverWait(driver, 20).until(
+        EC.presence_of_element_located(
+            (By.CSS_SELECTOR, "[data-cy='abk_contactsTable']")
         )
-        sleep(2)  # Additional wait for dynamic content
+    )
+    # Wait for rows to render and dynamic content to finish loading
+    wait_for(
+        driver,
+        EC.presence_of_element_located((By.CSS_SELECTOR, "[data-cy='abk_contactRow']")),
+        timeout=5,
+        phase="address book load",
+        fixed_delay=2,
+    )
+    wait_for(
+        driver, network_idle(), timeout=5, phase="address book load", fixed_delay=0
+    )
 
-        # Find all contact rows
-        contact_rows = driver.find_elements(
-            By.CSS_SELECTOR, "[data-cy='abk_contactRow']"
-        )
-        print(f"Found {len(contact_rows)} contacts")
 
-        for i, row in enumerate(contact_rows):
+def extract_rows(driver, indices, journal=None):
+    """
+    Run the per-row extraction on the given row indices of the open page.
+
+    Each extracted row is added to journal, if one is given.
+    """
+    from selenium.webdriver.common.by import By
+
+    contact_rows = driver.find_elements(By.CSS_SELECTOR, "[data-cy='abk_contactRow']")
+    contacts = {}
+    for i in indices:
+        try:
+            contact_data = extract_contact_from_row(driver, contact_rows[i], i)
+            if contact_data:
+                contacts[i] = contact_data
+                METRICS.count("rows extracted")
+                if journal:
+                    journal.record_row(i, contact_data)
+                print(
+                    f"  Extracted contact {i+1}: {contact_data.get('name', 'Unknown')}"
+                )
+        except Exception as e:
+            METRICS.count("row errors")
+            print(f"  Error extracting contact {i+1}: {e}")
+    return contacts
+
+
+def scrape_shard(cookies, indices, headless=True, journal=None):
+    """
+    Extract rows in a separate browser that shares the logged-in cookies.
+
+    Returns ({index: contact}, seconds spent on row extraction).
+    """
+    driver = setup_driver(headless=headless)
+    try:
+        apply_session(driver, cookies)
+        open_address_book(driver)
+        start = time.perf_counter()
+        contacts = extract_rows(driver, indices, journal)
+        return contacts, time.perf_counter() - start
+    finally:
+        driver.quit()
+
+
+def scrape_rows_sharded(driver, indices, shards, headless=True, journal=None):
+    """
+    Split row indices into contiguous shards, one browser per shard.
+
+    Each shard runs in its own Chrome, since tabs of one WebDriver session
+    can't run commands in parallel. Returns {index: contact}.
+    """
+    cookies = driver.get_cookies()
+    size = math.ceil(len(indices) / shards)
+    chunks = [indices[i : i + size] for i in range(0, len(indices), size)]
+    print(f"Sharding {len(indices)} rows across {len(chunks)} browsers")
+
+    start = time.perf_counter()
+    contacts = {}
+    busy = 0.0
+    with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+        futures = [
+            pool.submit(scrape_shard, cookies, chunk, headless, journal)
+            for chunk in chunks
+        ]
+        for future in futures:
             try:
-                contact_data = extract_contact_from_row(driver, row, i)
-                if contact_data:
-                    contacts.append(contact_data)
-                    print(
-                        f"  Extracted contact {i+1}: {contact_data.get('name', 'Unknown')}"
-                    )
+                shard_contacts, shard_seconds = future.result()
+                contacts.update(shard_contacts)
+                busy += shard_seconds
             except Exception as e:
-                print(f"  Error extracting contact {i+1}: {e}")
+                print(f"  Shard failed: {e}")
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Sharded extraction took {elapsed:.1f}s for {busy:.1f}s of row work "
+        f"({busy / elapsed if elapsed else 0:.1f}x speedup)"
+    )
+    return contacts
+
+
+@METRICS.timed()
+def scrape_address_book(driver, shards=1, headless=True, journal=None):
+    """
+    Scrape contacts from the address book page.
+
+    With shards > 1, rows that need the slow per-row expansion are split
+    across that many extra browsers and merged back in page order. Rows
+    already in a resumed journal are reused instead of expanded again.
+    """
+    from selenium.common.exceptions import TimeoutException
+
+    contacts = []
+
+    try:
+        open_address_book(driver)
+
+        # Pull every row in bulk first; this is one or two WebDriver calls
+        contacts = bulk_extract_contacts(driver)
+        print(f"Found {len(contacts)} contacts")
+
+        # Only rows still missing city/state/zip need the slow per-row path
+        incomplete = [i for i, contact in enumerate(contacts) if "city" not in contact]
+        if journal:
+            # Reuse rows from an earlier run, as long as the row still matches
+            scraped = journal.scraped_rows()
+            resumed = {
+                i
+                for i in incomplete
+                if scraped.get(i, {}).get("name") == contacts[i].get("name")
+            }
+            for i in resumed:
+                contacts[i] = scraped[i]
+            if resumed:
+                METRICS.count("rows resumed", len(resumed))
+                print(f"Resumed {len(resumed)} rows from the journal")
+                incomplete = [i for i in incomplete if i not in resumed]
+        if incomplete:
+            print(f"Expanding {len(incomplete)} rows for missing address details")
+            if shards > 1 and len(incomplete) > shards:
+                extracted = scrape_rows_sharded(
+                    driver, incomplete, shards, headless, journal
+                )
+            else:
+                extracted = extract_rows(driver, incomplete, journal)
+            for i, contact_data in extracted.items():
+                contacts[i] = contact_data
 
     except TimeoutException:
         print("ERROR: Address book page did not load properly")
@@ -308,8 +604,126 @@ def scrape_address_book(driver):
     return contacts
 
 
+def parse_row_lines(lines, contact):
+    """Fill in city, state and zip on contact from a row's text lines."""
+    for line in lines:
+        line = line.strip()
+        # Skip the name and street we already have
+        if line in (contact.get("name"), contact.get("street_line1")):
+            continue
+        # Look for city, state ZIP pattern
+        city_state_zip = CITY_STATE_ZIP.search(line)
+        if city_state_zip:
+            contact["city"] = city_state_zip.group(1)
+            contact["state"] = city_state_zip.group(2)
+            contact["zip"] = city_state_zip.group(3)
+    return contact
+
+
+def has_city_state_zip(text):
+    """Whether any line of a row's text is a "City, ST 12345" line."""
+    return any(CITY_STATE_ZIP.search(line.strip()) for line in text.split("\n"))
+
+
+def contact_from_row_data(row_data):
+    """Build a contact from the name/street/lines extracted for one row."""
+    contact = {
+        "name": row_data.get("name", ""),
+        "street_line1": row_data.get("street_line1", ""),
+    }
+    return parse_row_lines(row_data.get("lines", []), contact)
+
+
+def find_contact_records(data):
+    """Find the first list of contact-like dicts in a hydrated state payload."""
+    if isinstance(data, list):
+        if (
+            data
+            and all(isinstance(item, dict) for item in data)
+            and ("address1" in data[0] or "addressLine1" in data[0])
+        ):
+            return data
+        children = data
+    elif isinstance(data, dict):
+        children = data.values()
+    else:
+        return None
+
+    for child in children:
+        found = find_contact_records(child)
+        if found:
+            return found
+    return None
+
+
+def contacts_from_state(state):
+    """Map contacts found in a hydrated state payload onto contact dicts."""
+    contacts = []
+    for record in find_contact_records(state) or []:
+        contact = {"name": "", "street_line1": "", "city": "", "state": "", "zip": ""}
+        for field, contact_key in STATE_FIELD_MAPPINGS.items():
+            if record.get(field) is not None:
+                contact[contact_key] = record[field]
+        contacts.append(contact)
+    return contacts
+
+
+@METRICS.timed()
+def bulk_extract_contacts(driver):
+    """
+    Extract every contact on the address book page without per-row clicks.
+
+    Uses the page's hydrated JSON state when it holds the contacts, and
+    otherwise reads all rows' text in a single execute_script call.
+    """
+    state = driver.execute_script(HYDRATED_STATE_SCRIPT)
+    if state:
+        try:
+            contacts = contacts_from_state(json.loads(state))
+            if contacts:
+                return contacts
+        except ValueError:
+            pass
+
+    rows = driver.execute_script(BULK_EXTRACT_SCRIPT) or []
+    return [contact_from_row_data(row) for row in rows]
+
+
+def extract_contacts_from_html(html):
+    """Extract contacts from saved address book HTML, e.g. page_source."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    script = soup.find("script", id="__NEXT_DATA__")
+    if script and script.string:
+        contacts = contacts_from_state(json.loads(script.string))
+        if contacts:
+            return contacts
+
+    contacts = []
+    for row in soup.select("[data-cy='abk_contactRow']"):
+        name = row.select_one(".css-f8pz0c")
+        street = row.select_one(".css-1mzdrva div:first-child")
+        lines = [
+            elem.get_text(strip=True)
+            for elem in row.find_all(True)
+            if not elem.find(True)
+        ]
+        row_data = {
+            "name": name.get_text(strip=True) if name else "",
+            "street_line1": street.get_text(strip=True) if street else "",
+            "lines": [line for line in lines if line],
+        }
+        contacts.append(contact_from_row_data(row_data))
+    return contacts
+
+
+@METRICS.timed()
 def extract_contact_from_row(driver, row, index):
     """Extract contact information from a single row, expanding if needed."""
+    from selenium.common.exceptions import NoSuchElementException
+    from selenium.webdriver.common.by import By
+
     contact = {}
 
     try:
@@ -331,40 +745,30 @@ def extract_contact_from_row(driver, row, index):
         expand_button = row.find_element(
             By.CSS_SELECTOR, "[data-cy='abk_expandContactButton'] button"
         )
+        collapsed_text = row.text
         driver.execute_script("arguments[0].click();", expand_button)
-        sleep(0.5)  # Wait for expansion
 
-        # Look for expanded content with full address details
-        # The expanded view typically shows city, state, zip
-        expanded_content = row.find_elements(By.CSS_SELECTOR, "div")
-
-        # Parse expanded content for additional address fields
-        full_text = row.text
-        lines = full_text.split("\n")
-
-        # Try to identify city, state, zip from the expanded text
-        for line in lines:
-            line = line.strip()
-            # Skip the name we already have
-            if line == contact.get("name"):
-                continue
-            # Skip the street we already have
-            if line == contact.get("street_line1"):
-                continue
-            # Look for city, state ZIP pattern
-            import re
+        # Wait for expansion to reveal a city, state ZIP line
+        expanded_text = wait_for(
+            driver,
+            lambda _: row.text if has_city_state_zip(row.text) else False,
+            timeout=1,
+            phase="row expand",
+            fixed_delay=0.5,
+        )
 
-            city_state_zip = re.search(
-                r"^([^,]+),\s*([A-Z]{2})\s+(\d{5}(?:-\d{4})?)$", line
-            )
-            if city_state_zip:
-                contact["city"] = city_state_zip.group(1)
-                contact["state"] = city_state_zip.group(2)
-                contact["zip"] = city_state_zip.group(3)
+        # Parse expanded content for city, state and zip
+        parse_row_lines((expanded_text or row.text).split("\n"), contact)
 
         # Collapse the row
         driver.execute_script("arguments[0].click();", expand_button)
-        sleep(0.3)
+        wait_for(
+            driver,
+            lambda _: row.text == collapsed_text,
+            timeout=1,
+            phase="row collapse",
+            fixed_delay=0.3,
+        )
 
     except NoSuchElementException:
         pass
@@ -383,12 +787,25 @@ def extract_contact_from_row(driver, row, index):
 
 def get_contact_from_edit_modal(driver, row, contact):
     """Open the edit modal to get full contact details."""
+    from selenium.common.exceptions import NoSuchElementException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.common.keys import Keys
+    from selenium.webdriver.support import expected_conditions as EC
+
     try:
         edit_button = row.find_element(
             By.CSS_SELECTOR, "[data-cy='abk_editContactButton'] button"
         )
         driver.execute_script("arguments[0].click();", edit_button)
-        sleep(1)  # Wait for modal to open
+
+        # Wait for modal to open
+        wait_for(
+            driver,
+            EC.visibility_of_element_located((By.CSS_SELECTOR, MODAL_FIELDS_SELECTOR)),
+            timeout=3,
+            phase="modal open",
+            fixed_delay=1,
+        )
 
         # Look for form fields in the modal
         field_mappings = {
@@ -430,20 +847,31 @@ def get_contact_from_edit_modal(driver, row, contact):
             (By.CSS_SELECTOR, ".modal-close"),
         ]
 
+        modal_closed = EC.invisibility_of_element_located(
+            (By.CSS_SELECTOR, MODAL_FIELDS_SELECTOR)
+        )
+        closed = False
         for selector_type, selector in close_selectors:
             try:
                 close_button = driver.find_element(selector_type, selector)
                 driver.execute_script("arguments[0].click();", close_button)
-                sleep(0.5)
+                closed = wait_for(
+                    driver,
+                    modal_closed,
+                    timeout=2,
+                    phase="modal close",
+                    fixed_delay=0.5,
+                )
                 break
             except NoSuchElementException:
                 continue
 
-        # If no close button found, press Escape
-        from selenium.webdriver.common.keys import Keys
-
-        driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ESCAPE)
-        sleep(0.5)
+        # If no close button worked, press Escape
+        if not closed:
+            driver.find_element(By.TAG_NAME, "body").send_keys(Keys.ESCAPE)
+            wait_for(
+                driver, modal_closed, timeout=2, phase="modal close", fixed_delay=0.5
+            )
 
     except Exception as e:
         print(f"    Edit modal error: {e}")
@@ -451,80 +879,310 @@ def get_contact_from_edit_modal(driver, row, contact):
     return contact
 
 
-def export_contacts(contacts, output_dir="./data"):
-    """Export contacts to CSV and Excel files."""
-    if not contacts:
+@METRICS.timed()
+def export_contacts(contacts, output_dir="./data", formats=None):
+    """
+    Export Contacts to each requested format (CSV and Excel by default).
+
+    contacts can be any iterable, e.g. a generator: contacts are converted
+    on their own thread and written as they arrive. Returns the number of
+    contacts written.
+    """
+    records = background((contact.to_dict() for contact in contacts), "normalize")
+    count, paths = write_records(
+        records, output_dir, EXPORT_BASENAME, formats, fieldnames=CONTACT_FIELDS
+    )
+    if not count:
         print("No contacts to export")
-        return
-
-    # Ensure output directory exists
-    os.makedirs(output_dir, exist_ok=True)
-
-    # Create DataFrame
-    df = pd.DataFrame(contacts)
-
-    # Reorder columns if they exist
-    preferred_order = [
-        "name",
-        "first_name",
-        "last_name",
-        "street_line1",
-        "street_line2",
-        "city",
-        "state",
-        "zip",
-        "country",
-    ]
+    for path in paths.values():
+        print(f"Exported {count} contacts to {path}")
+    return count
+
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Export a Minted address book.")
+    parser.add_argument(
+        "--format",
+        dest="formats",
+        default=",".join(DEFAULT_FORMATS),
+        help=f"comma-separated output formats ({', '.join(sorted(WRITERS))}); "
+        "default: %(default)s",
+    )
+    parser.add_argument(
+        "--output-dir", default="./data", help="directory for exported files"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue an interrupted export from its journal",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="browsers to split slow row scraping across (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="run under cProfile and save the stats to PATH",
+    )
+    args = parser.parse_args(argv)
+    try:
+        args.formats = parse_formats(args.formats)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+def run_export(
+    email,
+    password=None,
+    output_dir="./data",
+    formats=None,
+    headless=True,
+    shards=1,
+    resume=False,
+):
+    """
+    Export one account's address book to output_dir.
+
+    Export strategies (API endpoints, the print page, DOM scraping) are tried
+    in the order minted_discovery suggests, over a cached session when Minted
+    still accepts it; the browser is only started to log in or to scrape.
+    The password is asked for (see get_password) only if a login is needed.
+    Returns (method, count) where method is "api", "print" or "scrape",
+    prefixed with "cached-" when no login was needed, or "failed". shards
+    > 1 splits row scraping across that many extra browsers.
+
+    Progress is journaled in output_dir as it goes; with resume=True an
+    interrupted export picks up from the journal instead of starting over.
+    Phase timings and counters are written to output_dir/METRICS_FILENAME.
+    """
+    METRICS.reset()
+    REPORT.phases.clear()
+    path = journal_path(output_dir)
+    if not resume and os.path.exists(path):
+        print("Found an interrupted export; starting over (use --resume to continue)")
+    journal = ExportJournal(path, resume=resume)
+    try:
+        method, count = _run_export(
+            email, password, output_dir, formats, headless, shards, journal
+        )
+    except BaseException:
+        journal.close()
+        print(f"\nProgress saved to {path}; rerun with --resume to continue")
+        raise
+    finally:
+        METRICS.write_report(os.path.join(output_dir, METRICS_FILENAME), REPORT)
+
+    if method == "failed":
+        journal.close()
+    else:
+        journal.clear()
+    return method, count
+
+
+def start_browser(headless, cookies=None):
+    """Start Chrome, logged in with cookies if given."""
+    print("\nSetting up browser...")
+    driver = setup_driver(headless=headless)
+    if cookies:
+        apply_session(driver, cookies)
+    return driver
 
-    existing_cols = [col for col in preferred_order if col in df.columns]
-    other_cols = [col for col in df.columns if col not in preferred_order]
-    df = df[existing_cols + other_cols]
 
-    # Export to CSV
-    csv_path = os.path.join(output_dir, "minted-addresses.csv")
-    df.to_csv(csv_path, index=False)
-    print(f"Exported {len(contacts)} contacts to {csv_path}")
+def run_strategy(
+    strategy, cookies, driver, output_dir, formats, journal, shards, headless
+):
+    """Export with one strategy and return the number of contacts written."""
+    if strategy.startswith("api:"):
+        return stream_api_export(
+            cookie_dict(cookies), output_dir, formats, journal, [strategy[4:]]
+        )
+    if strategy == "print":
+        return print_page_export(cookie_dict(cookies), output_dir, formats)
 
-    # Export to Excel
-    excel_path = os.path.join(output_dir, "minted-addresses.xlsx")
-    df.to_excel(excel_path, index=False)
-    print(f"Exported {len(contacts)} contacts to {excel_path}")
+    print("\nScraping address book page...")
+    contacts = [
+        Contact.from_scraped(contact)
+        for contact in scrape_address_book(driver, shards, headless, journal)
+    ]
+    if contacts:
+        print(f"\nExporting {len(contacts)} contacts...")
+        export_contacts(contacts, output_dir, formats)
+    return len(contacts)
+
+
+def _run_export(email, password, output_dir, formats, headless, shards, journal):
+    """Try each export strategy in the order the discovery cache suggests."""
+    cache = load_discovery()
+    order = plan_strategies(cache)
+    print("\nStrategy order:")
+    for strategy in order:
+        print(f"  {describe(cache, strategy)}")
+
+    # Reuse a cached session over plain HTTP if Minted still accepts it
+    cookies = load_session(email)
+    if cookies and session_is_valid(cookies):
+        print("\nUsing cached session")
+    elif cookies:
+        print("\nCached session was rejected, logging in again")
+        clear_session(email)
+        cookies = None
+    prefix = "cached-" if cookies else ""
+
+    driver = None
+    try:
+        if not cookies:
+            if password is None:
+                password = get_password()
+            driver = start_browser(headless)
+            print("\nLogging in...")
+            if not login_to_minted(driver, email, password):
+                print("Login failed.")
+                return "failed", 0
+            cookies = driver.get_cookies()
+            save_session(email, cookies)
+
+        method = "failed"
+        for strategy in order:
+            if strategy == "dom" and driver is None:
+                driver = start_browser(headless, cookies)
+            start = time.perf_counter()
+            count = run_strategy(
+                strategy,
+                cookies,
+                driver,
+                output_dir,
+                formats,
+                journal,
+                shards,
+                headless,
+            )
+            elapsed = time.perf_counter() - start
+            record_attempt(cache, strategy, count, elapsed)
+            METRICS.record(f"strategy {strategy}", elapsed)
+            METRICS.count(f"contacts from {strategy}", count)
+            method = prefix + STRATEGY_METHODS[strategy.split(":")[0]]
+            if count:
+                return method, count
+        return method, 0
 
-    return df
+    finally:
+        save_discovery(cache)
+        REPORT.print_summary()
+        METRICS.print_summary()
+        if driver is not None:
+            print("\nClosing browser...")
+            driver.quit()
+
+
+def session_cookies(email, password=None, headless=True):
+    """
+    Return logged-in cookies for email.
+
+    Uses the cached session while Minted still accepts it; otherwise logs
+    in with a browser that is closed again straight away, and caches the
+    new session. The password is asked for only if a login is needed.
+    Raises RuntimeError if the login fails.
+    """
+    cookies = load_session(email)
+    if cookies and session_is_valid(cookies):
+        return cookies
+    if cookies:
+        clear_session(email)
+
+    if password is None:
+        password = get_password()
+    driver = start_browser(headless)
+    try:
+        if not login_to_minted(driver, email, password):
+            raise RuntimeError("Login failed")
+        cookies = driver.get_cookies()
+    finally:
+        driver.quit()
+    save_session(email, cookies)
+    return cookies
+
+
+def _strategy_contacts(strategy, cookies, headless, shards):
+    """Yield Contacts from one export strategy, as they are fetched."""
+    if strategy.startswith("api:"):
+        with ContactsClient(cookies=cookie_dict(cookies)) as client:
+            for record in client.iter_contacts(strategy[4:], stream=True):
+                yield Contact.from_api(record)
+    elif strategy == "print":
+        with open_print_page(cookie_dict(cookies)) as body:
+            for row in iter_print_rows(body):
+                yield Contact.from_print_row(row)
+    else:
+        driver = start_browser(headless, cookies)
+        try:
+            for contact in scrape_address_book(driver, shards, headless):
+                yield Contact.from_scraped(contact)
+        finally:
+            driver.quit()
+
+
+def iter_contacts(email, password=None, headless=True, shards=1, strategies=None):
+    """
+    Yield an account's contacts as Contacts, without writing any files.
+
+    Strategies are tried in the order minted_discovery suggests (or the
+    given order), as in run_export, but contacts are yielded as they are
+    fetched. A strategy that fails before producing any contacts falls
+    through to the next one; a failure part way through is raised, since
+    the contacts already yielded can't be taken back.
+    """
+    cache = load_discovery()
+    cookies = session_cookies(email, password, headless)
+    try:
+        for strategy in strategies or plan_strategies(cache):
+            start = time.perf_counter()
+            count = 0
+            try:
+                for contact in _strategy_contacts(strategy, cookies, headless, shards):
+                    count += 1
+                    yield contact
+            except Exception as e:
+                record_attempt(cache, strategy, 0, time.perf_counter() - start)
+                if count:
+                    raise
+                print(f"{strategy} failed: {e}")
+                continue
+            record_attempt(cache, strategy, count, time.perf_counter() - start)
+            if count:
+                return
+    finally:
+        save_discovery(cache)
 
 
-def main():
+def main(argv=None):
     """Main function to orchestrate the export process."""
+    args = parse_args(argv)
+
     print("=" * 50)
     print("Minted Address Book Export")
     print("=" * 50)
 
     # Get credentials
-    email, password = get_credentials()
-
-    # Set up driver (set headless=False to see the browser)
-    print("\nSetting up browser...")
-    driver = setup_driver(headless=True)
+    email = get_email()
 
     try:
-        # Login
-        print("\nLogging in...")
-        if not login_to_minted(driver, email, password):
+        with profiled(args.profile):
+            method, count = run_export(
+                email,
+                None,
+                args.output_dir,
+                args.formats,
+                shards=args.shards,
+                resume=args.resume,
+            )
+        if method == "failed":
             print("Login failed. Exiting.")
-            return
-
-        # Try API export first
-        contacts = try_api_export(driver)
-
-        # If API didn't work, scrape the page
-        if not contacts:
-            print("\nScraping address book page...")
-            contacts = scrape_address_book(driver)
-
-        # Export results
-        if contacts:
-            print(f"\nExporting {len(contacts)} contacts...")
-            export_contacts(contacts)
+        elif count:
             print("\nExport complete!")
         else:
             print("\nNo contacts found to export.")
@@ -535,10 +1193,6 @@ def main():
 
         traceback.print_exc()
 
-    finally:
-        print("\nClosing browser...")
-        driver.quit()
-
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,200 @@
+"""
+Minted Contacts API Client
+
+Pooled, paginated client for the addressbook.minted.com contacts API.
+Follows `next` links (page or limit/offset style) and keeps a bounded
+number of page fetches in flight at once. Requests go through a
+RequestScheduler, which retries transient failures.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import io
+from itertools import islice
+import json
+import math
+from urllib.parse import parse_qs
+from urllib.parse import urlencode
+from urllib.parse import urlparse
+from urllib.parse import urlunparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from minted_json import iter_json_array
+from minted_scheduler import RequestScheduler
+
+CONTACTS_URL = "https://addressbook.minted.com/api/contacts/contacts/?format=json"
+PRINT_URL = "https://addressbook.minted.com/api/contacts/contacts/print/?"
+
+API_ENDPOINTS = [
+    CONTACTS_URL,
+    "https://addressbook.minted.com/api/contacts/?format=json",
+]
+
+
+def make_session(cookies=None, pool_size=8):
+    """Create a requests Session with a connection pool sized for paging."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept"] = "application/json"
+    if cookies:
+        session.cookies.update(cookies)
+    return session
+
+
+def _replace_query(url, **params):
+    """Return url with the given query parameters replaced."""
+    parts = urlparse(url)
+    query = parse_qs(parts.query, keep_blank_values=True)
+    for key, value in params.items():
+        query[key] = [str(value)]
+    return urlunparse(parts._replace(query=urlencode(query, doseq=True)))
+
+
+def remaining_page_urls(first_page, next_url):
+    """
+    Work out the URLs of every page after the first one.
+
+    Returns None when the pagination style can't be predicted, in which
+    case the caller should follow `next` links one at a time.
+    """
+    count = first_page.get("count")
+    page_len = len(first_page.get("results") or [])
+    if not count or not page_len:
+        return None
+
+    query = parse_qs(urlparse(next_url).query)
+    if "offset" in query:
+        limit = int(query.get("limit", [page_len])[0])
+        start = int(query["offset"][0])
+        return [
+            _replace_query(next_url, offset=offset, limit=limit)
+            for offset in range(start, count, limit)
+        ]
+    if "page" in query:
+        start = int(query["page"][0])
+        last = math.ceil(count / page_len)
+        return [_replace_query(next_url, page=page) for page in range(start, last + 1)]
+    return None
+
+
+class ContactsClient:
+    """Fetch contacts from the Minted API over a pooled session."""
+
+    def __init__(
+        self, cookies=None, session=None, max_in_flight=4, timeout=None, scheduler=None
+    ):
+        self.max_in_flight = max(1, max_in_flight)
+        self.session = session or make_session(cookies, pool_size=self.max_in_flight)
+        self.scheduler = scheduler or RequestScheduler(self.session)
+        if timeout is not None:
+            self.scheduler.timeout = timeout
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Release pooled connections."""
+        self.session.close()
+
+    def get_page(self, url):
+        """GET a single page and return the decoded JSON body."""
+        response = self.scheduler.get(url)
+        response.raise_for_status()
+        return response.json()
+
+    def iter_pages(self, endpoint=CONTACTS_URL):
+        """Yield each page of contacts as a list, in order."""
+        first = self.get_page(endpoint)
+
+        # Unpaginated endpoints return the whole list in one go
+        if isinstance(first, list):
+            yield first
+            return
+
+        yield from self._iter_following_pages(first)
+
+    def _iter_following_pages(self, first, skip_pages=0):
+        """Yield the results of a first page dict and every page after it."""
+        if not skip_pages:
+            yield first.get("results") or []
+        next_url = first.get("next")
+        if not next_url:
+            return
+
+        urls = remaining_page_urls(first, next_url)
+        if urls is not None:
+            yield from self._fetch_concurrently(urls[max(0, skip_pages - 1) :])
+            return
+
+        # Unpredictable pagination still has to walk skipped pages for `next`
+        page_number = 1
+        while next_url:
+            page = self.get_page(next_url)
+            if page_number >= skip_pages:
+                yield page.get("results") or []
+            next_url = page.get("next")
+            page_number += 1
+
+    def _contacts_after(self, first, skip):
+        """Yield contacts from a first page dict onward, skipping the first skip."""
+        page_len = len(first.get("results") or [])
+        skip_pages = skip // page_len if page_len else 0
+        pages = self._iter_following_pages(first, skip_pages)
+        contacts = (contact for page in pages for contact in page)
+        return islice(contacts, skip - skip_pages * page_len, None)
+
+    def _fetch_concurrently(self, urls):
+        """Fetch urls with at most max_in_flight requests running, in order."""
+        pending = deque()
+        urls = iter(urls)
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            for url in urls:
+                pending.append(pool.submit(self.get_page, url))
+                if len(pending) >= self.max_in_flight:
+                    break
+            while pending:
+                page = pending.popleft().result()
+                next_url = next(urls, None)
+                if next_url is not None:
+                    pending.append(pool.submit(self.get_page, next_url))
+                yield page.get("results") or []
+
+    def iter_contacts(self, endpoint=CONTACTS_URL, stream=False, skip=0):
+        """
+        Yield contacts one at a time across all pages.
+
+        With stream=True an unpaginated response body is decoded
+        incrementally, so the full list is never held in memory. The first
+        skip contacts are left out, for resuming an interrupted export;
+        whole pages inside that range are not fetched when the page URLs
+        can be predicted.
+        """
+        if not stream:
+            first = self.get_page(endpoint)
+            if isinstance(first, list):
+                yield from islice(first, skip, None)
+            else:
+                yield from self._contacts_after(first, skip)
+            return
+
+        with self.scheduler.get(endpoint, stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            body = io.BufferedReader(response.raw)
+            if body.peek(64).lstrip()[:1] == b"[":
+                yield from islice(iter_json_array(body), skip, None)
+                return
+            first = json.load(body)
+
+        yield from self._contacts_after(first, skip)
+
+    def fetch_all(self, endpoint=CONTACTS_URL):
+        """Return every contact from endpoint as a list."""
+        return list(self.iter_contacts(endpoint))
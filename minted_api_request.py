@@ -1,65 +1,130 @@
 import os
-from time import sleep
+import time
 
-import pandas as pd
 import requests
-from selenium.webdriver import Chrome
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
-
-# Webdriver options; set to headless
-options = Options()
-options.add_argument("--headless")
-service = Service(ChromeDriverManager().install())
-driver = Chrome(service=service, options=options)
+
+from minted_api_client import ContactsClient
+from minted_contact import Contact
+from minted_contact import CONTACT_FIELDS
+from minted_discovery import load_discovery
+from minted_discovery import plan_strategies
+from minted_discovery import record_attempt
+from minted_discovery import save_discovery
+from minted_session import cookie_dict
+from minted_session import load_session
+from minted_session import save_session
+from minted_session import session_is_valid
+from minted_waits import REPORT
+from minted_writers import write_records
 
 # URL for minted login page
 URL = "https://www.minted.com/login"
 
-# Set your minted.com email and password as the env vars:
-# minted_email and minted_password
-try:
-    minted_email = os.environ["minted_email"]
-except KeyError:
-    minted_email = input("Enter your minted.com email address:")
-try:
-    minted_password = os.environ["minted_password"]
-except KeyError:
-    minted_password = input("Enter your minted.com password:")
-
-driver.get(URL)
-
-# Selenium deals with lgin form
-email_elem = driver.find_element(By.XPATH, '//*[@id="identifierMNTD"]')
-email_elem.send_keys(minted_email)
-password_elem = driver.find_element(By.XPATH, '//*[@id="password"]')
-password_elem.send_keys(minted_password)
-login_submit = driver.find_element(
-    By.XPATH, '//*[@id="__next"]/div[3]/div/form/div[2]/div[1]/button'
-)
-login_submit.click()
-
-sleep(5)  # to load JS and be nice
-
-# Obtain cookies from selenium session
-cookies = {c["name"]: c["value"] for c in driver.get_cookies()}
-
-# Request address book contents as json
-response = requests.get(
-    "https://addressbook.minted.com/api/contacts/contacts/?format=json",
-    cookies=cookies,
-    timeout=300,
-)
-listings = response.json()
-
-# Create dataframe to hold addresses
-address_book = pd.DataFrame(listings)
-
-# Export to excel and csv
-address_book.to_excel("./data/minted-addresses-api.xlsx")
-address_book.to_csv("./data/minted-addresses-api.csv", index=False)
-
-# Close selenium webdriver
-driver.close()
+
+def _submit_login(driver, minted_email, minted_password):
+    """Fill in and submit the login form, then wait for the redirect."""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+
+    from minted_waits import document_ready
+    from minted_waits import wait_for
+
+    # Selenium deals with lgin form
+    email_elem = driver.find_element(By.XPATH, '//*[@id="identifierMNTD"]')
+    email_elem.send_keys(minted_email)
+    password_elem = driver.find_element(By.XPATH, '//*[@id="password"]')
+    password_elem.send_keys(minted_password)
+    login_submit = driver.find_element(
+        By.XPATH, '//*[@id="__next"]/div[3]/div/form/div[2]/div[1]/button'
+    )
+    login_page_url = driver.current_url
+    login_submit.click()
+
+    # Wait for the login to navigate away, then for the page to finish loading
+    wait_for(
+        driver,
+        EC.url_changes(login_page_url),
+        timeout=30,
+        phase="login redirect",
+        fixed_delay=5,
+    )
+    wait_for(driver, document_ready, timeout=10, phase="login redirect", fixed_delay=0)
+
+
+def login_for_cookies(minted_email):
+    """Log in with a headless browser and return its cookies."""
+    from selenium.webdriver import Chrome
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+
+    from minted_driver import resolve_chromedriver
+
+    try:
+        minted_password = os.environ["minted_password"]
+    except KeyError:
+        minted_password = input("Enter your minted.com password:")
+
+    # Webdriver options; set to headless
+    options = Options()
+    options.add_argument("--headless")
+    service = Service(resolve_chromedriver())
+    driver = Chrome(service=service, options=options)
+
+    driver.get(URL)
+
+    _submit_login(driver, minted_email, minted_password)
+
+    # Obtain cookies from selenium session and cache them for next time
+    session_cookies = driver.get_cookies()
+    save_session(minted_email, session_cookies)
+
+    # Close selenium webdriver
+    driver.close()
+    return session_cookies
+
+
+def main():
+    """Export the Minted contacts API to ./data."""
+    # Set your minted.com email and password as the env vars:
+    # minted_email and minted_password
+    try:
+        minted_email = os.environ["minted_email"]
+    except KeyError:
+        minted_email = input("Enter your minted.com email address:")
+
+    # Reuse cookies from a previous run if the API still accepts them
+    session_cookies = load_session(minted_email)
+    if not (session_cookies and session_is_valid(session_cookies)):
+        session_cookies = login_for_cookies(minted_email)
+
+    # Request address book contents as json, following pagination if present,
+    # starting with whichever API endpoint worked last time
+    cache = load_discovery()
+    strategies = [name for name in plan_strategies(cache) if name.startswith("api:")]
+    listings = []
+    with ContactsClient(cookies=cookie_dict(session_cookies)) as client:
+        for strategy in strategies:
+            start = time.perf_counter()
+            try:
+                listings = client.fetch_all(strategy[4:])
+            except (requests.RequestException, ValueError) as e:
+                print(f"API endpoint {strategy[4:]} failed: {e}")
+            record_attempt(cache, strategy, len(listings), time.perf_counter() - start)
+            if listings:
+                break
+    save_discovery(cache)
+
+    # Export to excel and csv, with the shared contact schema
+    write_records(
+        (Contact.from_api(record).to_dict() for record in listings),
+        "./data",
+        "minted-addresses-api",
+        ["xlsx", "csv"],
+        CONTACT_FIELDS,
+    )
+
+    REPORT.print_summary()
+
+
+if __name__ == "__main__":
+    main()
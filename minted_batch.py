@@ -0,0 +1,161 @@
+"""
+Minted Batch Export
+
+Exports the address books of many accounts listed in a credentials
+manifest, running a bounded pool of worker processes. Each worker uses a
+cached session over plain HTTP when it is still valid and only starts its
+own headless Chrome when a login is needed.
+
+Workers share the cache directory (minted_session.CACHE_DIR), so every
+file in it has to be safe to write from several processes at once: the
+pinned chromedriver and the strategy cache are written to unique
+temporary files and renamed into place, and session files are per
+account. Each account's export files and journal live in its own
+directory.
+"""
+
+import argparse
+from concurrent.futures import as_completed
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import json
+import os
+import re
+import time
+
+from minted_session import load_session
+from minted_session import session_is_valid
+from minted_writers import DEFAULT_FORMATS
+from minted_writers import parse_formats
+
+SUMMARY_FIELDS = ["account", "email", "method", "contacts", "seconds", "error"]
+
+
+def load_manifest(path):
+    """
+    Load accounts from a JSON list or a CSV file.
+
+    Each account needs an `email`; `password` and a `name` for its output
+    directory are optional. Two accounts whose output directories would be
+    the same are rejected.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".json"):
+            accounts = json.load(f)
+        else:
+            accounts = list(csv.DictReader(f))
+
+    emails = {}
+    for account in accounts:
+        if not account.get("email"):
+            raise ValueError(f"Manifest entry without an email: {account}")
+        dirname = account_dirname(account)
+        if dirname in emails:
+            raise ValueError(
+                f"{emails[dirname]} and {account['email']} would both be "
+                f"exported to {dirname}; give them different names"
+            )
+        emails[dirname] = account["email"]
+    return accounts
+
+
+def account_dirname(account):
+    """Return a filesystem-safe directory name for an account."""
+    name = account.get("name") or account["email"]
+    return re.sub(r"[^A-Za-z0-9._@-]+", "_", name).strip("_")
+
+
+def export_account(account, output_root, formats=None, resume=False):
+    """
+    Export one account in a worker process and return its summary row.
+
+    Accounts without a valid cached session or a password are skipped
+    rather than prompting, since workers can't read from the terminal.
+    """
+    # Imported here so each worker process loads selenium only if it needs it
+    from minted_address_export import run_export
+
+    email = account["email"]
+    password = account.get("password") or None
+    output_dir = os.path.join(output_root, account_dirname(account))
+    summary = {"account": account_dirname(account), "email": email, "contacts": 0}
+
+    start = time.perf_counter()
+    try:
+        cookies = load_session(email)
+        if password is None and not (cookies and session_is_valid(cookies)):
+            summary.update(method="skipped", error="no password or valid session")
+        else:
+            method, count = run_export(
+                email, password or "", output_dir, formats, resume=resume
+            )
+            summary.update(method=method, contacts=count)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        summary.update(method="failed", error=str(e))
+    summary["seconds"] = round(time.perf_counter() - start, 2)
+    return summary
+
+
+def write_summary(summaries, output_root):
+    """Write the combined batch summary as JSON and CSV."""
+    with open(os.path.join(output_root, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summaries, f, indent=2)
+    with open(
+        os.path.join(output_root, "summary.csv"), "w", newline="", encoding="utf-8"
+    ) as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS, lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(summaries)
+
+
+def run_batch(
+    accounts, output_root="./data/accounts", workers=4, formats=None, resume=False
+):
+    """Export every account with at most `workers` running at once."""
+    os.makedirs(output_root, exist_ok=True)
+    start = time.perf_counter()
+
+    summaries = []
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [
+            pool.submit(export_account, account, output_root, formats, resume)
+            for account in accounts
+        ]
+        for future in as_completed(futures):
+            summary = future.result()
+            summaries.append(summary)
+            print(
+                f"  {summary['account']}: {summary['method']}, "
+                f"{summary['contacts']} contacts in {summary['seconds']}s"
+            )
+
+    # Keep the summary in manifest order regardless of completion order
+    order = {account_dirname(account): i for i, account in enumerate(accounts)}
+    summaries.sort(key=lambda summary: order[summary["account"]])
+    write_summary(summaries, output_root)
+
+    elapsed = time.perf_counter() - start
+    print(f"Exported {len(accounts)} accounts in {elapsed:.1f}s")
+    return summaries
+
+
+def main(argv=None):
+    """Run a batch export from a credentials manifest."""
+    parser = argparse.ArgumentParser(description="Export many Minted address books.")
+    parser.add_argument("manifest", help="JSON or CSV file of accounts")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--output-dir", default="./data/accounts")
+    parser.add_argument("--format", dest="formats", default=",".join(DEFAULT_FORMATS))
+    parser.add_argument("--resume", action="store_true")
+    args = parser.parse_args(argv)
+
+    try:
+        formats = parse_formats(args.formats)
+        accounts = load_manifest(args.manifest)
+    except ValueError as e:
+        parser.error(str(e))
+    run_batch(accounts, args.output_dir, args.workers, formats, args.resume)
+
+
+if __name__ == "__main__":
+    main()
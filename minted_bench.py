@@ -0,0 +1,555 @@
+"""
+Minted Export Benchmarks
+
+Runs each export strategy against the local stand-in server (see
+minted_standin.py) at several address book sizes and reports throughput
+and latency, so performance changes can be measured without a Minted
+account.
+
+Strategies:
+- api: streamed contacts API export (stream_api_export)
+- print: print page export (print_page_export)
+- html: address book page parsed without a browser (extract_contacts_from_html)
+- dom: address book page scraped in headless Chrome (scrape_address_book)
+- login: the login form in headless Chrome (login_to_minted)
+
+dom and login need Chrome and are skipped when it can't be started. Set
+MINTED_RATE_LIMIT to include a client-side rate limit in the API timings.
+
+    python minted_bench.py --sizes 100,10000 --strategies api,print --repeat 5
+
+`--excel ROWS` instead compares Excel output engines: DataFrame.to_excel
+(the old path) against the streaming ExcelWriter with openpyxl and, when
+installed, xlsxwriter. Each run is in a fresh process, so peak memory can
+be measured.
+
+    python minted_bench.py --excel 100000
+
+`--dedupe ROWS` times minted_dedupe.find_duplicates on ROWS synthetic
+contacts with a known set of injected duplicates, and reports how many of
+them were found.
+
+    python minted_bench.py --dedupe 100000
+
+`--locality ROWS` times minted_address.parse_locality_column on a synthetic
+column of ROWS locality strings, with pyarrow's regex kernels (when
+installed) and with the pure-Python fallback.
+
+    python minted_bench.py --locality
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from contextlib import redirect_stdout
+import importlib.util
+import io
+import json
+import os
+import random
+import resource
+import statistics
+import tempfile
+import time
+from unittest.mock import patch
+
+from minted_standin import Faults
+from minted_standin import PAGINATION_STYLES
+from minted_standin import StandinServer
+from minted_writers import parse_formats
+
+STRATEGIES = ["api", "print", "html", "dom", "login"]
+DEFAULT_SIZES = [100, 10_000, 100_000]
+
+
+def bench_api(server, output_dir, formats):
+    """Stream every contact from the stand-in API into the export files."""
+    from minted_address_export import stream_api_export
+
+    return stream_api_export({}, output_dir, formats, endpoints=[server.api_url])
+
+
+def bench_print(server, output_dir, formats):
+    """Export the stand-in print page."""
+    from minted_address_export import print_page_export
+
+    return print_page_export({}, output_dir, formats, url=server.print_url)
+
+
+def bench_html(server, output_dir, formats):
+    """Download the address book page and parse its rows without a browser."""
+    import requests
+
+    from minted_address_export import export_contacts
+    from minted_address_export import extract_contacts_from_html
+    from minted_contact import Contact
+
+    response = requests.get(server.address_book_url, timeout=60)
+    response.raise_for_status()
+    contacts = [
+        Contact.from_scraped(contact)
+        for contact in extract_contacts_from_html(response.text)
+    ]
+    export_contacts(contacts, output_dir, formats)
+    return len(contacts)
+
+
+def bench_dom(server, output_dir, formats, driver):
+    """Scrape the stand-in address book page in Chrome."""
+    import minted_address_export
+    from minted_contact import Contact
+
+    with patch.object(
+        minted_address_export, "ADDRESS_BOOK_URL", server.address_book_url
+    ):
+        contacts = [
+            Contact.from_scraped(contact)
+            for contact in minted_address_export.scrape_address_book(driver)
+        ]
+    minted_address_export.export_contacts(contacts, output_dir, formats)
+    return len(contacts)
+
+
+def bench_login(server, _output_dir, _formats, driver):
+    """Log in through the stand-in login form in Chrome."""
+    import minted_address_export
+
+    driver.delete_all_cookies()
+    with patch.object(minted_address_export, "LOGIN_URL", server.login_url):
+        logged_in = minted_address_export.login_to_minted(
+            driver, "bench@example.com", "bench"
+        )
+    if not logged_in:
+        raise RuntimeError("stand-in login failed")
+    return 1
+
+
+BENCHMARKS = {
+    "api": bench_api,
+    "print": bench_print,
+    "html": bench_html,
+    "dom": bench_dom,
+    "login": bench_login,
+}
+
+# Strategies that drive a browser, which is started once per size
+BROWSER_STRATEGIES = {"dom", "login"}
+
+# Untimed runs before each benchmark, so one-off costs such as imports
+# don't skew the results
+WARMUP_RUNS = 1
+
+
+def run_benchmark(strategy, server, formats, repeat, driver=None):
+    """
+    Time repeat runs of one strategy and return its result row.
+
+    The row has the median and best seconds and contacts per second, plus
+    every run's seconds and the minted_metrics report of the last run
+    (phase timers, request latency).
+    """
+    from minted_metrics import METRICS
+
+    bench = BENCHMARKS[strategy]
+    args = (driver,) if strategy in BROWSER_STRATEGIES else ()
+    seconds = []
+    count = 0
+    with tempfile.TemporaryDirectory() as output_dir:
+        for run in range(WARMUP_RUNS + repeat):
+            METRICS.reset()
+            start = time.perf_counter()
+            count = bench(server, output_dir, formats, *args)
+            if run >= WARMUP_RUNS:
+                seconds.append(time.perf_counter() - start)
+            if not count:
+                raise RuntimeError(f"{strategy} exported no contacts")
+
+    median = statistics.median(seconds)
+    return {
+        "strategy": strategy,
+        "size": len(server.contacts),
+        "contacts": count,
+        "median": round(median, 4),
+        "best": round(min(seconds), 4),
+        "per_second": round(count / median, 1) if median else None,
+        "seconds": [round(s, 4) for s in seconds],
+        "metrics": METRICS.report(),
+    }
+
+
+def request_latency(row):
+    """p50/p95 API request latency of a result row, as text."""
+    requests = row["metrics"].get("requests")
+    if not requests:
+        return ""
+    stats = next(iter(requests.values()))
+    return f"{stats['p50'] * 1000:.1f} / {stats['p95'] * 1000:.1f} ms"
+
+
+def print_results(results):
+    """Print the result rows as a table."""
+    print(
+        f"\n{'strategy':<8} {'size':>8} {'contacts':>8} {'median':>9} "
+        f"{'best':>9} {'contacts/s':>11}  request p50 / p95"
+    )
+    for row in results:
+        print(
+            f"{row['strategy']:<8} {row['size']:>8} {row['contacts']:>8} "
+            f"{row['median']:>8.3f}s {row['best']:>8.3f}s "
+            f"{row['per_second'] or 0:>11.0f}  {request_latency(row)}"
+        )
+
+
+def _start_browser():
+    from minted_address_export import setup_driver
+
+    with redirect_stdout(io.StringIO()):
+        return setup_driver(headless=True)
+
+
+def run_benchmarks(servers, strategies=None, repeat=3, formats=None, verbose=False):
+    """
+    Benchmark each strategy against each stand-in server and return the
+    result rows.
+
+    servers are StandinServers that haven't been started, e.g. a generator
+    making one per address book size; each is started and stopped in turn.
+    """
+    strategies = list(strategies or STRATEGIES)
+    formats = formats or ["csv"]
+
+    # One headless Chrome is shared by every browser benchmark
+    driver = None
+    if BROWSER_STRATEGIES.intersection(strategies):
+        try:
+            driver = _start_browser()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            print(f"Skipping {', '.join(sorted(BROWSER_STRATEGIES))}: {e}")
+            strategies = [s for s in strategies if s not in BROWSER_STRATEGIES]
+
+    results = []
+    try:
+        for server in servers:
+            size = len(server.contacts)
+            with server:
+                for strategy in strategies:
+                    try:
+                        with (
+                            nullcontext() if verbose else redirect_stdout(io.StringIO())
+                        ):
+                            row = run_benchmark(
+                                strategy, server, formats, repeat, driver
+                            )
+                    except Exception as e:  # pylint: disable=broad-exception-caught
+                        print(f"  {strategy} at {size} contacts failed: {e}")
+                        continue
+                    results.append(row)
+                    print(
+                        f"  {strategy} at {size} contacts: {row['median']:.3f}s "
+                        f"({row['per_second'] or 0:.0f} contacts/s)"
+                    )
+    finally:
+        if driver is not None:
+            driver.quit()
+    return results
+
+
+EXCEL_ENGINES = ["to_excel", "openpyxl", "xlsxwriter"]
+
+
+def _write_excel(engine, contacts, path):
+    """Write contacts to path with an EXCEL_ENGINES engine."""
+    from minted_contact import CONTACT_FIELDS
+    from minted_contact import contacts_frame
+    from minted_writers import ExcelWriter
+    from minted_writers import write_chunks
+
+    if engine == "to_excel":
+        contacts_frame(contacts).to_excel(path, index=False)
+    else:
+        records = (contact.to_dict() for contact in contacts)
+        write_chunks(records, [ExcelWriter(path, CONTACT_FIELDS, engine=engine)])
+
+
+def _excel_run(engine, rows):
+    """Write rows synthetic contacts to Excel; returns (seconds, peak MB)."""
+    from minted_contact import Contact
+    from minted_standin import make_contacts
+
+    contacts = [Contact.from_api(record) for record in make_contacts(rows)]
+    with tempfile.TemporaryDirectory() as output_dir:
+        path = os.path.join(output_dir, "contacts.xlsx")
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        _write_excel(engine, contacts, path)
+        seconds = time.perf_counter() - start
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    return seconds, peak / 1024  # ru_maxrss is in KB on Linux
+
+
+def run_excel_benchmark(rows, repeat=3):
+    """Compare the Excel engines at rows contacts and return the result rows."""
+    results = []
+    for engine in EXCEL_ENGINES:
+        if engine == "xlsxwriter" and importlib.util.find_spec(engine) is None:
+            print(f"  {engine} skipped: not installed")
+            continue
+        runs = []
+        for _ in range(repeat):
+            # A fresh process per run, so the peak memory is this run's own
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                runs.append(pool.submit(_excel_run, engine, rows).result())
+        seconds = [run[0] for run in runs]
+        median = statistics.median(seconds)
+        row = {
+            "engine": engine,
+            "rows": rows,
+            "median": round(median, 3),
+            "best": round(min(seconds), 3),
+            "rows_per_second": round(rows / median, 1),
+            "peak_mb": round(max(run[1] for run in runs), 1),
+        }
+        results.append(row)
+        print(f"  {engine}: {median:.2f}s, {row['peak_mb']:.0f} MB extra peak memory")
+    return results
+
+
+def print_excel_results(results):
+    """Print the Excel comparison as a table."""
+    print(
+        f"\n{'engine':<11} {'rows':>8} {'median':>9} {'best':>9} "
+        f"{'rows/s':>9} {'peak':>8}"
+    )
+    for row in results:
+        print(
+            f"{row['engine']:<11} {row['rows']:>8} {row['median']:>8.2f}s "
+            f"{row['best']:>8.2f}s {row['rows_per_second']:>9.0f} "
+            f"{row['peak_mb']:>5.0f} MB"
+        )
+
+
+# Ways a household gets saved twice: (name, address1, postal_code) rewrites
+DUPLICATE_VARIANTS = [
+    lambda first, last, street, postal: (f"The {last} Family", street, postal),
+    lambda first, last, street, postal: (
+        f"Mr. & Mrs. {last}",
+        street.replace(" St", " Street").replace(" Ave", " Avenue"),
+        postal,
+    ),
+    lambda first, last, street, postal: (f"{first} {last}", street, f"{postal}-0001"),
+]
+
+
+def inject_duplicates(rows, rate=0.1, seed=0):
+    """
+    Make rows synthetic contacts, about rate of which are duplicates.
+
+    Returns (contacts, duplicates), where duplicates maps each injected
+    contact's position to the position of the contact it duplicates.
+    """
+    from minted_contact import Contact
+    from minted_standin import make_contacts
+
+    rng = random.Random(seed)
+    originals = round(rows / (1 + rate))
+    records = make_contacts(originals, seed)
+    duplicates = {}
+    for i in rng.sample(range(originals), rows - originals):
+        record = dict(records[i])
+        first, last = record["name"].split(" ", 1)
+        variant = rng.choice(DUPLICATE_VARIANTS)
+        record["name"], record["address1"], record["postal_code"] = variant(
+            first, last, record["address1"], record["postal_code"]
+        )
+        record["id"] = f"{record['id']}-DUP"
+        duplicates[len(records)] = i
+        records.append(record)
+    return [Contact.from_api(record) for record in records], duplicates
+
+
+def run_dedupe_benchmark(rows, repeat=3):
+    """Time find_duplicates on rows contacts and return the result row."""
+    from minted_dedupe import find_duplicates
+
+    contacts, duplicates = inject_duplicates(rows)
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        groups = find_duplicates(contacts)
+        seconds.append(time.perf_counter() - start)
+
+    group_of = {
+        i: number for number, (members, _) in enumerate(groups) for i in members
+    }
+    found = sum(
+        group_of.get(i) is not None and group_of.get(i) == group_of.get(original)
+        for i, original in duplicates.items()
+    )
+    median = statistics.median(seconds)
+    row = {
+        "rows": rows,
+        "median": round(median, 3),
+        "best": round(min(seconds), 3),
+        "rows_per_second": round(rows / median, 1),
+        "injected": len(duplicates),
+        "found": found,
+        "groups": len(groups),
+    }
+    print(
+        f"\n{rows} contacts: {median:.2f}s median, {min(seconds):.2f}s best, "
+        f"{row['rows_per_second']:.0f} contacts/s; found {found} of "
+        f"{len(duplicates)} injected duplicates in {len(groups)} groups"
+    )
+    return row
+
+
+def make_localities(rows, seed=0):
+    """A pandas Series of rows mostly distinct "City, ST ZIP" strings."""
+    import pandas as pd
+
+    from minted_address import STATES
+
+    rng = random.Random(seed)
+    states = list(STATES)
+    values = []
+    for i in range(rows):
+        locality = (
+            f"Town {rng.randint(1, 5000)}, {rng.choice(states)} "
+            f"{rng.randint(0, 99999):05d}"
+        )
+        if i % 4 == 0:
+            locality += f"-{rng.randint(0, 9999):04d}"
+        if i % 10 == 0:
+            locality += ", United States"
+        if i % 50 == 0:
+            locality = f"Town {rng.randint(1, 5000)}"
+        values.append(locality)
+    return pd.Series(values)
+
+
+def run_locality_benchmark(rows, repeat=3):
+    """Time both locality column parsers on rows values; returns result rows."""
+    from minted_address import _parse_column_arrow
+    from minted_address import _parse_column_python
+
+    localities = make_localities(rows)
+    parsers = {"python": _parse_column_python}
+    if importlib.util.find_spec("pyarrow") is not None:
+        parsers = {"pyarrow": _parse_column_arrow, **parsers}
+    else:
+        print("  pyarrow skipped: not installed")
+
+    results = []
+    for name, parse in parsers.items():
+        seconds = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            parse(localities, expand_states=False)
+            seconds.append(time.perf_counter() - start)
+        median = statistics.median(seconds)
+        results.append(
+            {
+                "parser": name,
+                "rows": rows,
+                "median": round(median, 3),
+                "best": round(min(seconds), 3),
+                "rows_per_second": round(rows / median, 1),
+            }
+        )
+        print(f"  {name}: {median:.2f}s median, {rows / median:.0f} rows/s")
+    return results
+
+
+def _int_list(value):
+    return [int(item.replace("_", "")) for item in value.split(",") if item.strip()]
+
+
+def _save_results(results, path):
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nWrote {path}")
+
+
+def main(argv=None):
+    """Run the benchmarks and print (and optionally save) the results."""
+    parser = argparse.ArgumentParser(description="Benchmark the export strategies.")
+    parser.add_argument(
+        "--sizes",
+        type=_int_list,
+        default=DEFAULT_SIZES,
+        help="comma-separated address book sizes (default: 100,10000,100000)",
+    )
+    parser.add_argument(
+        "--strategies",
+        default=",".join(STRATEGIES),
+        help="comma-separated strategies (default: %(default)s)",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--format", dest="formats", default="csv")
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds added to every request"
+    )
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--pagination", choices=PAGINATION_STYLES, default="page")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument(
+        "--verbose", action="store_true", help="show the exporters' own output"
+    )
+    parser.add_argument(
+        "--excel",
+        type=int,
+        metavar="ROWS",
+        help="compare Excel engines at ROWS contacts instead",
+    )
+    parser.add_argument(
+        "--dedupe",
+        type=int,
+        metavar="ROWS",
+        help="time duplicate detection at ROWS contacts instead",
+    )
+    parser.add_argument(
+        "--locality",
+        type=int,
+        nargs="?",
+        const=1_000_000,
+        metavar="ROWS",
+        help="time locality column parsing at ROWS values (default 1M) instead",
+    )
+    args = parser.parse_args(argv)
+
+    if args.locality:
+        _save_results(run_locality_benchmark(args.locality, args.repeat), args.output)
+        return
+
+    if args.dedupe:
+        _save_results([run_dedupe_benchmark(args.dedupe, args.repeat)], args.output)
+        return
+
+    if args.excel:
+        results = run_excel_benchmark(args.excel, args.repeat)
+        print_excel_results(results)
+        _save_results(results, args.output)
+        return
+
+    strategies = [name.strip() for name in args.strategies.split(",") if name.strip()]
+    unknown = [name for name in strategies if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown strategies: {', '.join(unknown)}")
+
+    try:
+        formats = parse_formats(args.formats)
+    except ValueError as e:
+        parser.error(str(e))
+
+    servers = (
+        StandinServer(size, args.page_size, args.pagination, Faults(args.latency))
+        for size in args.sizes
+    )
+    results = run_benchmarks(servers, strategies, args.repeat, formats, args.verbose)
+    print_results(results)
+    _save_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Minted Contact Model
+
+The one contact schema shared by every export path. API records, print
+page rows and scraped rows are all mapped onto Contact, whose fields (and
+their order) follow the contacts API. Contacts use __slots__, so a large
+address book takes a fraction of the memory of the equivalent dicts.
+"""
+
+import csv
+import json
+import sys
+
+from minted_json import iter_json_array
+
+CONTACT_FIELDS = (
+    "id",
+    "url",
+    "name",
+    "members",
+    "labels",
+    "groups",
+    "address1",
+    "address2",
+    "locality",
+    "administrative_area",
+    "postal_code",
+    "country",
+    "has_mailing_address",
+    "external_id",
+    "updated_at",
+    "notes",
+    "data",
+    "sort_key",
+)
+
+# Compact pandas dtypes for contacts_frame(); unlisted fields are strings
+CONTACT_DTYPES = {
+    "administrative_area": "category",
+    "country": "category",
+    "has_mailing_address": "boolean",
+    "external_id": "Int64",
+}
+
+# Keys used by the page scrapers, mapped onto the contact schema
+SCRAPED_FIELDS = {
+    "name": "name",
+    "street_line1": "address1",
+    "street_line2": "address2",
+    "city": "locality",
+    "state": "administrative_area",
+    "zip": "postal_code",
+    "country": "country",
+}
+
+# Keys of minted_print_page.iter_print_rows() rows, mapped onto the schema
+PRINT_FIELDS = {
+    "name": "name",
+    "address": "address1",
+    "city": "locality",
+    "state": "administrative_area",
+    "country": "country",
+}
+
+# Short, heavily repeated values that are worth interning
+_INTERNED_FIELDS = ("administrative_area", "country")
+
+# List fields, stored as tuples (the empty tuple is shared)
+LIST_FIELDS = ("members", "labels", "groups")
+
+
+class Contact:
+    """
+    A single address book contact; unset fields are None.
+
+    members, labels and groups are stored as tuples and an empty data dict
+    as None, which keeps empty fields from costing memory per contact.
+    """
+
+    __slots__ = CONTACT_FIELDS
+
+    def __init__(self, **values):
+        for field in CONTACT_FIELDS:
+            value = values.pop(field, None)
+            if field in _INTERNED_FIELDS and isinstance(value, str):
+                value = sys.intern(value)
+            elif field in LIST_FIELDS and value is not None:
+                value = tuple(value)
+            elif field == "data" and not value:
+                value = None
+            setattr(self, field, value)
+        if values:
+            raise TypeError(f"Unknown contact fields: {', '.join(values)}")
+
+    def __repr__(self):
+        # Fields are set from CONTACT_FIELDS, which pylint can't see
+        # pylint: disable=no-member
+        return f"Contact(id={self.id!r}, name={self.name!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Contact):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    @classmethod
+    def from_api(cls, record):
+        """Build a contact from a contacts API record, ignoring unknown keys."""
+        return cls(**{field: record.get(field) for field in CONTACT_FIELDS})
+
+    @classmethod
+    def from_scraped(cls, contact):
+        """
+        Build a contact from a scraped row dict (name, street_line1, city, ...).
+
+        first_name/last_name from the edit modal only fill in a missing name.
+        """
+        values = {
+            field: contact[key]
+            for key, field in SCRAPED_FIELDS.items()
+            if contact.get(key)
+        }
+        if not values.get("name"):
+            full_name = " ".join(
+                filter(None, (contact.get("first_name"), contact.get("last_name")))
+            )
+            values["name"] = full_name or None
+        return cls(**values)
+
+    @classmethod
+    def from_print_row(cls, row):
+        """Build a contact from a print page row, joining zip and zip4."""
+        values = {
+            field: row[key] for key, field in PRINT_FIELDS.items() if row.get(key)
+        }
+        if row.get("zip"):
+            values["postal_code"] = "-".join(
+                filter(None, (row["zip"], row.get("zip4")))
+            )
+        return cls(**values)
+
+    @classmethod
+    def from_text_row(cls, row):
+        """
+        Build a contact from a CSV export row, undoing flatten_value().
+
+        Rows from the older scraping export (street_line1, city, ...) are
+        mapped with from_scraped().
+        """
+        if "street_line1" in row or "city" in row:
+            return cls.from_scraped(row)
+        return cls(
+            **{
+                field: parse_text_value(field, row[field])
+                for field in CONTACT_FIELDS
+                if field in row
+            }
+        )
+
+    def to_dict(self):
+        """Return the contact as a dict in schema order."""
+        return {field: getattr(self, field) for field in CONTACT_FIELDS}
+
+
+def flatten_value(value):
+    """
+    Render a field for text formats such as CSV and Excel.
+
+    Lists of plain values are joined with "; ", other lists and non-empty
+    dicts become JSON, and empty lists and dicts become empty cells.
+    """
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return ""
+        if all(isinstance(item, (str, int, float)) for item in value):
+            return "; ".join(str(item) for item in value)
+        return json.dumps(value, sort_keys=True)
+    if isinstance(value, dict):
+        return json.dumps(value, sort_keys=True) if value else ""
+    return value
+
+
+def _parse_list(text):
+    if text.startswith("["):
+        try:
+            return json.loads(text)
+        except ValueError:
+            pass
+    return text.split("; ")
+
+
+def _parse_json(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def _parse_int(text):
+    try:
+        return int(text)
+    except ValueError:
+        return text
+
+
+# How flatten_value() is undone for the fields that aren't plain text
+_TEXT_PARSERS = {
+    **{field: _parse_list for field in LIST_FIELDS},
+    "data": _parse_json,
+    "has_mailing_address": lambda text: text == "True",
+    "external_id": _parse_int,
+}
+
+
+def parse_text_value(field, text):
+    """Turn a CSV cell written by flatten_value() back into a field value."""
+    if text is None or text == "":
+        return None
+    parse = _TEXT_PARSERS.get(field)
+    return parse(text) if parse else text
+
+
+def iter_contacts_file(path):
+    """
+    Yield Contacts from an export file: CSV, JSON Lines or a JSON array
+    such as a downloaded contacts.json.
+    """
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                yield Contact.from_text_row(row)
+    elif path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield Contact.from_api(json.loads(line))
+    else:
+        with open(path, "rb") as f:
+            for record in iter_json_array(f):
+                yield Contact.from_api(record)
+
+
+def contacts_frame(contacts):
+    """Return contacts as a DataFrame with flattened text and compact dtypes."""
+    import pandas as pd
+
+    rows = [
+        [flatten_value(getattr(contact, field)) for field in CONTACT_FIELDS]
+        for contact in contacts
+    ]
+    frame = pd.DataFrame(rows, columns=list(CONTACT_FIELDS), dtype=object)
+    return frame.astype(
+        {field: CONTACT_DTYPES.get(field, "string") for field in CONTACT_FIELDS}
+    )
@@ -0,0 +1,316 @@
+"""
+Minted Contact Deduplication
+
+Finds the same household saved under several names, e.g. "Mr. & Mrs.
+Smith", "The Smith Family" and "John and Jane Smith" at one address.
+Contacts are grouped into blocks by normalised postal code and street
+address, so only contacts within a block are compared, and names within a
+block are matched fuzzily. Duplicates can be listed as suggestions or
+merged, with an audit column recording what was merged.
+"""
+
+import argparse
+from collections import defaultdict
+from difflib import SequenceMatcher
+import re
+import time
+
+from minted_contact import Contact
+from minted_contact import CONTACT_FIELDS
+from minted_contact import iter_contacts_file
+from minted_writers import DEFAULT_FORMATS
+from minted_writers import parse_formats
+from minted_writers import write_records
+
+MATCH_THRESHOLD = 0.85
+AUDIT_FIELD = "dedupe"
+SUGGESTION_FIELDS = [
+    "group",
+    "score",
+    "id",
+    "name",
+    "address1",
+    "address2",
+    "postal_code",
+    "updated_at",
+]
+
+WORD = re.compile(r"[a-z0-9]+")
+
+# Words that say nothing about who a contact is
+NAME_STOPWORDS = {
+    "mr",
+    "mrs",
+    "ms",
+    "miss",
+    "mx",
+    "dr",
+    "and",
+    "the",
+    "family",
+    "jr",
+    "sr",
+}
+
+STREET_ABBREVIATIONS = {
+    "street": "st",
+    "avenue": "ave",
+    "av": "ave",
+    "road": "rd",
+    "lane": "ln",
+    "drive": "dr",
+    "court": "ct",
+    "place": "pl",
+    "boulevard": "blvd",
+    "terrace": "ter",
+    "circle": "cir",
+    "highway": "hwy",
+    "parkway": "pkwy",
+    "north": "n",
+    "south": "s",
+    "east": "e",
+    "west": "w",
+}
+
+UNIT_WORDS = {"apt", "apartment", "unit", "suite", "ste", "no"}
+
+
+def normalize_postal(postal_code):
+    """Return the comparable part of a postal code (ZIP5 for US codes)."""
+    code = re.sub(r"[^0-9A-Za-z]", "", postal_code or "").upper()
+    return code[:5] if code[:5].isdigit() else code
+
+
+def address_tokens(contact):
+    """Split address lines into (street tokens, unit), with common abbreviations."""
+    text = f"{contact.address1 or ''} {contact.address2 or ''}".lower().replace(
+        "#", " apt "
+    )
+    tokens = [STREET_ABBREVIATIONS.get(word, word) for word in WORD.findall(text)]
+    unit = None
+    for i, token in enumerate(tokens):
+        if token in UNIT_WORDS and i + 1 < len(tokens):
+            unit = tokens[i + 1]
+            tokens = tokens[:i]
+            break
+    return tokens, unit
+
+
+def block_key(contact):
+    """
+    Blocking key: postal code, house number and first street word.
+
+    Returns None for contacts without enough address to block on; those are
+    never compared.
+    """
+    postal = normalize_postal(contact.postal_code)
+    tokens, _ = address_tokens(contact)
+    if not postal or not tokens:
+        return None
+    return (postal, *tokens[:2])
+
+
+def name_tokens(contact):
+    """Normalised words in a contact's name, without titles and fillers."""
+    words = WORD.findall((contact.name or "").lower())
+    return frozenset(word for word in words if word not in NAME_STOPWORDS)
+
+
+def name_similarity(a_tokens, b_tokens):
+    """
+    Score two names from 0 to 1.
+
+    Takes the better of token containment, so "Smith" matches "John Smith",
+    and a character-level ratio for typos and spacing differences.
+    """
+    if not a_tokens or not b_tokens:
+        return 0.0
+    containment = len(a_tokens & b_tokens) / min(len(a_tokens), len(b_tokens))
+    if containment == 1.0:
+        return 1.0
+    ratio = SequenceMatcher(
+        None, " ".join(sorted(a_tokens)), " ".join(sorted(b_tokens))
+    ).ratio()
+    return max(containment, ratio)
+
+
+def build_blocks(contacts):
+    """Index contact positions by block key; singletons are left out."""
+    blocks = defaultdict(list)
+    for i, contact in enumerate(contacts):
+        key = block_key(contact)
+        if key is not None:
+            blocks[key].append(i)
+    return [members for members in blocks.values() if len(members) > 1]
+
+
+def _link_block(names, units, threshold):
+    """
+    Group one block's contacts; returns a list of (indices, score).
+
+    Groups are joined best match first, and only when every contact in one
+    matches every contact in the other, so "John" doesn't chain "John Smith"
+    and "John Doe" into one household.
+    """
+    scores = {}
+    for a, name_a in enumerate(names):
+        for b in range(a + 1, len(names)):
+            # Different flats in one building are different households
+            if units[a] and units[b] and units[a] != units[b]:
+                continue
+            score = name_similarity(name_a, names[b])
+            if score >= threshold:
+                scores[a, b] = score
+
+    group_of = {i: (i,) for i in range(len(names))}
+    group_score = {}
+    for a, b in sorted(scores, key=scores.get, reverse=True):
+        group_a, group_b = group_of[a], group_of[b]
+        if group_a is group_b:
+            continue
+        pairs = [scores.get((min(x, y), max(x, y))) for x in group_a for y in group_b]
+        if None in pairs:
+            continue
+        group = tuple(sorted(group_a + group_b))
+        group_score[group] = min(
+            pairs + [group_score.pop(group_a, 1.0), group_score.pop(group_b, 1.0)]
+        )
+        for i in group:
+            group_of[i] = group
+    return list(group_score.items())
+
+
+def find_duplicates(contacts, threshold=MATCH_THRESHOLD):
+    """
+    Group likely duplicates.
+
+    Returns a list of (positions, score) for every group of two or more
+    contacts, in order of their first position, where score is the lowest
+    match between any two contacts in the group.
+    """
+    groups = []
+    for members in build_blocks(contacts):
+        names = [name_tokens(contacts[i]) for i in members]
+        units = [address_tokens(contacts[i])[1] for i in members]
+        for indices, score in _link_block(names, units, threshold):
+            groups.append(([members[i] for i in indices], score))
+    groups.sort(key=lambda group: group[0][0])
+    return groups
+
+
+def _completeness(contact):
+    return sum(
+        getattr(contact, field) not in (None, "", ()) for field in CONTACT_FIELDS
+    )
+
+
+def merge_group(group):
+    """
+    Merge duplicate contacts into one.
+
+    The most recently updated (then most complete) contact wins; its empty
+    fields are filled from the others and list fields are combined.
+    """
+    ordered = sorted(
+        group, key=lambda c: (c.updated_at or "", _completeness(c)), reverse=True
+    )
+    values = ordered[0].to_dict()
+    for other in ordered[1:]:
+        for field, value in other.to_dict().items():
+            if isinstance(value, tuple):
+                values[field] = tuple(dict.fromkeys((values[field] or ()) + value))
+            elif values[field] in (None, "") and value not in (None, ""):
+                values[field] = value
+    return Contact(**values)
+
+
+def _label(contact):
+    return contact.id or contact.name or "?"
+
+
+def dedupe(contacts, threshold=MATCH_THRESHOLD):
+    """
+    Merge duplicates in contacts.
+
+    Returns (records, groups): records are dicts in the contact schema plus
+    an AUDIT_FIELD column describing each merge, and groups is the output of
+    find_duplicates().
+    """
+    groups = find_duplicates(contacts, threshold)
+    merged_at = {}
+    for members, score in groups:
+        group = [contacts[i] for i in members]
+        audit = (
+            f"merged {len(group)} contacts ({', '.join(map(_label, group))}); "
+            f"score {score:.2f}"
+        )
+        merged_at[members[0]] = (merge_group(group), audit)
+        for i in members[1:]:
+            merged_at[i] = None
+
+    records = []
+    for i, contact in enumerate(contacts):
+        if i in merged_at:
+            if merged_at[i] is None:
+                continue
+            contact, audit = merged_at[i]
+        else:
+            audit = ""
+        record = contact.to_dict()
+        record[AUDIT_FIELD] = audit
+        records.append(record)
+    return records, groups
+
+
+def suggestions(contacts, groups):
+    """Yield one suggestion row per contact in each duplicate group."""
+    for number, (members, score) in enumerate(groups, 1):
+        for i in members:
+            contact = contacts[i]
+            row = {field: getattr(contact, field) for field in SUGGESTION_FIELDS[2:]}
+            yield {"group": number, "score": round(score, 2), **row}
+
+
+def main(argv=None):
+    """Find or merge duplicate contacts in an existing export."""
+    parser = argparse.ArgumentParser(description="Deduplicate a Minted export.")
+    parser.add_argument("input", help="CSV, JSON Lines or JSON export to read")
+    parser.add_argument(
+        "--merge",
+        action="store_true",
+        help="write a merged export instead of a list of suggested merges",
+    )
+    parser.add_argument("--threshold", type=float, default=MATCH_THRESHOLD)
+    parser.add_argument("--output-dir", default="./data")
+    parser.add_argument("--format", dest="formats", default=",".join(DEFAULT_FORMATS))
+    args = parser.parse_args(argv)
+    try:
+        formats = parse_formats(args.formats)
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    contacts = list(iter_contacts_file(args.input))
+    if args.merge:
+        records, groups = dedupe(contacts, args.threshold)
+        basename = "minted-addresses-deduped"
+        fieldnames = list(CONTACT_FIELDS) + [AUDIT_FIELD]
+    else:
+        groups = find_duplicates(contacts, args.threshold)
+        records = suggestions(contacts, groups)
+        basename = "minted-addresses-duplicates"
+        fieldnames = SUGGESTION_FIELDS
+
+    _, paths = write_records(records, args.output_dir, basename, formats, fieldnames)
+    elapsed = time.perf_counter() - start
+    duplicates = sum(len(members) - 1 for members, _ in groups)
+    print(
+        f"{len(contacts)} contacts: {len(groups)} duplicate groups, "
+        f"{duplicates} duplicates found in {elapsed:.1f}s"
+    )
+    for path in paths.values():
+        print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Minted Export Diff
+
+Compares two exports (e.g. last year's and this year's
+`data/minted-addresses.csv`) and reports added, removed and changed
+contacts, with one row per changed field. Both files are streamed: only a
+key -> row hash index of the old export is kept in memory, plus the rows
+that actually changed.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import re
+import time
+
+from minted_contact import flatten_value
+from minted_contact import SCRAPED_FIELDS
+from minted_json import iter_json_array
+from minted_writers import parse_formats
+from minted_writers import write_records
+
+DIFF_FIELDS = ["change", "key", "name", "field", "old", "new"]
+
+# Column names of the older exports, mapped onto the contact schema
+LEGACY_FIELDS = {
+    **SCRAPED_FIELDS,
+    # address_export.py
+    "address": "address1",
+    "town": "locality",
+    "zipcode": "postal_code",
+}
+
+_NOT_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def iter_rows(path):
+    """Stream an export as dicts of text: CSV, JSON Lines or a JSON array."""
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+        return
+
+    if path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            records = (json.loads(line) for line in f if line.strip())
+            for record in records:
+                yield {key: flatten_value(value) for key, value in record.items()}
+        return
+
+    with open(path, "rb") as f:
+        for record in iter_json_array(f):
+            yield {key: flatten_value(value) for key, value in record.items()}
+
+
+def canonical_row(row):
+    """Rename legacy columns onto the contact schema and render values as text."""
+    canonical = {}
+    for column, value in row.items():
+        column = column.strip().lower()
+        field = LEGACY_FIELDS.get(column, column)
+        canonical[field] = "" if value is None else str(value)
+    return canonical
+
+
+def _normalize(text):
+    return _NOT_WORD.sub(" ", text.lower()).strip()
+
+
+def row_key(row):
+    """
+    Key a row by id, or by normalised name and address for exports that
+    have no ids (the scraping and print page exports).
+    """
+    if row.get("id"):
+        return row["id"]
+    return "|".join(
+        _normalize(row.get(field, "")) for field in ("name", "address1", "postal_code")
+    )
+
+
+def row_hash(row):
+    """Return a compact hash of a row's fields and values."""
+    text = "\x1f".join(f"{field}\x1e{row[field]}" for field in sorted(row))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+
+
+def iter_keyed_rows(path):
+    """Yield (key, row) pairs, numbering repeated keys so each stays unique."""
+    counts = {}
+    for row in iter_rows(path):
+        row = canonical_row(row)
+        key = row_key(row)
+        counts[key] = counts.get(key, 0) + 1
+        if counts[key] > 1:
+            key = f"{key}#{counts[key]}"
+        yield key, row
+
+
+def field_changes(key, old, new):
+    """Yield a changed event for every field whose value differs."""
+    for field in dict.fromkeys(list(old) + list(new)):
+        old_value, new_value = old.get(field, ""), new.get(field, "")
+        if old_value != new_value:
+            event = _event("changed", key, new or old)
+            event.update(field=field, old=old_value, new=new_value)
+            yield event
+
+
+def _event(change, key, row):
+    return {
+        "change": change,
+        "key": key,
+        "name": row.get("name", ""),
+        "field": "",
+        "old": "",
+        "new": "",
+    }
+
+
+def diff_exports(old_path, new_path):
+    """
+    Yield diff events between two exports, in DIFF_FIELDS form.
+
+    Added contacts are reported while the new export is read; changed and
+    removed ones after a second pass over the old export, which looks up
+    just the rows that differ.
+    """
+    index = {key: row_hash(row) for key, row in iter_keyed_rows(old_path)}
+
+    changed = {}
+    for key, row in iter_keyed_rows(new_path):
+        old_hash = index.pop(key, None)
+        if old_hash is None:
+            yield _event("added", key, row)
+        elif old_hash != row_hash(row):
+            changed[key] = row
+
+    # Whatever is left in the index is no longer in the new export
+    removed = index
+    for key, row in iter_keyed_rows(old_path):
+        if key in changed:
+            yield from field_changes(key, row, changed[key])
+        elif key in removed:
+            yield _event("removed", key, row)
+
+
+def main(argv=None):
+    """Write the changes between two exports."""
+    parser = argparse.ArgumentParser(description="Compare two Minted exports.")
+    parser.add_argument("old", help="earlier export (CSV, JSON Lines or JSON)")
+    parser.add_argument("new", help="later export")
+    parser.add_argument("--output-dir", default="./data")
+    parser.add_argument("--basename", default="minted-addresses-diff")
+    parser.add_argument("--format", dest="formats", default="csv")
+    args = parser.parse_args(argv)
+    try:
+        formats = parse_formats(args.formats)
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    totals = {"added": 0, "removed": 0, "changed": set()}
+
+    def counted(events):
+        for event in events:
+            if event["change"] == "changed":
+                totals["changed"].add(event["key"])
+            else:
+                totals[event["change"]] += 1
+            yield event
+
+    _, paths = write_records(
+        counted(diff_exports(args.old, args.new)),
+        args.output_dir,
+        args.basename,
+        formats,
+        DIFF_FIELDS,
+    )
+    elapsed = time.perf_counter() - start
+    print(
+        f"{totals['added']} added, {totals['removed']} removed, "
+        f"{len(totals['changed'])} changed in {elapsed:.1f}s"
+    )
+    for path in paths.values():
+        print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
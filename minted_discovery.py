@@ -0,0 +1,107 @@
+"""
+Minted Strategy Discovery
+
+Remembers which export strategy last worked (an API endpoint, the print
+page or live DOM scraping), how long it took and how many contacts it
+returned, so later runs try it first instead of waiting on dead endpoints.
+Strategies ranked ahead of it are re-probed only once REPROBE_AFTER has
+passed; the rest are tried only when the preferred one fails.
+"""
+
+import json
+import os
+import tempfile
+import time
+
+from minted_api_client import API_ENDPOINTS
+from minted_session import CACHE_DIR
+
+DISCOVERY_PATH = os.path.join(CACHE_DIR, "strategies.json")
+REPROBE_AFTER = 7 * 24 * 60 * 60  # seconds
+
+# Cheapest first: plain JSON, then the print page HTML, then the browser
+STRATEGIES = [f"api:{endpoint}" for endpoint in API_ENDPOINTS] + ["print", "dom"]
+
+
+def load_discovery(path=DISCOVERY_PATH):
+    """Load the strategy cache, or an empty one."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_discovery(cache, path=DISCOVERY_PATH):
+    """
+    Atomically write the strategy cache.
+
+    Batch workers save it at the same time, so each writes its own temporary
+    file (the last one in wins). The cache is only a hint, so a failed save
+    is reported and otherwise ignored; returns whether it was saved.
+    """
+    tmp_path = None
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w",
+            dir=os.path.dirname(path),
+            prefix=os.path.basename(path) + ".",
+            suffix=".tmp",
+            delete=False,
+            encoding="utf-8",
+        ) as f:
+            tmp_path = f.name
+            json.dump(cache, f, indent=2)
+        os.replace(tmp_path, path)
+        return True
+    except OSError as e:
+        print(f"Warning: could not save the strategy cache {path}: {e}")
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+
+def record_attempt(cache, strategy, count, latency):
+    """Record the outcome of trying a strategy; a count of 0 is a failure."""
+    cache[strategy] = {
+        "ok": bool(count),
+        "count": count,
+        "latency": round(latency, 2),
+        "checked_at": time.time(),
+    }
+
+
+def plan_strategies(cache, strategies=None, reprobe_after=REPROBE_AFTER, now=None):
+    """
+    Return the order to try strategies in.
+
+    The most recent strategy that worked goes first, preceded only by
+    cheaper strategies that are due for a re-probe. Everything else follows
+    in its default order, as fallbacks.
+    """
+    strategies = list(strategies or STRATEGIES)
+    now = time.time() if now is None else now
+
+    working = [name for name in strategies if cache.get(name, {}).get("ok")]
+    if not working:
+        return strategies
+    preferred = max(working, key=lambda name: cache[name]["checked_at"])
+
+    cheaper = strategies[: strategies.index(preferred)]
+    probes = [
+        name
+        for name in cheaper
+        if now - cache.get(name, {}).get("checked_at", 0) >= reprobe_after
+    ]
+    rest = [name for name in strategies if name != preferred and name not in probes]
+    return probes + [preferred] + rest
+
+
+def describe(cache, strategy):
+    """One-line summary of a strategy's last result, for progress output."""
+    entry = cache.get(strategy)
+    if not entry:
+        return f"{strategy} (not tried yet)"
+    outcome = f"{entry['count']} contacts" if entry["ok"] else "failed"
+    return f"{strategy} (last {outcome} in {entry['latency']}s)"
@@ -0,0 +1,156 @@
+"""
+Minted ChromeDriver Resolution
+
+Finds a chromedriver binary without going to the network when possible:
+an explicit CHROMEDRIVER_PATH, then a pinned copy in the local cache, and
+only then webdriver_manager, whose download is pinned for next time.
+"""
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import time
+
+from minted_session import CACHE_DIR
+
+CHROMEDRIVER_CACHE_DIR = os.path.join(CACHE_DIR, "chromedriver")
+PIN_FILENAME = "pinned.json"
+
+VERSION_PATTERN = re.compile(r"(\d+)\.\d+\.\d+(?:\.\d+)?")
+
+CHROME_BINARIES = [
+    "google-chrome",
+    "google-chrome-stable",
+    "chromium",
+    "chromium-browser",
+    "chrome",
+    "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+]
+
+
+def binary_version(path):
+    """Return the version reported by `path --version`, or None."""
+    try:
+        result = subprocess.run(
+            [path, "--version"], capture_output=True, text=True, timeout=10, check=False
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = VERSION_PATTERN.search(result.stdout)
+    return match.group(0) if match else None
+
+
+def chrome_version():
+    """Return the installed Chrome version, or None if it can't be found."""
+    candidates = [os.environ.get("CHROME_PATH")] + CHROME_BINARIES
+    for candidate in filter(None, candidates):
+        path = shutil.which(candidate) or (
+            candidate if os.path.isfile(candidate) else None
+        )
+        if path:
+            version = binary_version(path)
+            if version:
+                return version
+    return None
+
+
+def major_version(version):
+    """Return the major version number of a version string."""
+    return int(version.split(".", 1)[0])
+
+
+def is_compatible(driver_version, browser_version):
+    """Check a chromedriver matches Chrome's major version, if both are known."""
+    if not driver_version or not browser_version:
+        return True
+    return major_version(driver_version) == major_version(browser_version)
+
+
+def load_pin(cache_dir=CHROMEDRIVER_CACHE_DIR):
+    """Return the pinned driver record, or None."""
+    try:
+        with open(os.path.join(cache_dir, PIN_FILENAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _replace_atomically(target, write):
+    """
+    Call write(tmp_path) on a unique file next to target, then move it over
+    target, so concurrent writers never see or produce a half-written file.
+    """
+    directory = os.path.dirname(target)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=os.path.basename(target) + ".", suffix=".tmp"
+    )
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _write_pin(record, tmp_path):
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f)
+
+
+def pin_driver(path, version, cache_dir=CHROMEDRIVER_CACHE_DIR):
+    """
+    Copy a chromedriver binary into the cache and pin it for later runs.
+
+    Batch workers may pin at the same time while others are already running
+    the pinned binary, so the copy and the pin file are each written under a
+    unique name and renamed into place: a running driver keeps its old file,
+    and no worker ever starts a partly copied one.
+    """
+    target_dir = os.path.join(cache_dir, version or "unknown")
+    os.makedirs(target_dir, exist_ok=True)
+    target = os.path.join(target_dir, os.path.basename(path))
+    if os.path.abspath(path) != os.path.abspath(target):
+        _replace_atomically(target, lambda tmp_path: shutil.copy2(path, tmp_path))
+    _replace_atomically(
+        os.path.join(cache_dir, PIN_FILENAME),
+        lambda tmp_path: _write_pin({"path": target, "version": version}, tmp_path),
+    )
+    return target
+
+
+def resolve_chromedriver(cache_dir=CHROMEDRIVER_CACHE_DIR):
+    """
+    Return a path to a usable chromedriver binary.
+
+    Resolution order is CHROMEDRIVER_PATH, the pinned cached driver (if it
+    matches the installed Chrome's major version) and finally
+    webdriver_manager. Prints where the driver came from and how long it took.
+    """
+    start = time.perf_counter()
+
+    path = os.environ.get("CHROMEDRIVER_PATH")
+    source = "CHROMEDRIVER_PATH"
+    if not (path and os.path.isfile(path)):
+        path = None
+        pin = load_pin(cache_dir)
+        if pin and os.path.isfile(pin.get("path", "")):
+            browser_version = chrome_version()
+            if is_compatible(pin.get("version"), browser_version):
+                path = pin["path"]
+                source = "pinned cache"
+
+    if path is None:
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        installed = ChromeDriverManager().install()
+        path = pin_driver(installed, binary_version(installed), cache_dir)
+        source = "webdriver_manager"
+
+    elapsed = time.perf_counter() - start
+    print(f"Resolved chromedriver from {source} in {elapsed:.2f}s: {path}")
+    return path
@@ -0,0 +1,380 @@
+"""
+Minted Address Enrichment
+
+Checks US contacts against a local ZIP code reference table: fills in a
+missing city, state or ZIP code, corrects a state (or ZIP code) that
+contradicts the rest of the address, and flags contacts that can't be
+mailed as they stand.
+
+The reference table is a SQLite database indexed by ZIP code and by
+state and city, built once from a GeoNames postal code file (US.zip or
+US.txt from https://download.geonames.org/export/zip/) or any CSV with
+zip, city and state columns:
+
+    python minted_enrich.py --build US.zip
+    python minted_enrich.py data/minted-addresses.csv
+"""
+
+import argparse
+import csv
+from functools import lru_cache
+import io
+import os
+import re
+import sqlite3
+import time
+import zipfile
+
+from minted_address import STATES
+from minted_contact import CONTACT_FIELDS
+from minted_contact import iter_contacts_file
+from minted_session import CACHE_DIR
+from minted_writers import DEFAULT_FORMATS
+from minted_writers import parse_formats
+from minted_writers import write_records
+
+REFERENCE_PATH = os.environ.get(
+    "MINTED_ZIP_DB", os.path.join(CACHE_DIR, "zipcodes.sqlite")
+)
+DELIVERABLE_FIELD = "deliverable"
+AUDIT_FIELD = "enrichment"
+
+US_COUNTRIES = {"", "us", "usa", "united states", "united states of america"}
+
+# Column names accepted when building from a CSV, in order of preference
+SOURCE_COLUMNS = {
+    "zip": ("zip", "zipcode", "zip_code", "postal_code"),
+    "city": ("city", "primary_city", "place_name"),
+    "state": ("state_id", "state", "state_code"),
+    "county": ("county", "county_name"),
+}
+
+# GeoNames postal code files: tab separated, no header
+GEONAMES_COLUMNS = {"zip": 1, "city": 2, "state": 4, "county": 5}
+
+CITY_ABBREVIATIONS = {"saint": "st", "sainte": "ste", "fort": "ft", "mount": "mt"}
+
+STATE_CODES = {name.lower(): code for code, name in STATES.items()}
+
+ZIP = re.compile(r"^\s*(\d{5})(?:\s*-?\s*(\d{4}))?\s*$")
+WORD = re.compile(r"[a-z0-9]+")
+
+# SQLite limits the number of bound parameters per statement
+_QUERY_BATCH = 500
+
+
+@lru_cache(maxsize=65536)
+def city_key(city):
+    """Normalise a city name for comparison, e.g. "St. Louis" -> "st louis"."""
+    words = WORD.findall((city or "").lower())
+    return " ".join(CITY_ABBREVIATIONS.get(word, word) for word in words)
+
+
+@lru_cache(maxsize=1024)
+def state_code(state):
+    """Return a state's postal abbreviation, accepting full names."""
+    state = (state or "").strip()
+    if len(state) == 2:
+        return state.upper()
+    return STATE_CODES.get(state.lower(), state)
+
+
+def _source_rows(path):
+    """Yield (zip, city, state, county) from a GeoNames file or a CSV."""
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            name = next((n for n in archive.namelist() if n.endswith(".txt")), None)
+            if name is None:
+                raise ValueError(f"{path} has no .txt ZIP code table in it")
+            with archive.open(name) as f:
+                yield from _geonames_rows(io.TextIOWrapper(f, encoding="utf-8"))
+        return
+
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".txt"):
+            yield from _geonames_rows(f)
+            return
+        reader = csv.DictReader(f)
+        header = {name.strip().lower(): name for name in reader.fieldnames or []}
+        columns = {}
+        for field, aliases in SOURCE_COLUMNS.items():
+            found = next((header[a] for a in aliases if a in header), None)
+            if found is None and field != "county":
+                raise ValueError(f"{path} has no {field} column")
+            columns[field] = found
+        for row in reader:
+            yield tuple(
+                row[columns[field]] if columns[field] else ""
+                for field in ("zip", "city", "state", "county")
+            )
+
+
+def _geonames_rows(lines):
+    for line in lines:
+        parts = line.rstrip("\n").split("\t")
+        if len(parts) > GEONAMES_COLUMNS["county"]:
+            yield tuple(parts[i] for i in GEONAMES_COLUMNS.values())
+
+
+def build_reference(source, path=REFERENCE_PATH):
+    """
+    Build the SQLite reference table at path from a GeoNames file or CSV.
+
+    The database is written to a temporary file and moved into place, so a
+    failed build never leaves a half-written table. Returns the row count.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    connection = sqlite3.connect(tmp_path)
+    try:
+        connection.execute(
+            "CREATE TABLE zipcodes (zip TEXT PRIMARY KEY, city TEXT, state TEXT, "
+            "county TEXT, city_key TEXT) WITHOUT ROWID"
+        )
+        rows = (
+            (match.group(1), city.strip(), state_code(state), county.strip())
+            for zipcode, city, state, county in _source_rows(source)
+            for match in [ZIP.match(zipcode)]
+            if match
+        )
+        connection.executemany(
+            "INSERT OR IGNORE INTO zipcodes VALUES (?, ?, ?, ?, ?)",
+            ((*row, city_key(row[1])) for row in rows),
+        )
+        connection.execute("CREATE INDEX zipcodes_city ON zipcodes (state, city_key)")
+        connection.commit()
+        (count,) = connection.execute("SELECT COUNT(*) FROM zipcodes").fetchone()
+    finally:
+        connection.close()
+    os.replace(tmp_path, path)
+    return count
+
+
+class ZipReference:
+    """
+    Read-only lookups in the reference table.
+
+    The database is opened read-only and memory-mapped, so only the pages
+    a lookup touches are read; nothing is loaded up front.
+    """
+
+    def __init__(self, path=REFERENCE_PATH):
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"No ZIP reference table at {path}; "
+                "build one with `python minted_enrich.py --build US.zip`"
+            )
+        self.connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        self.connection.execute("PRAGMA mmap_size = 268435456")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Close the database."""
+        self.connection.close()
+
+    def _query(self, sql, keys, placeholder="?"):
+        """Run sql for batches of keys; "{}" in sql is one placeholder per key."""
+        keys = list(keys)
+        for start in range(0, len(keys), _QUERY_BATCH):
+            batch = keys[start : start + _QUERY_BATCH]
+            values = [
+                value
+                for key in batch
+                for value in (key if isinstance(key, tuple) else (key,))
+            ]
+            placeholders = ", ".join([placeholder] * len(batch))
+            yield from self.connection.execute(sql.format(placeholders), values)
+
+    def lookup_zips(self, zips):
+        """Return {zip: (city, state, county)} for the known ZIP codes in zips."""
+        rows = self._query(
+            "SELECT zip, city, state, county FROM zipcodes WHERE zip IN ({})",
+            set(zips),
+        )
+        return {zipcode: (city, state, county) for zipcode, city, state, county in rows}
+
+    def lookup_cities(self, places):
+        """
+        Return {(state, city_key): zip} for (state, city_key) pairs that
+        have exactly one ZIP code.
+        """
+        rows = self._query(
+            "SELECT state, city_key, MIN(zip), COUNT(*) FROM zipcodes "
+            "WHERE (state, city_key) IN (VALUES {}) GROUP BY state, city_key",
+            set(places),
+            "(?, ?)",
+        )
+        return {
+            (state, key): zipcode for state, key, zipcode, count in rows if count == 1
+        }
+
+
+def _is_us(contact):
+    return (contact.country or "").strip().lower() in US_COUNTRIES
+
+
+def _reconcile_zip(contact, zip5, reference, found_zip):
+    """
+    Fill in or correct a contact from its ZIP code's reference row.
+    Returns (consistent, notes).
+    """
+    notes = []
+    ref_city, ref_state, _ = reference
+    state = state_code(contact.administrative_area)
+    city_matches = city_key(contact.locality) == city_key(ref_city)
+    if not contact.locality:
+        contact.locality = ref_city
+        notes.append("filled city")
+        city_matches = True
+    if not state:
+        contact.administrative_area = ref_state
+        notes.append("filled state")
+    elif state != ref_state:
+        if city_matches:
+            contact.administrative_area = ref_state
+            notes.append(f"corrected state {state} -> {ref_state}")
+        elif found_zip:
+            contact.postal_code = found_zip
+            notes.append(f"corrected ZIP {zip5} -> {found_zip}")
+        else:
+            notes.append(f"ZIP {zip5} is in {ref_city}, {ref_state}")
+            return False, notes
+    elif not city_matches:
+        # ZIPs cover more places than their primary city; only note it
+        notes.append(f"ZIP {zip5} is listed as {ref_city}")
+    return True, notes
+
+
+def enrich_contact(contact, zips, cities):
+    """
+    Check and complete one contact in place from the looked-up reference
+    rows. Returns (deliverable, notes).
+    """
+    match = ZIP.match(contact.postal_code or "")
+    zip5 = match.group(1) if match else None
+    found_zip = cities.get(
+        (state_code(contact.administrative_area), city_key(contact.locality))
+    )
+
+    if zip5 and zip5 in zips:
+        consistent, notes = _reconcile_zip(contact, zip5, zips[zip5], found_zip)
+        if not consistent:
+            return False, notes
+    elif zip5:
+        return False, [f"unknown ZIP {zip5}"]
+    elif found_zip:
+        contact.postal_code = found_zip
+        notes = ["filled ZIP"]
+    else:
+        return False, ["missing ZIP"]
+
+    if not contact.address1:
+        notes.append("missing street address")
+        return False, notes
+    if not contact.locality or not contact.administrative_area:
+        return False, notes
+    return True, notes
+
+
+def enrich(contacts, reference):
+    """
+    Enrich US contacts against a ZipReference, in place.
+
+    Every distinct ZIP code and city is looked up once, in batches. Returns
+    a list of (deliverable, notes) per contact; non-US contacts get
+    (None, ["not a US address"]).
+    """
+    us = [contact for contact in contacts if _is_us(contact)]
+    zips = reference.lookup_zips(
+        m.group(1) for m in (ZIP.match(c.postal_code or "") for c in us) if m
+    )
+    cities = reference.lookup_cities(
+        (state_code(c.administrative_area), city_key(c.locality))
+        for c in us
+        if c.locality and c.administrative_area
+    )
+    return [
+        (
+            enrich_contact(contact, zips, cities)
+            if _is_us(contact)
+            else (None, ["not a US address"])
+        )
+        for contact in contacts
+    ]
+
+
+def write_enriched(contacts, results, output_dir, formats):
+    """Write contacts with their enrich() results; returns {format: path}."""
+    records = (
+        {
+            **contact.to_dict(),
+            DELIVERABLE_FIELD: deliverable,
+            AUDIT_FIELD: "; ".join(notes),
+        }
+        for contact, (deliverable, notes) in zip(contacts, results)
+    )
+    fieldnames = list(CONTACT_FIELDS) + [DELIVERABLE_FIELD, AUDIT_FIELD]
+    _, paths = write_records(
+        records, output_dir, "minted-addresses-enriched", formats, fieldnames
+    )
+    return paths
+
+
+def main(argv=None):
+    """Enrich an existing export, or build the reference table."""
+    parser = argparse.ArgumentParser(description="Enrich a Minted export.")
+    parser.add_argument("input", nargs="?", help="CSV, JSON Lines or JSON export")
+    parser.add_argument(
+        "--build",
+        metavar="SOURCE",
+        help="build the reference table from a GeoNames US.zip/US.txt or a CSV",
+    )
+    parser.add_argument("--reference", default=REFERENCE_PATH)
+    parser.add_argument("--output-dir", default="./data")
+    parser.add_argument("--format", dest="formats", default=",".join(DEFAULT_FORMATS))
+    args = parser.parse_args(argv)
+    try:
+        formats = parse_formats(args.formats)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.build:
+        start = time.perf_counter()
+        count = build_reference(args.build, args.reference)
+        elapsed = time.perf_counter() - start
+        print(f"Built {args.reference} with {count} ZIP codes in {elapsed:.1f}s")
+    if not args.input:
+        if not args.build:
+            parser.error("an input export (or --build) is required")
+        return
+
+    start = time.perf_counter()
+    contacts = list(iter_contacts_file(args.input))
+    with ZipReference(args.reference) as reference:
+        results = enrich(contacts, reference)
+
+    paths = write_enriched(contacts, results, args.output_dir, formats)
+    elapsed = time.perf_counter() - start
+    changed = sum(
+        any(note.startswith(("filled", "corrected")) for note in notes)
+        for _, notes in results
+    )
+    undeliverable = sum(deliverable is False for deliverable, _ in results)
+    print(
+        f"{len(contacts)} contacts: {changed} filled in or corrected, "
+        f"{undeliverable} undeliverable in {elapsed:.1f}s"
+    )
+    for path in paths.values():
+        print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
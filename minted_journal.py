@@ -0,0 +1,138 @@
+"""
+Minted Export Journal
+
+Append-only checkpoint file for long exports. Contacts are journaled as
+they are fetched or scraped, so a run that dies part way (browser crash,
+expired session, Ctrl+C) can be resumed with `--resume` and only fetches
+what is still missing.
+"""
+
+import json
+import os
+import threading
+
+JOURNAL_FILENAME = ".minted-export-journal.jsonl"
+
+
+def journal_path(output_dir):
+    """Return the journal file used for exports to output_dir."""
+    return os.path.join(output_dir, JOURNAL_FILENAME)
+
+
+def read_entries(path):
+    """
+    Read journal entries, oldest first.
+
+    Returns (entries, size) where size is the length in bytes of the intact
+    entries; a torn final line from a crash mid-write is left out.
+    """
+    entries = []
+    size = 0
+    try:
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    break
+                size += len(line)
+    except FileNotFoundError:
+        pass
+    return entries, size
+
+
+class ExportJournal:
+    """
+    Journal of contacts captured so far by one export.
+
+    API contacts are recorded in order per endpoint, scraped rows by their
+    row index. Writes are flushed to disk every checkpoint_every contacts
+    and on close(). Safe to share between scraping threads.
+    """
+
+    def __init__(self, path, resume=False, checkpoint_every=50):
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self.entries, size = read_entries(path) if resume else ([], 0)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Kept open for the whole export and closed by close(), so entries
+        # can be appended as contacts arrive
+        # pylint: disable-next=consider-using-with
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+        # Drop any torn entry so new ones start on a clean line
+        self._file.truncate(size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def api_contacts(self, endpoint):
+        """Return the contacts already journaled for an API endpoint."""
+        return [
+            contact
+            for entry in self.entries
+            if entry["source"] == "api" and entry["key"] == endpoint
+            for contact in entry["contacts"]
+        ]
+
+    def scraped_rows(self):
+        """Return {row index: contact} for rows already scraped."""
+        return {
+            entry["key"]: entry["contacts"][0]
+            for entry in self.entries
+            if entry["source"] == "scrape"
+        }
+
+    def append(self, source, key, contacts):
+        """Add an entry, checkpointing once enough contacts are pending."""
+        line = json.dumps({"source": source, "key": key, "contacts": contacts})
+        with self._lock:
+            self._file.write(line + "\n")
+            self._pending += len(contacts)
+            if self._pending >= self.checkpoint_every:
+                self._checkpoint()
+
+    def record_api(self, endpoint, records):
+        """Pass API records through, journaling them in checkpoint-sized batches."""
+        batch = []
+        try:
+            for record in records:
+                batch.append(record)
+                if len(batch) >= self.checkpoint_every:
+                    self.append("api", endpoint, batch)
+                    batch = []
+                yield record
+        finally:
+            if batch:
+                self.append("api", endpoint, batch)
+
+    def record_row(self, index, contact):
+        """Journal one scraped row."""
+        self.append("scrape", index, [contact])
+
+    def _checkpoint(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def close(self):
+        """Flush outstanding entries and close the journal."""
+        with self._lock:
+            if not self._file.closed:
+                self._checkpoint()
+                self._file.close()
+
+    def clear(self):
+        """Close and remove the journal once the export has been written."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
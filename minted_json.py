@@ -0,0 +1,102 @@
+"""
+Minted JSON Streaming
+
+Decodes a JSON array of contacts (a downloaded contacts.json, or a
+contacts API response body) one record at a time, so large address books
+never have to be held in memory.
+"""
+
+import codecs
+import json
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+def _walk_prefix(data, prefix):
+    """Yield items from already-decoded data at an ijson-style prefix."""
+    parts = prefix.split(".")
+    if parts[-1] == "item":
+        parts = parts[:-1]
+    for part in parts:
+        data = data[part]
+    yield from data
+
+
+def iter_json_array(fp, prefix="item", read_size=65536):
+    """
+    Yield objects from a JSON array one at a time without loading it all.
+
+    Uses ijson when it's installed. Otherwise a top-level array is decoded
+    incrementally with the standard library; other prefixes such as
+    `results.item` fall back to a full json.load.
+    """
+    if ijson is not None:
+        yield from ijson.items(fp, prefix, use_float=True)
+        return
+    if prefix != "item":
+        yield from _walk_prefix(json.load(fp), prefix)
+        return
+
+    yield from _iter_top_level_array(fp, read_size)
+
+
+def _read_text(fp, read_size):
+    """Yield text read from fp, decoding UTF-8 when it's a binary file."""
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    while True:
+        chunk = fp.read(read_size)
+        if not chunk:
+            # Raises if the file ends partway through a UTF-8 character
+            text_decoder.decode(b"", final=True)
+            return
+        if isinstance(chunk, bytes):
+            # A read ending inside a UTF-8 character decodes to nothing yet
+            chunk = text_decoder.decode(chunk)
+        if chunk:
+            yield chunk
+
+
+def _iter_top_level_array(fp, read_size):
+    """Decode a top-level JSON array incrementally with the json module."""
+    decoder = json.JSONDecoder()
+    chunks = _read_text(fp, read_size)
+    buffer = ""
+    pos = 0
+    started = False
+    eof = False
+
+    while True:
+        # Skip whitespace and separators between values
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if not started and pos < len(buffer):
+            if buffer[pos] != "[":
+                raise ValueError("Expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if started and pos < len(buffer) and buffer[pos] == "]":
+            return
+
+        if pos < len(buffer):
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # A value ending right at the buffer edge may be truncated
+                if end < len(buffer) or eof:
+                    yield item
+                    pos = end
+                    continue
+
+        if eof:
+            raise ValueError("Unexpected end of JSON array")
+        chunk = next(chunks, None)
+        eof = chunk is None
+        buffer = buffer[pos:] + (chunk or "")
+        pos = 0
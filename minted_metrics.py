@@ -0,0 +1,150 @@
+"""
+Minted Export Metrics
+
+Timers and counters for each phase of an export (driver setup, login, API
+fetch, scraping, writing), written out as a JSON report per run, plus an
+opt-in cProfile hook for digging into a slow export.
+"""
+
+from contextlib import contextmanager
+from functools import wraps
+import json
+import os
+import threading
+import time
+
+METRICS_FILENAME = "minted-export-metrics.json"
+
+
+class Metrics:
+    """Thread-safe phase timers and counters for one export run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Forget everything recorded so far and restart the run clock."""
+        with self._lock:
+            self.started_at = time.time()
+            self._start = time.perf_counter()
+            self.timers = {}
+            self.counters = {}
+            self.details = {}
+
+    def record(self, name, elapsed):
+        """Add one timed call of elapsed seconds to the timer name."""
+        with self._lock:
+            count, total, longest = self.timers.get(name, (0, 0.0, 0.0))
+            self.timers[name] = (count + 1, total + elapsed, max(longest, elapsed))
+
+    @contextmanager
+    def timer(self, name):
+        """Time a block of code under name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def timed(self, name=None):
+        """Decorator timing every call of a function (by default under its name)."""
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name or func.__name__):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def count(self, name, n=1):
+        """Increment the counter name by n."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def detail(self, name, values):
+        """Merge a dict of JSON-serialisable values into the report section name."""
+        with self._lock:
+            self.details.setdefault(name, {}).update(values)
+
+    def report(self, waits=None):
+        """
+        Return the run's metrics as a dict.
+
+        waits is an optional minted_waits.WaitReport whose phases are added.
+        """
+        with self._lock:
+            report = {
+                "started_at": self.started_at,
+                "elapsed": round(time.perf_counter() - self._start, 3),
+                "timers": {
+                    name: {
+                        "count": count,
+                        "total": round(total, 3),
+                        "mean": round(total / count, 3),
+                        "max": round(longest, 3),
+                    }
+                    for name, (count, total, longest) in self.timers.items()
+                },
+                "counters": dict(self.counters),
+                **self.details,
+            }
+        if waits is not None:
+            report["waits"] = {
+                phase: {"fixed": round(fixed, 3), "waited": round(waited, 3)}
+                for phase, (fixed, waited) in waits.phases.items()
+            }
+        return report
+
+    def write_report(self, path, waits=None):
+        """Write report() to path as JSON and return the path."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(waits), f, indent=2)
+        return path
+
+    def print_summary(self):
+        """Print time spent per phase, slowest first."""
+        if not self.timers:
+            return
+        print("\nPhase timing (calls, total, mean, max):")
+        for name, (count, total, longest) in sorted(
+            self.timers.items(), key=lambda item: item[1][1], reverse=True
+        ):
+            print(
+                f"  {name:<24} {count:6d}  {total:8.2f}s  "
+                f"{total / count:6.2f}s  {longest:6.2f}s"
+            )
+
+
+METRICS = Metrics()
+
+
+@contextmanager
+def profiled(path=None, top=25):
+    """
+    Run a block under cProfile when path is set, saving pstats data there.
+
+    The top functions by cumulative time are also printed; view the saved
+    file with `python -m pstats <path>` or a viewer such as snakeviz.
+    Without a path this does nothing.
+    """
+    if not path:
+        yield
+        return
+
+    import cProfile
+    import pstats
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
+        print(f"\nProfile written to {path}; top {top} by cumulative time:")
+        pstats.Stats(profile).sort_stats("cumulative").print_stats(top)
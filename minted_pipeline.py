@@ -0,0 +1,168 @@
+"""
+Minted Export Pipeline
+
+Threads joined by bounded queues, so the stages of an export overlap:
+page fetches, turning records into contacts, and each output writer run
+on their own threads, and an export takes about as long as its slowest
+stage instead of the sum of them. The queues are bounded, so a slow stage
+holds back the ones before it rather than letting records pile up in
+memory.
+
+The stages mostly wait on the network and the disk (and zlib, for Excel),
+which release the GIL, so threads are enough; pure-Python work such as
+JSON decoding still takes turns. Set MINTED_PIPELINE=0 to run every stage
+in sequence on the calling thread instead, e.g. to compare timings.
+"""
+
+from itertools import islice
+import os
+import queue
+import threading
+
+PIPELINE = os.environ.get("MINTED_PIPELINE", "1") != "0"
+
+# Chunks buffered between two stages
+QUEUE_SIZE = int(os.environ.get("MINTED_QUEUE_SIZE", "8"))
+
+# Items handed between stages at a time; one per queue operation
+CHUNK_SIZE = 100
+
+_DONE = object()
+
+
+def chunked(iterable, size):
+    """Yield lists of up to size items from iterable."""
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def _put(chunks, item, stop):
+    """Put item on chunks unless stop is set first; returns whether it was."""
+    while not stop.is_set():
+        try:
+            chunks.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def background(iterable, name="stage", chunk_size=CHUNK_SIZE, maxsize=QUEUE_SIZE):
+    """
+    Iterate over iterable on its own thread, yielding its items here.
+
+    Up to maxsize chunks of chunk_size items are read ahead. An exception
+    in iterable is raised here, and closing this generator early (or an
+    exception in the consumer) stops and closes iterable on its thread.
+    Without PIPELINE, iterable is returned as it is.
+    """
+    if not PIPELINE:
+        return iterable
+    return _background(iterable, name, chunk_size, maxsize)
+
+
+def _background(iterable, name, chunk_size, maxsize):
+    chunks = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def produce():
+        iterator = iter(iterable)
+        try:
+            for chunk in chunked(iterator, chunk_size):
+                if not _put(chunks, chunk, stop):
+                    return
+            _put(chunks, _DONE, stop)
+        except BaseException as e:  # pylint: disable=broad-exception-caught
+            # Chunks are lists, so the consumer can tell the exception apart
+            _put(chunks, e, stop)
+        finally:
+            # A generator has to be closed on the thread that runs it
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    thread = threading.Thread(target=produce, name=name, daemon=True)
+    thread.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is _DONE:
+                return
+            if isinstance(chunk, BaseException):
+                raise chunk
+            yield from chunk
+    finally:
+        stop.set()
+        thread.join()
+
+
+class Worker:
+    """
+    Calls handle(item) for each item put on it, on its own thread.
+
+    Once every item is queued, drain() waits for them to be handled, then
+    finish() calls close() (or abort(), if asked to or if handle failed)
+    on the same thread, and join() waits for that. Once handle has failed,
+    put() raises its exception, and anything still queued is dropped.
+    """
+
+    def __init__(
+        self, handle, close=None, abort=None, name="worker", maxsize=QUEUE_SIZE
+    ):
+        self.error = None
+        self._items = queue.Queue(maxsize)
+        self._drained = threading.Event()
+        self._finish = threading.Event()
+        self._aborting = False
+        self._thread = threading.Thread(
+            target=self._run, args=(handle, close, abort), name=name, daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, handle, close, abort):
+        while True:
+            item = self._items.get()
+            if item is _DONE:
+                break
+            if self.error is None:
+                try:
+                    handle(item)
+                except BaseException as e:  # pylint: disable=broad-exception-caught
+                    self.error = e
+        self._drained.set()
+        self._finish.wait()
+        callback = abort if self._aborting or self.error else close
+        if callback is not None:
+            try:
+                callback()
+            except BaseException as e:  # pylint: disable=broad-exception-caught
+                self.error = self.error or e
+
+    def put(self, item):
+        """Queue item, waiting while the queue is full."""
+        if self.error is not None:
+            raise self.error
+        self._items.put(item)
+
+    def drain(self):
+        """Wait for the queued items to be handled and return the first error."""
+        if not self._drained.is_set():
+            self._items.put(_DONE)
+            self._drained.wait()
+        return self.error
+
+    def finish(self, abort=False):
+        """Start close(), or abort() with abort, once drained."""
+        self.drain()
+        self._aborting = abort
+        self._finish.set()
+
+    def join(self):
+        """Wait for finish() to complete and return the first error."""
+        if not self._finish.is_set():
+            self.finish()
+        self._thread.join()
+        return self.error
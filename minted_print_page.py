@@ -0,0 +1,122 @@
+"""
+Minted Print Page Parser
+
+Single-pass parser for the address book's `/print/` page. It reads raw
+bytes (a string, bytes or any binary file-like object such as a streamed
+HTTP response) with lxml's iterparse, so no BeautifulSoup tree is built
+and each contact's elements are freed as soon as they've been read.
+"""
+
+from contextlib import contextmanager
+import io
+
+from minted_address import LOCALITY_COLUMNS
+from minted_address import parse_locality
+from minted_address import parse_locality_column
+from minted_api_client import ContactsClient
+from minted_api_client import PRINT_URL
+
+NAME_CLASS = "contact-name"
+ADDRESS_CLASS = "contact-address"
+
+
+def _has_class(element, name):
+    return name in (element.get("class") or "").split()
+
+
+def split_address(text):
+    """
+    Split a contact-address block into (address, locality).
+
+    The last line is the locality ("City, ST 12345"); the lines before it
+    are joined into one whitespace-normalised street address.
+    """
+    lines = text.strip().split("\n")
+    street = "".join(lines[:-1]).strip()
+    return " ".join(street.split()), lines[-1].strip()
+
+
+def iter_print_page(source):
+    """
+    Yield {"name", "address", "locality"} records from a print page.
+
+    Only contacts inside the page's <main> element are read, in page order.
+    """
+    from lxml import etree
+
+    if isinstance(source, str):
+        source = source.encode("utf-8")
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+
+    depth = 0
+    name = None
+    # lxml.etree is a C extension, which pylint can't inspect
+    # pylint: disable-next=c-extension-no-member
+    for event, element in etree.iterparse(
+        source, events=("start", "end"), tag=("main", "span"), html=True
+    ):
+        if element.tag == "main":
+            depth += 1 if event == "start" else -1
+            continue
+        if event == "start" or not depth:
+            continue
+
+        if _has_class(element, NAME_CLASS):
+            name = "".join(element.itertext()).strip()
+        elif _has_class(element, ADDRESS_CLASS):
+            address, locality = split_address("".join(element.itertext()))
+            yield {"name": name, "address": address, "locality": locality}
+            name = None
+
+            # Free the contact's record, and the records before it, now
+            # that they've been read
+            record = element.getparent()
+            record.clear()
+            while record.getprevious() is not None:
+                del record.getparent()[0]
+
+
+def iter_print_rows(source, expand_states=False):
+    """
+    Yield print page records with the locality parsed, one at a time.
+
+    Records have the same columns as print_page_frame, without building a
+    DataFrame.
+    """
+    for record in iter_print_page(source):
+        parsed = parse_locality(record["locality"], expand_states=expand_states)
+        yield {**record, **dict(zip(LOCALITY_COLUMNS, parsed))}
+
+
+def print_page_frame(source, expand_states=False):
+    """
+    Return a print page's contacts as a DataFrame.
+
+    Besides name, address and locality it has the city, state, zip, zip4
+    and country columns parsed from the locality.
+    """
+    import pandas as pd
+
+    address_book = pd.DataFrame(
+        list(iter_print_page(source)), columns=["name", "address", "locality"]
+    )
+    parsed = parse_locality_column(
+        address_book["locality"], expand_states=expand_states
+    )
+    return pd.concat([address_book, parsed], axis=1)
+
+
+@contextmanager
+def open_print_page(cookies, url=PRINT_URL):
+    """
+    Request the print page over plain HTTP and yield its binary body.
+
+    The body can be handed straight to iter_print_page, which parses it as
+    it downloads.
+    """
+    with ContactsClient(cookies=cookies) as client:
+        with client.scheduler.get(url, stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            yield response.raw
@@ -0,0 +1,296 @@
+"""
+Minted Request Scheduler
+
+Retries, rate limiting and circuit breaking for calls to the Minted API.
+Transient failures (connection errors, timeouts, 429 and 5xx responses)
+are retried with exponential backoff and full jitter, honouring any
+Retry-After header, so a brief hiccup doesn't force the slow Selenium
+fallback. Defaults can be overridden with MINTED_* environment variables.
+
+There is no client-side rate limit unless MINTED_RATE_LIMIT is set: the
+number of requests in flight is already bounded (see ContactsClient) and
+the server's own 429 + Retry-After answers pause every request.
+"""
+
+from email.utils import parsedate_to_datetime
+import os
+import random
+import statistics
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+CONNECT_TIMEOUT = float(os.environ.get("MINTED_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.environ.get("MINTED_READ_TIMEOUT", 30))
+MAX_RETRIES = int(os.environ.get("MINTED_MAX_RETRIES", 4))
+# Requests per second; 0 (the default) leaves requests unthrottled
+RATE_LIMIT = float(os.environ.get("MINTED_RATE_LIMIT", 0))
+
+BACKOFF_BASE = 0.5  # seconds
+BACKOFF_MAX = 30  # seconds
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling an endpoint whose circuit is open."""
+
+
+def endpoint_key(url):
+    """Group URLs by host and path, so every page of an endpoint shares state."""
+    parts = urlparse(url)
+    return f"{parts.netloc}{parts.path}"
+
+
+def retry_after(response):
+    """Return the delay in seconds asked for by a Retry-After header, or None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Full-jitter exponential backoff for a zero-based retry attempt."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket allowing rate requests per second on average.
+
+    Up to capacity requests may go out in a burst; with no rate, requests
+    are not limited at all. pause() holds every caller back, e.g. after
+    the server answers 429 with a Retry-After.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate or 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if not self.rate:
+                    if now >= self.paused_until:
+                        return
+                    wait = self.paused_until - now
+                else:
+                    self.tokens = min(
+                        self.capacity, self.tokens + (now - self.updated) * self.rate
+                    )
+                    self.updated = now
+                    if now >= self.paused_until and self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Stop handing out tokens for the next seconds."""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker.
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    fail fast for reset_timeout seconds; then a single trial call is let
+    through, which closes the circuit on success or reopens it on failure.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return True if a call may be made now."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.trial_running:
+                return False
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        """Close the circuit after a request to the endpoint succeeds."""
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        """Count a failure, opening the circuit at the threshold or on a failed trial."""
+        with self._lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+
+
+class RequestStats:
+    """Per-endpoint request counts, retries and latencies."""
+
+    def __init__(self):
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, latency, retries, failed):
+        """Add one scheduled request, including all of its retries."""
+        with self._lock:
+            stats = self.endpoints.setdefault(
+                endpoint, {"requests": 0, "retries": 0, "failures": 0, "latency": []}
+            )
+            stats["requests"] += 1
+            stats["retries"] += retries
+            stats["failures"] += int(failed)
+            stats["latency"].append(latency)
+
+    def summary(self):
+        """Return counts and p50/p95 latency (seconds) per endpoint."""
+        with self._lock:
+            endpoints = {
+                endpoint: dict(stats, latency=sorted(stats["latency"]))
+                for endpoint, stats in self.endpoints.items()
+            }
+        summary = {}
+        for endpoint, stats in endpoints.items():
+            latency = stats.pop("latency")
+            p95 = latency[min(len(latency) - 1, int(len(latency) * 0.95))]
+            summary[endpoint] = dict(
+                stats, p50=round(statistics.median(latency), 3), p95=round(p95, 3)
+            )
+        return summary
+
+    def print_summary(self):
+        """Print request counts, retries and latency per endpoint."""
+        if not self.endpoints:
+            return
+        print("\nAPI requests (count, retries, failures, latency p50/p95):")
+        for endpoint, stats in self.summary().items():
+            print(
+                f"  {endpoint}: {stats['requests']} requests, "
+                f"{stats['retries']} retries, {stats['failures']} failed, "
+                f"{stats['p50']:.2f}s / {stats['p95']:.2f}s"
+            )
+
+
+class RequestScheduler:
+    """
+    Send GET requests over a session with retries, rate limiting and
+    per-endpoint circuit breaking.
+
+    timeout is a (connect, read) pair or a single number of seconds. bucket
+    is the TokenBucket every request takes a token from; by default it
+    allows RATE_LIMIT requests per second, and with no limit a Retry-After
+    still pauses every request. circuit is the (failure_threshold,
+    reset_timeout) pair for each endpoint's CircuitBreaker.
+    """
+
+    def __init__(
+        self,
+        session,
+        timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+        max_retries=MAX_RETRIES,
+        bucket=None,
+        circuit=(5, 30),
+    ):
+        self.session = session
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.bucket = bucket or TokenBucket(RATE_LIMIT)
+        self.circuit = circuit
+        self.breakers = {}
+        self.stats = RequestStats()
+
+    def breaker(self, url):
+        """Return the circuit breaker for url's endpoint."""
+        key = endpoint_key(url)
+        breaker = self.breakers.get(key)
+        if breaker is None:
+            # setdefault is atomic, so threads racing here share one breaker
+            breaker = self.breakers.setdefault(key, CircuitBreaker(*self.circuit))
+        return breaker
+
+    def get(self, url, **kwargs):
+        """
+        GET url, retrying transient failures.
+
+        Returns the last response, which may still be an error status once
+        retries run out; raises the last exception if no response was had,
+        or CircuitOpenError while the endpoint's circuit is open.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        breaker = self.breaker(url)
+        start = time.perf_counter()
+        attempt = 0
+        try:
+            while True:
+                if not breaker.allow():
+                    raise CircuitOpenError(f"Circuit open for {endpoint_key(url)}")
+                self.bucket.acquire()
+
+                delay = None
+                try:
+                    response = self.session.get(url, **kwargs)
+                except requests.RequestException as e:
+                    breaker.record_failure()
+                    transient = isinstance(
+                        e, (requests.ConnectionError, requests.Timeout)
+                    )
+                    if not transient or attempt >= self.max_retries:
+                        raise
+                else:
+                    # A 429 means the endpoint is up, just asking us to slow down
+                    if response.status_code not in RETRY_STATUSES - {429}:
+                        breaker.record_success()
+                    else:
+                        breaker.record_failure()
+                    retryable = response.status_code in RETRY_STATUSES
+                    if not retryable or attempt >= self.max_retries:
+                        break
+                    delay = retry_after(response)
+                    response.close()
+                    if delay is not None:
+                        self.bucket.pause(delay)
+
+                if delay is None:
+                    delay = backoff_delay(attempt)
+                time.sleep(min(delay, BACKOFF_MAX))
+                attempt += 1
+        except Exception:
+            self.stats.record(
+                endpoint_key(url), time.perf_counter() - start, attempt, True
+            )
+            raise
+
+        self.stats.record(
+            endpoint_key(url),
+            time.perf_counter() - start,
+            attempt,
+            not response.ok,
+        )
+        return response
@@ -0,0 +1,120 @@
+"""
+Minted Session Cache
+
+Stores the cookies from a logged-in browser session in a private local
+cache file, so later runs can call the contacts API over plain HTTP and
+only start Chrome when the cached session is rejected.
+"""
+
+import hashlib
+import json
+import os
+import time
+
+import requests
+
+from minted_api_client import CONTACTS_URL
+
+CACHE_DIR = os.environ.get(
+    "MINTED_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "minted-export")
+)
+SESSION_MAX_AGE = 12 * 60 * 60  # seconds
+
+
+def session_cache_path(email, cache_dir=None):
+    """Return the cache file used for an account's session cookies."""
+    digest = hashlib.sha256(email.strip().lower().encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir or CACHE_DIR, "sessions", f"{digest[:16]}.json")
+
+
+def save_session(email, cookies, max_age=SESSION_MAX_AGE, cache_dir=None):
+    """
+    Cache selenium cookies (from driver.get_cookies()) for an account.
+
+    The file is created with owner-only permissions and expires after
+    max_age seconds.
+    """
+    path = session_cache_path(email, cache_dir)
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    payload = {"expires_at": time.time() + max_age, "cookies": cookies}
+
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.chmod(path, 0o600)
+
+
+def load_session(email, cache_dir=None):
+    """Return cached selenium cookies for an account, or None if unusable."""
+    path = session_cache_path(email, cache_dir)
+    try:
+        with open(path, encoding="utf-8") as f:
+            payload = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    now = time.time()
+    if payload.get("expires_at", 0) <= now:
+        clear_session(email, cache_dir)
+        return None
+    cookies = [
+        cookie
+        for cookie in payload.get("cookies", [])
+        if cookie.get("expiry", now) >= now
+    ]
+    return cookies or None
+
+
+def clear_session(email, cache_dir=None):
+    """Remove an account's cached session, if there is one."""
+    try:
+        os.remove(session_cache_path(email, cache_dir))
+    except FileNotFoundError:
+        pass
+
+
+def cookie_dict(cookies):
+    """Flatten selenium cookie dicts into a name -> value mapping."""
+    return {c["name"]: c["value"] for c in cookies}
+
+
+def session_is_valid(cookies, url=CONTACTS_URL, timeout=10):
+    """
+    Check whether cookies are still accepted by the contacts API.
+
+    Only the status line and headers are read; the body is not downloaded.
+    """
+    try:
+        with requests.get(
+            url,
+            cookies=cookie_dict(cookies),
+            timeout=timeout,
+            stream=True,
+            allow_redirects=False,
+        ) as response:
+            content_type = response.headers.get("Content-Type", "")
+            return response.status_code == 200 and "json" in content_type
+    except requests.RequestException:
+        return False
+
+
+def apply_session(driver, cookies):
+    """
+    Load cached cookies into a Chrome driver so it starts logged in.
+
+    Uses the DevTools protocol so cookies for every minted.com subdomain
+    can be set without first navigating to each one.
+    """
+    cdp_cookies = []
+    for cookie in cookies:
+        cdp_cookie = {
+            key: cookie[key]
+            for key in ("name", "value", "domain", "path", "secure", "httpOnly")
+            if key in cookie
+        }
+        if "expiry" in cookie:
+            cdp_cookie["expires"] = cookie["expiry"]
+        if cookie.get("sameSite") in ("Strict", "Lax", "None"):
+            cdp_cookie["sameSite"] = cookie["sameSite"]
+        cdp_cookies.append(cdp_cookie)
+    driver.execute_cdp_cmd("Network.setCookies", {"cookies": cdp_cookies})
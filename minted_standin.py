@@ -0,0 +1,445 @@
+"""
+Minted Stand-in Server
+
+A local imitation of the parts of minted.com the exporters talk to, so
+every export path can be run and timed without a real account:
+
+- `/login/`: a login form like login.minted.com's, which sets a session
+  cookie and redirects to the address book
+- `/api/contacts/contacts/?format=json`: the contacts API, paginated by
+  page number, by limit/offset or not at all
+- `/api/contacts/contacts/print/`: the print page HTML
+- `/addressbook/`: the address book page with `abk_contactRow` rows
+
+Contacts are synthetic but deterministic for a given count and seed. A
+Faults object passed as `faults` delays every request by a fixed latency
+and makes the API and print page fail, for testing retries and fallbacks:
+
+- latency: seconds added to every request
+- error_rate: the fraction of requests answered with error_status (503)
+- fail_first: the first n requests for each URL fail, then it recovers
+- retry_after: seconds sent as Retry-After with each injected error
+- dead_paths: paths (or full path?query targets) that always fail; a set
+  that can be changed while the server runs
+
+    python minted_standin.py --contacts 10000 --latency 0.05
+    python minted_standin.py --error-rate 0.2 --retry-after 1
+"""
+
+import argparse
+from html import escape
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+import json
+import random
+import threading
+import time
+from urllib.parse import parse_qs
+from urllib.parse import urlparse
+
+HOST = "127.0.0.1"
+LOGIN_PATH = "/login/"
+API_PATH = "/api/contacts/contacts/"
+PRINT_PATH = "/api/contacts/contacts/print/"
+ADDRESS_BOOK_PATH = "/addressbook/"
+SESSION_COOKIE = "sessionid"
+
+PAGINATION_STYLES = ("page", "offset", "none")
+
+_FIRST_NAMES = ["Ann", "Ben", "Cara", "Dev", "Eli", "Fay", "Gus", "Hana", "Ivan"]
+_LAST_NAMES = ["Smith", "Lee", "Garcia", "Nguyen", "Brown", "Khan", "Rossi", "Wu"]
+_STREETS = ["Main St", "Oak Ave", "Maple Dr", "Cedar Ln", "Park Rd", "Lake Ct"]
+_PLACES = [
+    ("Springfield", "IL", "627"),
+    ("Portland", "OR", "972"),
+    ("Austin", "TX", "787"),
+    ("Albany", "NY", "122"),
+    ("Madison", "WI", "537"),
+    ("Boulder", "CO", "803"),
+]
+
+
+def make_contacts(count, seed=0):
+    """Return count synthetic contacts shaped like contacts API records."""
+    rng = random.Random(seed)
+    contacts = []
+    for i in range(count):
+        first, last = rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES)
+        city, state, zip_prefix = rng.choice(_PLACES)
+        contact_id = f"STANDIN-{i:06d}"
+        contacts.append(
+            {
+                "id": contact_id,
+                "url": f"{API_PATH}{contact_id.lower()}/?format=json",
+                "name": f"{first} {last}",
+                "members": [],
+                "labels": ["standin"] if i % 7 == 0 else [],
+                "groups": [],
+                "address1": f"{rng.randint(1, 9999)} {rng.choice(_STREETS)}",
+                "address2": f"Apt {rng.randint(1, 40)}" if i % 5 == 0 else "",
+                "locality": city,
+                "administrative_area": state,
+                "postal_code": f"{zip_prefix}{rng.randint(0, 99):02d}",
+                "country": "US",
+                "has_mailing_address": True,
+                "external_id": 10000000 + i,
+                "updated_at": "2025-01-02T03:04:05.000000Z",
+                "notes": "",
+                "data": {},
+                "sort_key": f"{last}{first}".lower(),
+            }
+        )
+    return contacts
+
+
+def _locality(contact):
+    return (
+        f"{contact['locality']}, {contact['administrative_area']} "
+        f"{contact['postal_code']}"
+    )
+
+
+def login_page():
+    """HTML for the login form."""
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>Log In | Minted</title></head>
+<body>
+  <form method="post" action="{LOGIN_PATH}">
+    <div data-cy="email">
+      <input id="identifierMNTD" name="identifierMNTD" type="email">
+    </div>
+    <div data-cy="password">
+      <input id="password" name="password" type="password">
+    </div>
+    <button type="submit">Log In</button>
+  </form>
+</body>
+</html>
+"""
+
+
+def iter_print_page(contacts):
+    """Yield the print page HTML in chunks, one contact at a time."""
+    yield (
+        '<!DOCTYPE html>\n<html lang="en">\n<head>\n  <meta charset="utf-8">\n'
+        "  <title>Address Book | Minted</title>\n</head>\n<body>\n  <main>\n"
+    )
+    for contact in contacts:
+        street = "\n        ".join(
+            escape(line) for line in (contact["address1"], contact["address2"]) if line
+        )
+        yield (
+            '    <div class="contact">\n'
+            f'      <span class="contact-name">{escape(contact["name"])}</span>\n'
+            '      <span class="contact-address">\n'
+            f"        {street}\n"
+            f"        {escape(_locality(contact))}\n"
+            "      </span>\n"
+            "    </div>\n"
+        )
+    yield "  </main>\n</body>\n</html>\n"
+
+
+def iter_address_book_page(contacts):
+    """Yield the address book page HTML in chunks, one row at a time."""
+    yield (
+        '<!DOCTYPE html>\n<html lang="en">\n<head>\n  <meta charset="utf-8">\n'
+        "  <title>Address Book | Minted</title>\n</head>\n<body>\n"
+        '  <div id="__next">\n    <main>\n      <div data-cy="abk_contactsTable">\n'
+    )
+    for contact in contacts:
+        lines = (contact["address1"], contact["address2"], _locality(contact))
+        address = "".join(
+            f"            <div>{escape(line)}</div>\n" for line in lines if line
+        )
+        yield (
+            '        <div data-cy="abk_contactRow">\n'
+            f'          <div class="css-f8pz0c">{escape(contact["name"])}</div>\n'
+            f'          <div class="css-1mzdrva">\n{address}          </div>\n'
+            '          <div data-cy="abk_expandContactButton">'
+            "<button>Expand</button></div>\n"
+            '          <div data-cy="abk_editContactButton">'
+            "<button>Edit</button></div>\n"
+            "        </div>\n"
+        )
+    yield "      </div>\n    </main>\n  </div>\n</body>\n</html>\n"
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """Serves the stand-in pages from the StandinServer's contacts."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Route a GET request."""
+        self.server.faults.delay()
+        parts = urlparse(self.path)
+        query = parse_qs(parts.query)
+        self.server.log_request_path(self.path)
+        if parts.path in (API_PATH, PRINT_PATH) and self.server.should_fail(
+            parts.path, self.path
+        ):
+            self._send_error()
+        elif parts.path == LOGIN_PATH:
+            self._send("text/html", login_page())
+        elif parts.path == PRINT_PATH:
+            self._send_chunked("text/html", iter_print_page(self.server.contacts))
+        elif parts.path == API_PATH:
+            self._send("application/json", json.dumps(self._api_page(query)))
+        elif parts.path == ADDRESS_BOOK_PATH:
+            self._send_chunked(
+                "text/html", iter_address_book_page(self.server.contacts)
+            )
+        else:
+            self._send("text/plain", "Not found", status=404)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Accept any login and redirect to the address book."""
+        self.server.faults.delay()
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if urlparse(self.path).path != LOGIN_PATH:
+            self._send("text/plain", "Not found", status=404)
+            return
+        self.send_response(303)
+        self.send_header("Set-Cookie", f"{SESSION_COOKIE}=standin; Path=/")
+        self.send_header("Location", ADDRESS_BOOK_PATH)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _api_page(self, query):
+        contacts = self.server.contacts
+        size = self.server.page_size
+        style = self.server.pagination
+        if style == "none":
+            return contacts
+
+        base = f"{self.server.base_url}{API_PATH}?format=json"
+        if style == "offset":
+            start = int(query.get("offset", [0])[0])
+            size = int(query.get("limit", [size])[0])
+            next_url = f"{base}&offset={start + size}&limit={size}"
+        else:
+            page = int(query.get("page", [1])[0])
+            start = (page - 1) * size
+            next_url = f"{base}&page={page + 1}"
+        return {
+            "count": len(contacts),
+            "next": next_url if start + size < len(contacts) else None,
+            "previous": None,
+            "results": contacts[start : start + size],
+        }
+
+    def _send_error(self):
+        faults = self.server.faults
+        status = faults.error_status
+        self.send_response(status)
+        if faults.retry_after is not None:
+            self.send_header("Retry-After", f"{faults.retry_after:g}")
+        body = f"Injected {status}".encode("utf-8")
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send(self, content_type, body, status=200):
+        body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunked(self, content_type, chunks):
+        self.send_response(200)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        buffer = []
+        size = 0
+        for chunk in chunks:
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= 64 * 1024:
+                self._write_chunk("".join(buffer).encode("utf-8"))
+                buffer, size = [], 0
+        if buffer:
+            self._write_chunk("".join(buffer).encode("utf-8"))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+
+
+class Faults:
+    """
+    The latency and errors a stand-in server injects; see the module
+    docstring. Injected errors are random but repeatable.
+    """
+
+    def __init__(
+        self,
+        latency=0.0,
+        error_rate=0.0,
+        error_status=503,
+        retry_after=None,
+        fail_first=0,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.fail_first = fail_first
+        self.dead_paths = set()
+        self._random = random.Random(0)
+
+    def delay(self):
+        """Wait out the latency added to a request."""
+        time.sleep(self.latency)
+
+    def should_fail(self, path, target, count):
+        """Whether the count-th request for target (at path) fails."""
+        if path in self.dead_paths or target in self.dead_paths:
+            return True
+        return count <= self.fail_first or self._random.random() < self.error_rate
+
+
+class StandinServer(ThreadingHTTPServer):
+    """
+    The stand-in server, run on a background thread.
+
+    Use as a context manager; port 0 picks a free port. Addresses of the
+    stand-in pages are available as attributes, e.g. `server.api_url`, and
+    every GET target received is counted in `server.request_counts`.
+    contacts is a count of synthetic contacts or a list of API records.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self, contacts=100, page_size=100, pagination="page", faults=None, port=0
+    ):
+        if pagination not in PAGINATION_STYLES:
+            raise ValueError(
+                f"Unknown pagination {pagination!r}; "
+                f"choose from {', '.join(PAGINATION_STYLES)}"
+            )
+        super().__init__((HOST, port), StandinHandler)
+        if isinstance(contacts, int):
+            contacts = make_contacts(contacts)
+        self.contacts = contacts
+        self.page_size = page_size
+        self.pagination = pagination
+        self.faults = faults or Faults()
+        self.request_counts = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """The server's root URL."""
+        return f"http://{HOST}:{self.server_address[1]}"
+
+    @property
+    def login_url(self):
+        """The stand-in login form."""
+        return self.base_url + LOGIN_PATH
+
+    @property
+    def api_url(self):
+        """The first page of the contacts API."""
+        return f"{self.base_url}{API_PATH}?format=json"
+
+    @property
+    def print_url(self):
+        """The print page."""
+        return f"{self.base_url}{PRINT_PATH}?"
+
+    @property
+    def address_book_url(self):
+        """The address book page."""
+        return self.base_url + ADDRESS_BOOK_PATH
+
+    def log_request_path(self, target):
+        """Count a request for target (path and query)."""
+        with self._lock:
+            self.request_counts[target] = self.request_counts.get(target, 0) + 1
+
+    def should_fail(self, path, target):
+        """Whether to answer this request with an injected error."""
+        with self._lock:
+            count = self.request_counts.get(target, 0)
+            return self.faults.should_fail(path, target, count)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        """Serve requests on a daemon thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def main(argv=None):
+    """Run the stand-in server in the foreground."""
+    parser = argparse.ArgumentParser(description="Run a local stand-in for Minted.")
+    parser.add_argument("--contacts", type=int, default=100)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds added to every request"
+    )
+    parser.add_argument("--pagination", choices=PAGINATION_STYLES, default="page")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="fraction of requests failing"
+    )
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument(
+        "--retry-after", type=float, help="Retry-After seconds sent with errors"
+    )
+    parser.add_argument(
+        "--dead-path",
+        action="append",
+        default=[],
+        help="path that always fails (repeatable)",
+    )
+    args = parser.parse_args(argv)
+
+    faults = Faults(args.latency, args.error_rate, args.error_status, args.retry_after)
+    faults.dead_paths.update(args.dead_path)
+    server = StandinServer(
+        args.contacts, args.page_size, args.pagination, faults, args.port
+    )
+    print(f"Serving {len(server.contacts)} contacts on {server.base_url}")
+    for label, url in (
+        ("Login", server.login_url),
+        ("Contacts API", server.api_url),
+        ("Print page", server.print_url),
+        ("Address book", server.address_book_url),
+    ):
+        print(f"  {label:<13} {url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Minted Incremental Sync
+
+Keeps a local index of contact ids and their last seen `updated_at`, and
+merges only new, changed and deleted contacts into an existing export
+instead of rewriting the whole address book on every run.
+
+New contacts are appended to the CSV export. Updates and deletions still
+rewrite the CSV, streamed a chunk at a time, so they cost about as much
+disk time as a full export. The .xlsx is only rewritten when asked for
+(--excel), since a workbook can't be changed without rewriting all of it.
+"""
+
+import argparse
+import csv
+from datetime import datetime
+from datetime import timezone
+from itertools import chain
+import json
+import os
+
+from minted_api_client import CONTACTS_URL
+from minted_api_client import ContactsClient
+from minted_contact import Contact
+from minted_contact import CONTACT_FIELDS
+from minted_contact import flatten_value
+from minted_session import cookie_dict
+from minted_writers import CsvWriter
+from minted_writers import ExcelWriter
+from minted_writers import write_chunks
+
+STATE_FILENAME = ".minted-sync-state.json"
+
+
+def load_state(path):
+    """Load the sync index, or an empty one if there isn't one yet."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return {"synced_at": None, "contacts": {}}
+    state.setdefault("contacts", {})
+    return state
+
+
+def save_state(state, path):
+    """Atomically write the sync index."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def plan_sync(contacts, state):
+    """
+    Compare contacts against the sync index.
+
+    Returns (changed, deleted_ids, seen) where changed holds only the new or
+    updated records as Contacts, deleted_ids the ids no longer present and
+    seen maps every current id to its updated_at.
+    """
+    known = state["contacts"]
+    changed = []
+    seen = {}
+    for contact in contacts:
+        contact_id = str(contact["id"])
+        updated_at = contact.get("updated_at")
+        seen[contact_id] = updated_at
+        if known.get(contact_id) != updated_at:
+            changed.append(Contact.from_api(contact))
+    deleted_ids = set(known) - set(seen)
+    return changed, deleted_ids, seen
+
+
+def _csv_header(path):
+    """Return the header row of an existing CSV file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), [])
+
+
+def _csv_rows(path):
+    """Yield an existing CSV file's rows as dicts of text."""
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+def _is_stale(path, source_path):
+    """Whether path is missing or older than source_path."""
+    return not os.path.exists(path) or (
+        os.path.getmtime(path) < os.path.getmtime(source_path)
+    )
+
+
+def merge_export(csv_path, changed, deleted_ids, known_ids):
+    """
+    Merge changed and deleted contacts into an existing CSV export.
+
+    Pure additions are appended in place, skipping any already appended by
+    a run that didn't get to save its state. Updates and deletions rewrite the
+    file: its rows are streamed into a temporary file that then replaces
+    it, so memory use stays flat, but the time taken still grows with the
+    size of the export. Returns whether the file was rewritten.
+    """
+    header = _csv_header(csv_path)
+    updates = [contact.to_dict() for contact in changed]
+    only_new = not deleted_ids and not any(
+        str(contact.id) in known_ids for contact in changed
+    )
+    if only_new and set(CONTACT_FIELDS) <= set(header):
+        # A run that failed to save its state may already have appended some
+        # of these, so skip rows already in the file and rewrite it if one
+        # has changed since
+        appended = {row["id"]: row["updated_at"] for row in _csv_rows(csv_path)}
+        new = [
+            record
+            for record in updates
+            if appended.get(str(record["id"]))
+            != (flatten_value(record.get("updated_at")) or "")
+        ]
+        if not any(str(record["id"]) in appended for record in new):
+            with open(csv_path, "a", newline="", encoding="utf-8") as f:
+                csv.writer(f, lineterminator="\n").writerows(
+                    [flatten_value(record.get(field)) for field in header]
+                    for record in new
+                )
+            return False
+
+    drop_ids = set(deleted_ids) | {str(contact.id) for contact in changed}
+    fieldnames = header + [field for field in CONTACT_FIELDS if field not in header]
+    kept = (row for row in _csv_rows(csv_path) if row.get("id") not in drop_ids)
+    write_chunks(chain(kept, updates), [CsvWriter(csv_path, fieldnames)])
+    return True
+
+
+def sync_contacts(
+    contacts, output_dir="./data", basename="minted-addresses", excel=False
+):
+    """
+    Sync contacts into output_dir, writing only what changed.
+
+    The CSV export is updated in place. An Excel workbook can't be updated
+    a row at a time, so the .xlsx is only rewritten (in full, from the CSV)
+    when excel is set and it is older than the CSV; otherwise an existing
+    one is left as it was.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    state_path = os.path.join(output_dir, STATE_FILENAME)
+    csv_path = os.path.join(output_dir, f"{basename}.csv")
+    excel_path = os.path.join(output_dir, f"{basename}.xlsx")
+
+    state = load_state(state_path)
+    if not os.path.exists(csv_path):
+        # No export to merge into, so start from a full sync
+        state = {"synced_at": None, "contacts": {}}
+
+    changed, deleted_ids, seen = plan_sync(contacts, state)
+    print(
+        f"{len(seen)} contacts: {len(changed)} new or changed, "
+        f"{len(deleted_ids)} deleted"
+    )
+
+    if not state["contacts"]:
+        records = (contact.to_dict() for contact in changed)
+        write_chunks(records, [CsvWriter(csv_path, CONTACT_FIELDS)])
+    elif changed or deleted_ids:
+        merge_export(csv_path, changed, deleted_ids, state["contacts"])
+    else:
+        print("Export is already up to date")
+
+    if changed or deleted_ids:
+        print(f"Updated {csv_path}")
+    if excel and _is_stale(excel_path, csv_path):
+        write_chunks(
+            _csv_rows(csv_path), [ExcelWriter(excel_path, _csv_header(csv_path))]
+        )
+        print(f"Rewrote {excel_path}")
+    elif os.path.exists(excel_path) and (changed or deleted_ids):
+        print(f"Left {excel_path} as it was; pass --excel to rewrite it")
+
+    state["contacts"] = seen
+    state["synced_at"] = datetime.now(timezone.utc).isoformat()
+    save_state(state, state_path)
+    return changed, deleted_ids
+
+
+def main(argv=None):
+    """Log in to Minted and sync the address book into ./data."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output-dir", default="./data")
+    parser.add_argument("--basename", default="minted-addresses")
+    parser.add_argument(
+        "--excel",
+        action="store_true",
+        help="also rewrite the .xlsx export, which takes as long as a full export",
+    )
+    args = parser.parse_args(argv)
+
+    # Imported here so the sync helpers can be used without selenium
+    from minted_address_export import get_email
+    from minted_address_export import session_cookies
+
+    try:
+        cookies = cookie_dict(session_cookies(get_email()))
+    except RuntimeError:
+        print("Login failed. Exiting.")
+        return
+
+    with ContactsClient(cookies=cookies) as client:
+        sync_contacts(
+            client.iter_contacts(CONTACTS_URL),
+            args.output_dir,
+            args.basename,
+            args.excel,
+        )
+
+
+if __name__ == "__main__":
+    main()
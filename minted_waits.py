@@ -0,0 +1,122 @@
+"""
+Minted Condition Waits
+
+Short-poll WebDriverWait helpers that replace fixed sleep() calls, plus a
+report of how long each phase actually waited compared with the fixed
+delay it used to pay.
+"""
+
+from contextlib import contextmanager
+import math
+import time
+
+POLL_INTERVAL = 0.1  # seconds between condition checks
+
+
+class WaitReport:
+    """Per-phase record of fixed sleep budgets versus time actually waited."""
+
+    def __init__(self):
+        self.phases = {}
+
+    def record(self, phase, fixed_delay, elapsed):
+        """Add a wait to phase; fixed_delay is what the old sleep() cost."""
+        fixed, waited = self.phases.get(phase, (0.0, 0.0))
+        self.phases[phase] = (fixed + fixed_delay, waited + elapsed)
+
+    @contextmanager
+    def phase(self, name, fixed_delay):
+        """Time a block of code that replaced a fixed delay."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, fixed_delay, time.perf_counter() - start)
+
+    def print_summary(self):
+        """Print the wall-clock time saved per phase."""
+        if not self.phases:
+            return
+        print("\nWait timing (fixed sleep vs condition wait):")
+        total_fixed = total_waited = 0.0
+        for phase, (fixed, waited) in self.phases.items():
+            total_fixed += fixed
+            total_waited += waited
+            print(
+                f"  {phase:<24} fixed {fixed:6.2f}s  waited {waited:6.2f}s  "
+                f"saved {fixed - waited:6.2f}s"
+            )
+        print(
+            f"  {'total':<24} fixed {total_fixed:6.2f}s  waited {total_waited:6.2f}s  "
+            f"saved {total_fixed - total_waited:6.2f}s"
+        )
+
+
+REPORT = WaitReport()
+
+
+def wait_for(driver, condition, timeout=10, phase=None, fixed_delay=None):
+    """
+    Wait until condition holds, polling every POLL_INTERVAL seconds.
+
+    Returns the condition's value, or False on timeout. When phase is given
+    the wait is added to REPORT; fixed_delay is the sleep() it replaced, or
+    None for a one-second polling loop (charged as whole seconds elapsed).
+    """
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    start = time.perf_counter()
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(
+            condition
+        )
+    except TimeoutException:
+        return False
+    finally:
+        if phase:
+            elapsed = time.perf_counter() - start
+            if fixed_delay is None:
+                fixed_delay = max(1, math.ceil(elapsed))
+            REPORT.record(phase, fixed_delay, elapsed)
+
+
+def document_ready(driver):
+    """Condition: the current document has finished loading."""
+    return driver.execute_script("return document.readyState") == "complete"
+
+
+def url_excludes(fragment):
+    """Condition: the current URL no longer contains fragment."""
+
+    def _condition(driver):
+        current_url = driver.current_url
+        return current_url if fragment not in current_url else False
+
+    return _condition
+
+
+class network_idle:  # pylint: disable=invalid-name
+    """
+    Condition: no new resource requests for quiet_period seconds.
+
+    Named like the selenium expected_conditions it is used alongside.
+    """
+
+    def __init__(self, quiet_period=0.3):
+        self.quiet_period = quiet_period
+        self.last_count = None
+        self.quiet_since = None
+
+    def __call__(self, driver):
+        if not document_ready(driver):
+            return False
+        count = driver.execute_script(
+            "return performance.getEntriesByType('resource').length"
+        )
+        now = time.perf_counter()
+        if count != self.last_count:
+            self.last_count = count
+            self.quiet_since = now
+            return False
+        return now - self.quiet_since >= self.quiet_period
@@ -0,0 +1,603 @@
+"""
+Minted Output Writers
+
+Registry of output formats for exported contacts. Every writer consumes
+records incrementally, one chunk at a time, so no finished DataFrame is
+needed. Formats are picked by name, e.g. `--format csv,parquet`.
+"""
+
+import csv
+import importlib.util
+import json
+import os
+
+from minted_contact import CONTACT_FIELDS
+from minted_contact import flatten_value
+from minted_contact import LIST_FIELDS
+from minted_metrics import METRICS
+from minted_pipeline import chunked
+from minted_pipeline import PIPELINE
+from minted_pipeline import Worker
+
+WRITERS = {}
+
+DEFAULT_FORMATS = ["csv", "xlsx"]
+
+# "xlsxwriter" or "openpyxl"; by default xlsxwriter is used when installed
+XLSX_ENGINE = os.environ.get("MINTED_XLSX_ENGINE")
+
+# Excel column widths (in characters) picked from the first chunk's values
+MIN_COLUMN_WIDTH = 8
+MAX_COLUMN_WIDTH = 50
+
+
+def register_writer(name, extension):
+    """Class decorator adding a writer to the registry under name."""
+
+    def decorator(cls):
+        cls.name = name
+        cls.extension = extension
+        WRITERS[name] = cls
+        return cls
+
+    return decorator
+
+
+def parse_formats(value):
+    """Parse a comma-separated format list, e.g. 'csv,parquet'."""
+    formats = [name.strip().lower() for name in value.split(",") if name.strip()]
+    unknown = [name for name in formats if name not in WRITERS]
+    if unknown:
+        raise ValueError(
+            f"Unknown format(s) {', '.join(unknown)}; "
+            f"choose from {', '.join(sorted(WRITERS))}"
+        )
+    return formats
+
+
+class Writer:
+    """
+    Base class for output writers.
+
+    Call write() with each chunk of records and close() when done. The
+    column order comes from fieldnames, or from the first record. Formats
+    with a header row (CSV, Excel) label the columns with header, if given,
+    instead of the field names.
+
+    Output goes to path + ".tmp" and is moved over path only by close(),
+    so an export that fails part way leaves the previous file untouched;
+    abort() deletes the partial file instead.
+    """
+
+    name = None
+    extension = None
+
+    def __init__(self, path, fieldnames=None, header=None):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.fieldnames = list(fieldnames) if fieldnames else None
+        self.header = list(header) if header else None
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, records):
+        """Write a chunk of records."""
+        records = list(records)
+        if not records:
+            return
+        if self.fieldnames is None:
+            self.fieldnames = list(records[0])
+        self._write(records)
+        self.count += len(records)
+
+    def _write(self, records):
+        raise NotImplementedError
+
+    def _close(self):
+        """Flush and close the output file."""
+
+    def close(self):
+        """Finish the output file and move it into place at path."""
+        self._close()
+        if os.path.exists(self.tmp_path):
+            os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        """Close and delete the partly written file, leaving path as it was."""
+        self._close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+@register_writer("csv", ".csv")
+class CsvWriter(Writer):
+    """Plain CSV, with nested fields flattened to text."""
+
+    def __init__(self, path, fieldnames=None, header=None):
+        super().__init__(path, fieldnames, header)
+        self._file = None
+        self._writer = None
+
+    def _write(self, records):
+        if self._writer is None:
+            # Kept open across write() calls and closed by _close()
+            # pylint: disable-next=consider-using-with
+            self._file = open(self.tmp_path, "w", newline="", encoding="utf-8")
+            self._writer = csv.writer(self._file, lineterminator="\n")
+            self._writer.writerow(self.header or self.fieldnames)
+        self._writer.writerows(
+            [flatten_value(record.get(k)) for k in self.fieldnames]
+            for record in records
+        )
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+@register_writer("jsonl", ".jsonl")
+class JsonLinesWriter(Writer):
+    """One JSON object per line, keeping nested fields intact."""
+
+    def __init__(self, path, fieldnames=None, header=None):
+        super().__init__(path, fieldnames, header)
+        self._file = None
+
+    def _write(self, records):
+        if self._file is None:
+            # Kept open across write() calls and closed by _close()
+            # pylint: disable-next=consider-using-with
+            self._file = open(self.tmp_path, "w", encoding="utf-8")
+        for record in records:
+            self._file.write(json.dumps(record, default=str))
+            self._file.write("\n")
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+@register_writer("xlsx", ".xlsx")
+class ExcelWriter(Writer):
+    """
+    Excel workbook streamed to disk, so memory use doesn't grow with rows.
+
+    Uses xlsxwriter in constant_memory mode when it's installed (it is the
+    faster of the two) and otherwise openpyxl in write-only mode; engine
+    picks one explicitly. The header row is bold, frozen and filterable.
+    columns maps field names to {"format": ..., "width": ...}, an Excel
+    number format such as "0" or "yyyy-mm-dd" and a width in characters,
+    either of which may be left out; other columns are sized to fit the
+    header and the first chunk of values.
+    """
+
+    def __init__(
+        self, path, fieldnames=None, header=None, *, columns=None, engine=XLSX_ENGINE
+    ):
+        super().__init__(path, fieldnames, header)
+        columns = columns or {}
+        self.column_formats = {
+            field: column["format"]
+            for field, column in columns.items()
+            if column.get("format")
+        }
+        self.column_widths = {
+            field: column["width"]
+            for field, column in columns.items()
+            if column.get("width")
+        }
+        self.engine = engine
+        self._workbook = None
+        self._sheet = None
+        self._row = 0
+
+    def _widths(self, titles, rows):
+        widths = []
+        for i, (field, title) in enumerate(zip(self.fieldnames, titles)):
+            if field in self.column_widths:
+                widths.append(self.column_widths[field])
+                continue
+            longest = max(
+                [len(str(title))]
+                + [len(str(row[i])) for row in rows if row[i] is not None]
+            )
+            widths.append(min(MAX_COLUMN_WIDTH, max(MIN_COLUMN_WIDTH, longest + 2)))
+        return widths
+
+    def _open(self, rows):
+        if self.engine is None:
+            has_xlsxwriter = importlib.util.find_spec("xlsxwriter") is not None
+            self.engine = "xlsxwriter" if has_xlsxwriter else "openpyxl"
+            if not has_xlsxwriter:
+                print(
+                    "xlsxwriter is not installed; writing Excel with openpyxl (slower)"
+                )
+
+        titles = self.header or self.fieldnames
+        widths = self._widths(titles, rows)
+        if self.engine == "xlsxwriter":
+            self._open_xlsxwriter(titles, widths)
+        elif self.engine == "openpyxl":
+            self._open_openpyxl(titles, widths)
+        else:
+            raise ValueError(f"Unknown Excel engine {self.engine!r}")
+
+    def _open_xlsxwriter(self, titles, widths):
+        import xlsxwriter
+
+        # Contact fields are plain text, never formulas or links
+        self._workbook = xlsxwriter.Workbook(
+            self.tmp_path,
+            {
+                "constant_memory": True,
+                "strings_to_formulas": False,
+                "strings_to_urls": False,
+            },
+        )
+        self._sheet = self._workbook.add_worksheet()
+        for i, (field, width) in enumerate(zip(self.fieldnames, widths)):
+            number_format = self.column_formats.get(field)
+            cell_format = (
+                self._workbook.add_format({"num_format": number_format})
+                if number_format
+                else None
+            )
+            self._sheet.set_column(i, i, width, cell_format)
+        self._sheet.freeze_panes(1, 0)
+        self._sheet.write_row(0, 0, titles, self._workbook.add_format({"bold": True}))
+        self._row = 1
+
+    def _open_openpyxl(self, titles, widths):
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font
+        from openpyxl.utils import get_column_letter
+
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet()
+        # Column widths and panes have to be set before the first row
+        for i, width in enumerate(widths, 1):
+            self._sheet.column_dimensions[get_column_letter(i)].width = width
+        self._sheet.freeze_panes = "A2"
+        bold = Font(bold=True)
+        header = []
+        for title in titles:
+            cell = WriteOnlyCell(self._sheet, title)
+            cell.font = bold
+            header.append(cell)
+        self._sheet.append(header)
+        self._row = 1
+
+    def _append_openpyxl(self, rows):
+        from openpyxl.cell import WriteOnlyCell
+
+        formats = [
+            (i, self.column_formats[field])
+            for i, field in enumerate(self.fieldnames)
+            if field in self.column_formats
+        ]
+        for row in rows:
+            for i, number_format in formats:
+                if row[i] is not None:
+                    row[i] = WriteOnlyCell(self._sheet, row[i])
+                    row[i].number_format = number_format
+            self._sheet.append(row)
+
+    def _write(self, records):
+        rows = [
+            [flatten_value(record.get(k)) for k in self.fieldnames]
+            for record in records
+        ]
+        if self._workbook is None:
+            self._open(rows)
+        if self.engine == "xlsxwriter":
+            for row in rows:
+                self._sheet.write_row(self._row, 0, row)
+                self._row += 1
+        else:
+            self._append_openpyxl(rows)
+            self._row += len(rows)
+
+    def _close(self):
+        if self._workbook is None:
+            return
+        last_column = len(self.fieldnames) - 1
+        if self.engine == "xlsxwriter":
+            self._sheet.autofilter(0, 0, self._row - 1, last_column)
+            self._workbook.close()
+        else:
+            from openpyxl.utils import get_column_letter
+
+            self._sheet.auto_filter.ref = (
+                f"A1:{get_column_letter(last_column + 1)}{self._row}"
+            )
+            self._workbook.save(self.tmp_path)
+        self._workbook = None
+
+
+def contact_arrow_types():
+    """Arrow types of the contact fields; the rest of the schema is strings."""
+    import pyarrow as pa
+
+    types = {field: pa.string() for field in CONTACT_FIELDS}
+    types.update({field: pa.list_(pa.string()) for field in LIST_FIELDS})
+    types["has_mailing_address"] = pa.bool_()
+    types["external_id"] = pa.int64()
+    return types
+
+
+def _widen_null_type(arrow_type):
+    """Replace types inferred from all-empty values with strings."""
+    import pyarrow as pa
+
+    if pa.types.is_null(arrow_type):
+        return pa.string()
+    if pa.types.is_list(arrow_type) and pa.types.is_null(arrow_type.value_type):
+        return pa.list_(pa.string())
+    return arrow_type
+
+
+def _as_text(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+
+def _as_text_list(value):
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return [_as_text(item) for item in value]
+    return [_as_text(value)]
+
+
+def _as_int(value):
+    """An integer column value; blank or unparseable text becomes null."""
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            return None
+    return value
+
+
+def _as_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() == "true" if value.strip() else None
+    return value
+
+
+def _as_inferred(value):
+    return json.dumps(value) if isinstance(value, dict) else value
+
+
+def _converter(arrow_type):
+    """Return a function fitting a Python value to arrow_type."""
+    import pyarrow as pa
+
+    if pa.types.is_string(arrow_type):
+        return _as_text
+    if pa.types.is_list(arrow_type) and pa.types.is_string(arrow_type.value_type):
+        return _as_text_list
+    if pa.types.is_integer(arrow_type):
+        return _as_int
+    if pa.types.is_boolean(arrow_type):
+        return _as_bool
+    return _as_inferred
+
+
+class _ArrowWriter(Writer):
+    """
+    Shared batching for the pyarrow-based formats.
+
+    Contact fields get their types from the contact model (see
+    contact_arrow_types), whatever the first values look like. Other
+    columns are inferred from the first chunk, with columns that have no
+    values yet typed as strings; later values are converted to fit, e.g.
+    numbers in such a column are stored as text. Nested dicts are stored
+    as JSON text.
+    """
+
+    def __init__(self, path, fieldnames=None, header=None):
+        super().__init__(path, fieldnames, header)
+        self._writer = None
+        self._schema = None
+        self._converters = None
+
+    def _infer_schema(self, records):
+        import pyarrow as pa
+
+        known = contact_arrow_types()
+        unknown = [k for k in self.fieldnames if k not in known]
+        inferred = {}
+        if unknown:
+            sample = [
+                {
+                    key: json.dumps(value) if isinstance(value, dict) else value
+                    for key, value in ((k, record.get(k)) for k in unknown)
+                }
+                for record in records
+            ]
+            inferred = {
+                field.name: _widen_null_type(field.type)
+                for field in pa.Table.from_pylist(sample).schema
+            }
+        return pa.schema(
+            [(k, known[k] if k in known else inferred[k]) for k in self.fieldnames]
+        )
+
+    def _table(self, records):
+        import pyarrow as pa
+
+        if self._schema is None:
+            self._schema = self._infer_schema(records)
+            self._converters = [
+                (field.name, _converter(field.type)) for field in self._schema
+            ]
+        columns = {
+            key: [convert(record.get(key)) for record in records]
+            for key, convert in self._converters
+        }
+        return pa.Table.from_pydict(columns, schema=self._schema)
+
+    def _open(self, schema):
+        raise NotImplementedError
+
+    def _write(self, records):
+        table = self._table(records)
+        if self._writer is None:
+            self._writer = self._open(table.schema)
+        self._writer.write_table(table)
+
+    def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+@register_writer("parquet", ".parquet")
+class ParquetWriter(_ArrowWriter):
+    """Columnar Parquet file, one row group per chunk."""
+
+    def _open(self, schema):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetWriter(self.tmp_path, schema)
+
+
+@register_writer("arrow", ".arrow")
+class ArrowWriter(_ArrowWriter):
+    """Arrow IPC (Feather v2) file, one record batch per chunk."""
+
+    def _open(self, schema):
+        import pyarrow as pa
+
+        return pa.ipc.new_file(self.tmp_path, schema)
+
+
+def frame_records(frame, chunk_size=1000):
+    """
+    Yield a DataFrame's rows as dicts, with missing values as None.
+
+    Rows are converted a chunk at a time, so no second copy of the whole
+    frame is made.
+    """
+    for start in range(0, len(frame), chunk_size):
+        chunk = frame.iloc[start : start + chunk_size].astype(object)
+        yield from chunk.where(chunk.notna(), None).to_dict("records")
+
+
+def write_chunks(records, writers, chunk_size=1000, pipeline=PIPELINE):
+    """
+    Feed records to each writer in fixed-size chunks, then close them.
+
+    The writers' files are only moved into place once every record has been
+    written; if records raises, or any writer fails, every writer is
+    aborted instead and existing files are left as they were.
+
+    With pipeline (on unless MINTED_PIPELINE=0), every writer runs on its
+    own thread, fed through a bounded queue, so the formats are written at
+    the same time as each other and as records arrive. Time spent in each
+    writer is recorded in METRICS as "write <format>". Returns the number
+    of records written.
+    """
+    if pipeline:
+        return _write_chunks_threaded(records, writers, chunk_size)
+
+    count = 0
+    failed = True
+    try:
+        for chunk in chunked(records, chunk_size):
+            for writer in writers:
+                with METRICS.timer(f"write {writer.name}"):
+                    writer.write(chunk)
+            count += len(chunk)
+        failed = False
+    finally:
+        for writer in writers:
+            with METRICS.timer(f"write {writer.name}"):
+                if failed:
+                    writer.abort()
+                else:
+                    writer.close()
+    return count
+
+
+def _timed(writer, method):
+    def call(*args):
+        with METRICS.timer(f"write {writer.name}"):
+            method(*args)
+
+    return call
+
+
+def _write_chunks_threaded(records, writers, chunk_size):
+    workers = [
+        Worker(
+            _timed(writer, writer.write),
+            _timed(writer, writer.close),
+            _timed(writer, writer.abort),
+            name=f"write {writer.name}",
+        )
+        for writer in writers
+    ]
+    count = 0
+    failed = True
+    try:
+        for chunk in chunked(records, chunk_size):
+            for worker in workers:
+                worker.put(chunk)
+            count += len(chunk)
+        failed = False
+    finally:
+        # Only close (and so replace) any file once every writer has
+        # finished without errors
+        errors = [worker.drain() for worker in workers]
+        failed = failed or any(error is not None for error in errors)
+        for worker in workers:
+            worker.finish(abort=failed)
+        errors = [worker.join() for worker in workers]
+    for error in errors:
+        if error is not None:
+            raise error
+    return count
+
+
+def write_records(records, output_dir, basename, formats=None, fieldnames=None):
+    """
+    Write records to output_dir/basename.<ext> for every requested format.
+
+    formats is a list of format names, or a dict mapping each format name
+    to extra writer arguments, e.g. {"csv": {"header": titles}, "xlsx":
+    {"header": titles, "columns": {"external_id": {"format": "0"}}}}, where
+    header labels the columns in place of the field names. Returns (count,
+    paths) where paths maps format name to the file written; paths is
+    empty, and nothing is created, when there are no records.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if not isinstance(formats, dict):
+        formats = {name: {} for name in formats or DEFAULT_FORMATS}
+    writers = [
+        WRITERS[name](
+            os.path.join(output_dir, basename + WRITERS[name].extension),
+            fieldnames,
+            **arguments,
+        )
+        for name, arguments in formats.items()
+    ]
+    count = write_chunks(records, writers)
+    if not count:
+        return 0, {}
+    return count, {writer.name: writer.path for writer in writers}
@@ -0,0 +1,49 @@
+"""Shared pytest setup: import the flat modules, isolate caches."""
+
+from contextlib import redirect_stdout
+import io
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Must be set before the modules reading them are imported
+os.environ.setdefault("MINTED_CACHE_DIR", tempfile.mkdtemp(prefix="minted-test-"))
+
+EXAMPLE_DIR = os.path.join(ROOT, "example")
+
+
+@pytest.fixture
+def standin():
+    """Factory starting StandinServers that are stopped after the test."""
+    from minted_standin import StandinServer
+
+    servers = []
+
+    def start(*args, **kwargs):
+        server = StandinServer(*args, **kwargs)
+        server.start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture(scope="session")
+def driver():
+    """A headless Chrome shared by the browser tests; skips without Chrome."""
+    from minted_address_export import setup_driver
+
+    try:
+        with redirect_stdout(io.StringIO()):
+            chrome = setup_driver(headless=True)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        pytest.skip(f"Chrome could not be started: {e}")
+    yield chrome
+    chrome.quit()
@@ -0,0 +1,76 @@
+import sys
+
+import pandas as pd
+import pytest
+
+from minted_address import _parse_column_arrow
+from minted_address import _parse_column_python
+from minted_address import LOCALITY_DTYPES
+from minted_address import parse_locality
+from minted_address import parse_locality_column
+from minted_bench import make_localities
+
+
+def test_parse_locality():
+    assert parse_locality("Portland, OR 97201-1234, United States") == (
+        "Portland",
+        "OR",
+        "97201",
+        "1234",
+        "United States",
+    )
+    assert parse_locality("Somewhere") == ("Somewhere", "", "", "", "")
+    assert parse_locality("Albany, ny 12207", expand_states=True)[1] == "New York"
+
+
+@pytest.mark.parametrize("expand_states", [True, False])
+def test_expanding_states_that_collide(expand_states):
+    # "HI" and "Hawaii", "ny" and "NY" expand to the same state name
+    localities = pd.Series(
+        [
+            "Honolulu, HI 96813",
+            "Hilo, Hawaii 96720",
+            "Albany, ny 12207",
+            "New York, NY 10001",
+        ]
+    )
+    parsed = parse_locality_column(localities, expand_states=expand_states)
+    expected = ["Hawaii", "Hawaii", "New York", "New York"]
+    if not expand_states:
+        expected = ["HI", "Hawaii", "ny", "NY"]
+    assert list(parsed["state"]) == expected
+    assert parsed["state"].dtype == "category"
+
+
+@pytest.mark.parametrize("expand_states", [True, False])
+def test_arrow_and_python_parsers_agree(expand_states):
+    pytest.importorskip("pyarrow")
+    localities = pd.concat(
+        [
+            make_localities(2000),
+            pd.Series(
+                [
+                    None,
+                    "",
+                    "  Spaced , OR 97201  ",
+                    "London SW1A 2AA, United Kingdom",
+                    "Toronto, Ontario 12345-6789 , Canada",
+                    "Albany, ny 12207",
+                    "No ZIP, CA",
+                ]
+            ),
+        ]
+    ).set_axis(range(100, 2107))
+
+    arrow = _parse_column_arrow(localities, expand_states).astype(LOCALITY_DTYPES)
+    python = _parse_column_python(localities, expand_states).astype(LOCALITY_DTYPES)
+    pd.testing.assert_frame_equal(arrow, python)
+
+
+def test_parses_without_pyarrow(monkeypatch):
+    localities = make_localities(500)
+    expected = parse_locality_column(localities)
+    # A None entry makes the import raise ImportError
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    monkeypatch.setitem(sys.modules, "pyarrow.compute", None)
+    pd.testing.assert_frame_equal(parse_locality_column(localities), expected)
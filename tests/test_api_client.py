@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+
+from minted_api_client import ContactsClient
+from minted_api_client import remaining_page_urls
+from minted_standin import make_contacts
+from minted_standin import PAGINATION_STYLES
+from minted_standin import StandinServer
+
+
+def _ids(contacts):
+    return [contact["id"] for contact in contacts]
+
+
+EXPECTED = _ids(make_contacts(250))
+
+
+@pytest.fixture(scope="module")
+def servers():
+    """One stand-in per pagination style, shared by the read-only tests."""
+    started = {
+        pagination: StandinServer(250, page_size=40, pagination=pagination)
+        for pagination in PAGINATION_STYLES
+    }
+    for server in started.values():
+        server.start()
+    yield started
+    for server in started.values():
+        server.stop()
+
+
+@pytest.mark.parametrize("pagination", PAGINATION_STYLES)
+@pytest.mark.parametrize("stream", [False, True])
+def test_every_pagination_style(servers, pagination, stream):
+    server = servers[pagination]
+    with ContactsClient() as client:
+        contacts = list(client.iter_contacts(server.api_url, stream=stream))
+    assert _ids(contacts) == EXPECTED
+
+
+@pytest.mark.parametrize("pagination", PAGINATION_STYLES)
+@pytest.mark.parametrize("skip", [0, 1, 39, 40, 41, 120, 249, 250, 300])
+def test_skip_resumes_at_the_right_contact(servers, pagination, skip):
+    server = servers[pagination]
+    with ContactsClient() as client:
+        contacts = list(client.iter_contacts(server.api_url, stream=True, skip=skip))
+    assert _ids(contacts) == EXPECTED[skip:]
+
+
+def test_skip_does_not_fetch_skipped_pages(standin):
+    server = standin(250, page_size=40)
+    with ContactsClient() as client:
+        list(client.iter_contacts(server.api_url, skip=125))
+    # The first page (for the count) and pages 4-7; pages 2 and 3 are skipped
+    pages = sorted(server.request_counts)
+    assert len(pages) == 5
+    assert not any(page.endswith(("page=2", "page=3")) for page in pages)
+
+
+def test_remaining_page_urls_by_page():
+    first = {"count": 95, "results": [{}] * 20}
+    urls = remaining_page_urls(first, "https://x/api/?format=json&page=2")
+    assert urls == [f"https://x/api/?format=json&page={n}" for n in range(2, 6)]
+
+
+def test_remaining_page_urls_by_offset():
+    first = {"count": 95, "results": [{}] * 20}
+    urls = remaining_page_urls(first, "https://x/api/?offset=20&limit=20")
+    assert urls == [
+        f"https://x/api/?offset={offset}&limit=20" for offset in (20, 40, 60, 80)
+    ]
+
+
+@pytest.mark.parametrize(
+    "first, next_url",
+    [
+        ({"count": 95, "results": [{}] * 20}, "https://x/api/?cursor=abc"),
+        ({"results": [{}] * 20}, "https://x/api/?page=2"),
+        ({"count": 95, "results": []}, "https://x/api/?page=2"),
+    ],
+)
+def test_remaining_page_urls_unpredictable(first, next_url):
+    assert remaining_page_urls(first, next_url) is None
+
+
+# Only get_page() is overridden; the rest of the API is ContactsClient's
+# pylint: disable-next=too-few-public-methods
+class _CountingClient(ContactsClient):
+    """Records the most page requests running at once."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.running = 0
+        self.most_running = 0
+        self._lock = threading.Lock()
+
+    def get_page(self, url):
+        with self._lock:
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+        try:
+            time.sleep(0.01)
+            return super().get_page(url)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+
+@pytest.mark.parametrize("max_in_flight", [1, 3])
+def test_in_flight_requests_are_bounded(standin, max_in_flight):
+    server = standin(400, page_size=20)
+    with _CountingClient(max_in_flight=max_in_flight) as client:
+        contacts = list(client.iter_contacts(server.api_url))
+    assert len(contacts) == 400
+    assert client.most_running == max_in_flight
@@ -0,0 +1,113 @@
+from concurrent.futures import ThreadPoolExecutor
+import csv
+import json
+import time
+
+import pytest
+
+import minted_address_export
+import minted_batch
+from minted_batch import account_dirname
+from minted_batch import export_account
+from minted_batch import load_manifest
+from minted_batch import run_batch
+
+
+def test_load_json_and_csv_manifests(tmp_path):
+    accounts = [
+        {"email": "ann@example.com", "password": "secret", "name": "Ann"},
+        {"email": "ben@example.com", "password": "", "name": ""},
+    ]
+    json_path = tmp_path / "accounts.json"
+    json_path.write_text(json.dumps(accounts))
+    csv_path = tmp_path / "accounts.csv"
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["email", "password", "name"])
+        writer.writeheader()
+        writer.writerows(accounts)
+
+    assert load_manifest(str(json_path)) == accounts
+    assert load_manifest(str(csv_path)) == accounts
+
+
+def test_manifest_entries_need_an_email(tmp_path):
+    path = tmp_path / "accounts.json"
+    path.write_text(json.dumps([{"email": "ann@example.com"}, {"name": "Ben"}]))
+    with pytest.raises(ValueError, match="without an email"):
+        load_manifest(str(path))
+
+
+def test_manifest_rejects_shared_directories(tmp_path):
+    path = tmp_path / "accounts.json"
+    path.write_text(
+        json.dumps(
+            [
+                {"email": "ann@example.com", "name": "Ann Lee"},
+                {"email": "lee@example.com", "name": "Ann  Lee!"},
+            ]
+        )
+    )
+    with pytest.raises(ValueError, match="would both be exported to Ann_Lee"):
+        load_manifest(str(path))
+
+
+def test_account_dirname():
+    assert account_dirname({"email": "ann@example.com"}) == "ann@example.com"
+    assert account_dirname({"email": "x@example.com", "name": "Ann / Lee"}) == (
+        "Ann_Lee"
+    )
+    assert account_dirname({"email": "x@example.com", "name": "../..//"}) == ".._.."
+
+
+def test_account_without_password_or_session_is_skipped(tmp_path, monkeypatch):
+    monkeypatch.setattr(minted_batch, "load_session", lambda email: None)
+
+    def run_export(*args, **kwargs):
+        raise AssertionError("should not export")
+
+    monkeypatch.setattr(minted_address_export, "run_export", run_export)
+    summary = export_account({"email": "ann@example.com"}, str(tmp_path))
+    assert summary["method"] == "skipped"
+    assert summary["contacts"] == 0
+
+
+def test_failed_export_is_summarised(tmp_path, monkeypatch):
+    def run_export(*args, **kwargs):
+        raise RuntimeError("login form changed")
+
+    monkeypatch.setattr(minted_address_export, "run_export", run_export)
+    summary = export_account(
+        {"email": "ann@example.com", "password": "secret"}, str(tmp_path)
+    )
+    assert (summary["method"], summary["error"]) == ("failed", "login form changed")
+
+
+def _fake_export(account, _output_root, _formats, _resume):
+    # Later accounts finish first
+    delay = float(account["delay"])
+    time.sleep(delay)
+    return {
+        "account": account_dirname(account),
+        "email": account["email"],
+        "method": "api",
+        "contacts": int(delay * 100),
+        "seconds": delay,
+    }
+
+
+def test_batch_summary_is_in_manifest_order(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(minted_batch, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(minted_batch, "export_account", _fake_export)
+    accounts = [
+        {"email": f"{name}@example.com", "delay": delay}
+        for name, delay in [("ann", 0.3), ("ben", 0.2), ("cara", 0.1)]
+    ]
+
+    summaries = run_batch(accounts, str(tmp_path), workers=3)
+    assert [s["email"] for s in summaries] == [a["email"] for a in accounts]
+    output = capsys.readouterr().out
+    assert output.index("cara@") < output.index("ann@")
+
+    with open(tmp_path / "summary.csv", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["email"] for row in rows] == [a["email"] for a in accounts]
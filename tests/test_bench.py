@@ -0,0 +1,69 @@
+"""
+Export strategy benchmarks on the stand-in server, for pytest-benchmark.
+
+    MINTED_BENCH_SIZES=100,10000,100000 python -m pytest tests/test_bench.py
+
+The regular test run only benchmarks 100 contacts, to keep it quick. Each
+benchmark records contacts per second and the API request latency (p50/p95)
+in its extra_info, which --benchmark-json saves with the timings.
+"""
+
+from contextlib import redirect_stdout
+import io
+import os
+
+import pytest
+
+import minted_bench
+from minted_metrics import METRICS
+from minted_standin import StandinServer
+
+pytest.importorskip("pytest_benchmark")
+
+SIZES = [
+    int(size.replace("_", ""))
+    for size in os.environ.get("MINTED_BENCH_SIZES", "100").split(",")
+]
+
+
+@pytest.fixture(scope="module", params=SIZES, ids=lambda size: f"{size}")
+def server(request):
+    with StandinServer(request.param) as started:
+        yield started
+
+
+def _run(benchmark, strategy, server, tmp_path, *args):
+    bench = minted_bench.BENCHMARKS[strategy]
+    rounds = 5 if len(server.contacts) <= 10_000 else 1
+
+    def run():
+        METRICS.reset()
+        with redirect_stdout(io.StringIO()):
+            return bench(server, str(tmp_path), ["csv"], *args)
+
+    count = benchmark.pedantic(run, rounds=rounds, warmup_rounds=1)
+    assert count == len(server.contacts)
+
+    row = {"metrics": METRICS.report()}
+    benchmark.extra_info["contacts"] = count
+    benchmark.extra_info["contacts_per_second"] = round(
+        count / benchmark.stats.stats.median, 1
+    )
+    benchmark.extra_info["request_p50_p95"] = minted_bench.request_latency(row)
+
+
+@pytest.mark.parametrize("strategy", ["api", "print", "html"])
+def test_strategy(benchmark, strategy, server, tmp_path):
+    _run(benchmark, strategy, server, tmp_path)
+
+
+def test_dom(benchmark, server, tmp_path, driver):
+    _run(benchmark, "dom", server, tmp_path, driver)
+
+
+def test_login(benchmark, standin, tmp_path, driver):
+    benchmark.pedantic(
+        minted_bench.bench_login,
+        args=(standin(1), str(tmp_path), ["csv"], driver),
+        rounds=5,
+    )
@@ -0,0 +1,39 @@
+from minted_contact import Contact
+from minted_contact import CONTACT_FIELDS
+from minted_contact import iter_contacts_file
+from minted_writers import write_records
+
+
+def test_csv_round_trip(tmp_path):
+    contacts = [
+        Contact(
+            id="C1",
+            name="Ann Lee",
+            labels=["holiday", "family"],
+            members=[{"name": "Ann"}, {"name": "Ben"}],
+            has_mailing_address=True,
+            external_id=42,
+            data={"source": "import"},
+        ),
+        Contact(id="C2", name="Cara Khan", has_mailing_address=False),
+    ]
+    _, paths = write_records(
+        (contact.to_dict() for contact in contacts),
+        tmp_path,
+        "book",
+        ["csv", "jsonl"],
+        CONTACT_FIELDS,
+    )
+
+    assert list(iter_contacts_file(paths["csv"])) == contacts
+    assert list(iter_contacts_file(paths["jsonl"])) == contacts
+
+
+def test_unparseable_csv_cells_are_kept(tmp_path):
+    path = tmp_path / "book.csv"
+    path.write_text("id,external_id,data,labels\nC1,X-7,{not json,[broken\n")
+
+    (contact,) = iter_contacts_file(str(path))
+    assert contact.to_dict()["external_id"] == "X-7"
+    assert contact.to_dict()["data"] is None
+    assert contact.to_dict()["labels"] == ("[broken",)
@@ -0,0 +1,121 @@
+from minted_bench import inject_duplicates
+from minted_contact import Contact
+from minted_dedupe import AUDIT_FIELD
+from minted_dedupe import block_key
+from minted_dedupe import build_blocks
+from minted_dedupe import dedupe
+from minted_dedupe import find_duplicates
+from minted_dedupe import merge_group
+
+
+def _contact(name, address1="12 Main St", postal_code="62701", **kwargs):
+    return Contact(name=name, address1=address1, postal_code=postal_code, **kwargs)
+
+
+def _groups(contacts):
+    return [members for members, _ in find_duplicates(contacts)]
+
+
+def test_block_key_normalises_the_address():
+    keys = {
+        block_key(_contact("A", "12 Main Street", "62701")),
+        block_key(_contact("A", "12 main st.", "62701-1234")),
+        block_key(_contact("A", "12 Main St Apt 4", "62701")),
+    }
+    assert keys == {("62701", "12", "main")}
+    assert block_key(_contact("A", "", "62701")) is None
+    assert block_key(_contact("A", "12 Main St", None)) is None
+
+
+def test_only_contacts_in_a_block_are_compared():
+    contacts = [
+        _contact("The Smith Family"),
+        _contact("John Smith", "12 Main Street", "62701-0001"),
+        _contact("John Smith", "12 Main St", "62702"),
+        _contact("John Smith", "14 Main St"),
+        _contact("John Smith", ""),
+    ]
+    assert build_blocks(contacts) == [[0, 1]]
+    assert _groups(contacts) == [[0, 1]]
+
+
+def test_different_units_are_different_households():
+    contacts = [
+        _contact("Jane Doe", "12 Main St Apt 1"),
+        _contact("Jane Doe", "12 Main St", address2="Apt 2"),
+        _contact("Jane Doe", "12 Main St #1"),
+    ]
+    assert _groups(contacts) == [[0, 2]]
+
+    # A contact without a unit may match either
+    assert _groups(contacts[:2] + [_contact("Jane Doe")]) == [[0, 2]]
+
+
+def test_a_bare_first_name_does_not_chain_households():
+    contacts = [
+        _contact("John Smith"),
+        _contact("John"),
+        _contact("John Doe"),
+    ]
+    # "John" matches both, but John Smith and John Doe don't match each
+    # other, so John joins the first and John Doe stays on its own
+    assert _groups(contacts) == [[0, 1]]
+
+
+def test_groups_join_only_when_every_pair_matches():
+    contacts = [
+        _contact("Mr. & Mrs. Smith"),
+        _contact("John Smith"),
+        _contact("Jane Smith"),
+        _contact("The Smith Family"),
+    ]
+    groups = find_duplicates(contacts)
+    assert groups == [([0, 1, 3], 1.0)]
+
+
+def test_merge_prefers_the_newest_and_fills_gaps():
+    older = _contact(
+        "John Smith",
+        id="C1",
+        updated_at="2024-01-01",
+        locality="Springfield",
+        labels=("holiday",),
+    )
+    newer = _contact(
+        "The Smith Family", id="C2", updated_at="2025-01-01", labels=("family",)
+    )
+    merged = merge_group([older, newer])
+    # Contact fields are set from CONTACT_FIELDS, which pylint can't see
+    # pylint: disable=no-member
+    assert merged.id == "C2"
+    assert merged.name == "The Smith Family"
+    assert merged.locality == "Springfield"
+    assert merged.labels == ("family", "holiday")
+
+
+def test_dedupe_records_an_audit_column():
+    contacts = [
+        _contact("John Smith", id="C1"),
+        _contact("Ann Lee", "9 Oak Ave", id="C2"),
+        _contact("The Smith Family", id="C3"),
+    ]
+    records, groups = dedupe(contacts)
+    assert [record["id"] for record in records] == ["C1", "C2"]
+    assert records[0][AUDIT_FIELD] == "merged 2 contacts (C1, C3); score 1.00"
+    assert records[1][AUDIT_FIELD] == ""
+    assert len(groups) == 1
+
+
+def test_injected_duplicates_are_found():
+    contacts, duplicates = inject_duplicates(2000)
+    group_of = {
+        i: number
+        for number, (members, _) in enumerate(find_duplicates(contacts))
+        for i in members
+    }
+    found = [
+        i
+        for i, original in duplicates.items()
+        if i in group_of and group_of[i] == group_of.get(original)
+    ]
+    assert len(found) >= 0.95 * len(duplicates)
@@ -0,0 +1,134 @@
+import csv
+import json
+
+from minted_diff import diff_exports
+from minted_diff import main
+from minted_diff import row_key
+
+
+def _write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+def _write_jsonl(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    return str(path)
+
+
+def _contact(contact_id, name, address1="1 Main St", **fields):
+    return {"id": contact_id, "name": name, "address1": address1, **fields}
+
+
+def _changes(events):
+    by_change = {"added": [], "removed": [], "changed": []}
+    for event in events:
+        by_change[event["change"]].append(event)
+    return by_change
+
+
+def test_added_removed_and_changed(tmp_path):
+    old = _write_csv(
+        tmp_path / "old.csv",
+        [
+            _contact("C1", "Ann Lee"),
+            _contact("C2", "Ben Wu"),
+            _contact("C3", "Cara Khan"),
+        ],
+    )
+    new = _write_csv(
+        tmp_path / "new.csv",
+        [
+            _contact("C1", "Ann Lee"),
+            _contact("C3", "Cara Khan", "9 Oak Ave"),
+            _contact("C4", "Dev Rossi"),
+        ],
+    )
+    changes = _changes(diff_exports(old, new))
+
+    assert [event["key"] for event in changes["added"]] == ["C4"]
+    assert [event["key"] for event in changes["removed"]] == ["C2"]
+    assert changes["changed"] == [
+        {
+            "change": "changed",
+            "key": "C3",
+            "name": "Cara Khan",
+            "field": "address1",
+            "old": "1 Main St",
+            "new": "9 Oak Ave",
+        }
+    ]
+
+
+def test_legacy_exports_are_keyed_by_name_and_address(tmp_path):
+    # address_export.py's columns, with no id
+    legacy = [
+        {
+            "Name": "Ann Lee",
+            "Address": "1 Main St",
+            "Town": "Albany",
+            "Zipcode": "12207",
+        },
+        {
+            "Name": "Ben Wu",
+            "Address": "2 Oak Ave",
+            "Town": "Austin",
+            "Zipcode": "78701",
+        },
+    ]
+    old = _write_csv(tmp_path / "old.csv", legacy)
+    new = _write_csv(
+        tmp_path / "new.csv",
+        [
+            dict(legacy[0], Town="Albany NY"),
+            dict(legacy[1], Name="Ben  WU."),
+        ],
+    )
+    assert row_key({"name": "Ben  WU.", "address1": "2 Oak Ave"}) == row_key(
+        {"name": "ben wu", "address1": "2 oak ave"}
+    )
+    changes = _changes(diff_exports(old, new))
+
+    assert not changes["added"] and not changes["removed"]
+    assert {(event["field"], event["new"]) for event in changes["changed"]} == {
+        ("locality", "Albany NY"),
+        ("name", "Ben  WU."),
+    }
+
+
+def test_csv_against_jsonl(tmp_path):
+    records = [
+        _contact("C1", "Ann Lee", labels=["holiday", "family"], postal_code="12207"),
+        _contact("C2", "Ben Wu", labels=[], postal_code="78701"),
+    ]
+    old = _write_csv(
+        tmp_path / "old.csv",
+        [dict(record, labels="; ".join(record["labels"])) for record in records],
+    )
+    new = _write_jsonl(tmp_path / "new.jsonl", records[:1])
+
+    changes = _changes(diff_exports(old, new))
+    assert [event["key"] for event in changes["removed"]] == ["C2"]
+    assert not changes["added"] and not changes["changed"]
+
+
+def test_main_reports_the_counts(tmp_path, capsys):
+    old = _write_csv(
+        tmp_path / "old.csv", [_contact("C1", "Ann"), _contact("C2", "Ben")]
+    )
+    new = _write_csv(
+        tmp_path / "new.csv",
+        [_contact("C1", "Ann", "5 Elm St", postal_code="1"), _contact("C3", "Cara")],
+    )
+    main([old, new, "--output-dir", str(tmp_path / "out")])
+
+    output = capsys.readouterr().out
+    assert "1 added, 1 removed, 1 changed" in output
+    with open(tmp_path / "out" / "minted-addresses-diff.csv", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 4
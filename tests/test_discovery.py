@@ -0,0 +1,45 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+from minted_discovery import load_discovery
+from minted_discovery import plan_strategies
+from minted_discovery import record_attempt
+from minted_discovery import REPROBE_AFTER
+from minted_discovery import save_discovery
+from minted_discovery import STRATEGIES
+
+
+def _save_many(path, worker, saves=200):
+    cache = {}
+    for i in range(saves):
+        record_attempt(cache, f"worker-{worker}", i + 1, 0.1)
+        assert save_discovery(cache, path)
+    return saves
+
+
+def test_concurrent_saves_from_several_processes(tmp_path):
+    path = str(tmp_path / "strategies.json")
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(_save_many, [path] * 4, range(4)))
+    assert results == [200] * 4
+    assert len(load_discovery(path)) == 1
+    assert os.listdir(tmp_path) == ["strategies.json"]
+
+
+def test_failed_save_is_a_warning(tmp_path, capsys):
+    blocker = tmp_path / "file"
+    blocker.write_text("not a directory")
+    assert not save_discovery({}, str(blocker / "strategies.json"))
+    assert "could not save" in capsys.readouterr().out
+
+
+def test_plan_puts_working_strategy_after_due_probes_only():
+    cache = {}
+    for strategy in STRATEGIES[:-2]:
+        record_attempt(cache, strategy, 0, 1.0)
+    record_attempt(cache, "print", 10, 1.0)
+    assert plan_strategies(cache)[0] == "print"
+
+    checked_at = cache["print"]["checked_at"]
+    later = checked_at + REPROBE_AFTER
+    assert plan_strategies(cache, now=later) == STRATEGIES
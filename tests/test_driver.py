@@ -0,0 +1,52 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from minted_driver import load_pin
+from minted_driver import pin_driver
+
+
+def _pin_many(source, cache_dir, times=20):
+    for _ in range(times):
+        pin_driver(source, "120.0.1", cache_dir)
+    return times
+
+
+@pytest.fixture
+def fake_driver(tmp_path):
+    """A real executable standing in for a downloaded chromedriver."""
+    sleep = shutil.which("sleep")
+    if sleep is None:
+        pytest.skip("needs a sleep binary")
+    path = tmp_path / "download" / "chromedriver"
+    path.parent.mkdir()
+    shutil.copy2(sleep, path)
+    return str(path)
+
+
+def test_pin_while_the_pinned_driver_runs(tmp_path, fake_driver):
+    cache_dir = str(tmp_path / "cache")
+    target = pin_driver(fake_driver, "120.0.1", cache_dir)
+    with subprocess.Popen([target, "5"]) as running:
+        try:
+            # Overwriting a running binary in place fails with ETXTBSY
+            assert pin_driver(fake_driver, "120.0.1", cache_dir) == target
+        finally:
+            running.kill()
+    assert subprocess.run([target, "0"], check=False).returncode == 0
+
+
+def test_concurrent_pins_from_several_processes(tmp_path, fake_driver):
+    cache_dir = str(tmp_path / "cache")
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(_pin_many, [fake_driver] * 4, [cache_dir] * 4))
+    assert results == [20] * 4
+
+    pin = load_pin(cache_dir)
+    assert pin["version"] == "120.0.1"
+    assert subprocess.run([pin["path"], "0"], check=False).returncode == 0
+    assert os.listdir(os.path.dirname(pin["path"])) == ["chromedriver"]
+    assert sorted(os.listdir(cache_dir)) == ["120.0.1", "pinned.json"]
@@ -0,0 +1,102 @@
+import os
+import zipfile
+
+import pytest
+
+from conftest import EXAMPLE_DIR
+from minted_contact import Contact
+from minted_enrich import build_reference
+from minted_enrich import enrich
+from minted_enrich import ZipReference
+
+ZIPCODES = os.path.join(EXAMPLE_DIR, "ex-zipcodes.txt")
+
+# Contact fields are set from CONTACT_FIELDS, which pylint can't see
+# pylint: disable=no-member
+
+
+def test_build_from_geonames_zip(tmp_path):
+    source = tmp_path / "US.zip"
+    with zipfile.ZipFile(source, "w") as archive:
+        archive.write(ZIPCODES, "US.txt")
+    assert build_reference(str(source), str(tmp_path / "zip.sqlite")) == (
+        build_reference(ZIPCODES, str(tmp_path / "txt.sqlite"))
+    )
+
+
+def test_zip_without_a_table(tmp_path):
+    source = tmp_path / "US.zip"
+    with zipfile.ZipFile(source, "w") as archive:
+        archive.writestr("readme.md", "no table here")
+    with pytest.raises(ValueError, match="no .txt ZIP code table"):
+        build_reference(str(source), str(tmp_path / "zip.sqlite"))
+    assert not (tmp_path / "zip.sqlite").exists()
+
+
+@pytest.fixture
+def reference(tmp_path):
+    path = str(tmp_path / "zipcodes.sqlite")
+    build_reference(ZIPCODES, path)
+    with ZipReference(path) as opened:
+        yield opened
+
+
+def _enrich_one(reference, **fields):
+    contact = Contact(name="Ann Lee", address1="1 Main St", **fields)
+    ((deliverable, notes),) = enrich([contact], reference)
+    return contact, deliverable, notes
+
+
+def test_fills_a_missing_city_and_state(reference):
+    contact, deliverable, notes = _enrich_one(reference, postal_code="60601")
+    assert (contact.locality, contact.administrative_area) == ("Chicago", "IL")
+    assert deliverable
+    assert notes == ["filled city", "filled state"]
+
+
+def test_fills_a_missing_zip_from_the_city(reference):
+    contact, deliverable, notes = _enrich_one(
+        reference, locality="Seattle", administrative_area="Washington"
+    )
+    assert contact.postal_code == "98101"
+    assert deliverable
+    assert notes == ["filled ZIP"]
+
+
+def test_corrects_a_wrong_state(reference):
+    contact, deliverable, notes = _enrich_one(
+        reference,
+        locality="Beverly Hills",
+        administrative_area="NV",
+        postal_code="90210-1234",
+    )
+    assert contact.administrative_area == "CA"
+    assert deliverable
+    assert notes == ["corrected state NV -> CA"]
+
+
+def test_corrects_a_zip_from_another_state(reference):
+    contact, deliverable, notes = _enrich_one(
+        reference, locality="Boston", administrative_area="MA", postal_code="10001"
+    )
+    assert contact.postal_code == "02108"
+    assert deliverable
+    assert notes == ["corrected ZIP 10001 -> 02108"]
+
+
+def test_flags_an_unknown_zip(reference):
+    contact, deliverable, notes = _enrich_one(
+        reference, locality="Nowhere", administrative_area="KS", postal_code="66999"
+    )
+    assert contact.postal_code == "66999"
+    assert deliverable is False
+    assert notes == ["unknown ZIP 66999"]
+
+
+def test_other_countries_are_left_alone(reference):
+    contact, deliverable, notes = _enrich_one(
+        reference, locality="Toronto", postal_code="M5V 2T6", country="Canada"
+    )
+    assert contact.administrative_area is None
+    assert deliverable is None
+    assert notes == ["not a US address"]
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+import minted_address_export
+from minted_address_export import run_export
+from minted_address_export import stream_api_export
+from minted_journal import ExportJournal
+from minted_journal import journal_path
+from minted_journal import read_entries
+from minted_standin import API_PATH
+
+
+def _entry(key, contacts):
+    return json.dumps({"source": "api", "key": key, "contacts": contacts}) + "\n"
+
+
+def test_torn_final_line_is_truncated(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    intact = _entry("e", [{"id": 1}]) + _entry("e", [{"id": 2}])
+    path.write_text(intact + '{"source": "api", "key": "e", "conta')
+
+    entries, size = read_entries(path)
+    assert len(entries) == 2
+    assert size == len(intact.encode())
+
+    with ExportJournal(str(path), resume=True) as journal:
+        assert journal.api_contacts("e") == [{"id": 1}, {"id": 2}]
+        journal.append("api", "e", [{"id": 3}])
+    assert path.read_text() == intact + _entry("e", [{"id": 3}])
+
+
+def test_without_resume_the_journal_starts_over(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    path.write_text(_entry("e", [{"id": 1}]))
+    with ExportJournal(str(path)) as journal:
+        assert journal.api_contacts("e") == []
+    assert path.read_text() == ""
+
+
+def test_contacts_are_replayed_per_endpoint(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    with ExportJournal(path, checkpoint_every=2) as journal:
+        assert list(journal.record_api("a", iter(range(5)))) == list(range(5))
+        list(journal.record_api("b", iter("xy")))
+        journal.record_row(7, {"name": "Row"})
+
+    journal = ExportJournal(path, resume=True)
+    assert journal.api_contacts("a") == [0, 1, 2, 3, 4]
+    assert journal.api_contacts("b") == ["x", "y"]
+    assert journal.scraped_rows() == {7: {"name": "Row"}}
+    journal.close()
+
+
+def test_resumed_stream_skips_journaled_contacts(standin, tmp_path):
+    server = standin(500, page_size=50)
+    server.faults.dead_paths.add(f"{API_PATH}?format=json&page=4")
+    path = str(tmp_path / "journal.jsonl")
+
+    with ExportJournal(path) as journal:
+        count = stream_api_export(
+            {}, tmp_path, ["csv"], journal, endpoints=[server.api_url]
+        )
+    assert count == 0
+
+    server.faults.dead_paths.clear()
+    server.request_counts.clear()
+    with ExportJournal(path, resume=True) as journal:
+        assert len(journal.api_contacts(server.api_url)) == 150
+        count = stream_api_export(
+            {}, tmp_path, ["csv"], journal, endpoints=[server.api_url]
+        )
+    assert count == 500
+    # The first page (for the count) and pages 4 to 10
+    assert len(server.request_counts) == 8
+    assert not any(target.endswith("page=2") for target in server.request_counts)
+    with open(tmp_path / "minted-addresses.csv", encoding="utf-8") as f:
+        assert sum(1 for _ in f) == 501
+
+
+@pytest.mark.parametrize("result, kept", [(("api", 10), False), (("failed", 0), True)])
+def test_journal_is_deleted_after_a_successful_export(
+    tmp_path, monkeypatch, result, kept
+):
+    def fake_run_export(*args):
+        journal = args[-1]
+        journal.append("api", "e", [{"id": 1}])
+        return result
+
+    monkeypatch.setattr(minted_address_export, "_run_export", fake_run_export)
+    assert run_export("me@example.com", output_dir=str(tmp_path)) == result
+    assert (tmp_path / ".minted-export-journal.jsonl").exists() == kept
+
+
+def test_interrupted_export_keeps_the_journal(tmp_path, monkeypatch):
+    def interrupted(*args):
+        args[-1].append("api", "e", [{"id": 1}])
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(minted_address_export, "_run_export", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        run_export("me@example.com", output_dir=str(tmp_path))
+    entries, _ = read_entries(journal_path(str(tmp_path)))
+    assert entries == [{"source": "api", "key": "e", "contacts": [{"id": 1}]}]
+
+
+def test_no_strategies_left_to_try(tmp_path, monkeypatch):
+    monkeypatch.setattr(minted_address_export, "plan_strategies", lambda cache: [])
+    monkeypatch.setattr(minted_address_export, "load_session", lambda email: {"s": 1})
+    monkeypatch.setattr(minted_address_export, "session_is_valid", lambda c: True)
+    assert run_export("me@example.com", output_dir=str(tmp_path)) == ("failed", 0)
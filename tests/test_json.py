@@ -0,0 +1,28 @@
+import io
+import json
+
+import pytest
+
+from minted_json import iter_json_array
+from minted_standin import make_contacts
+
+
+@pytest.mark.parametrize("read_size", [1, 7, 65536])
+def test_array_decoded_across_reads(monkeypatch, read_size):
+    monkeypatch.setattr("minted_json.ijson", None)
+    records = make_contacts(50)
+    records[3]["name"] = "Zoë Ångström"  # split across reads of 1 byte
+    body = io.BytesIO(json.dumps(records, ensure_ascii=False).encode("utf-8"))
+    assert list(iter_json_array(body, read_size=read_size)) == records
+
+
+def test_nested_prefix(monkeypatch):
+    monkeypatch.setattr("minted_json.ijson", None)
+    body = io.StringIO(json.dumps({"results": [{"id": 1}, {"id": 2}]}))
+    assert list(iter_json_array(body, "results.item")) == [{"id": 1}, {"id": 2}]
+
+
+def test_truncated_array(monkeypatch):
+    monkeypatch.setattr("minted_json.ijson", None)
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO('[{"id": 1}, {"id"')))
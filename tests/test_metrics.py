@@ -0,0 +1,80 @@
+import json
+import threading
+
+from minted_metrics import Metrics
+from minted_metrics import profiled
+from minted_waits import WaitReport
+
+
+def test_timer_aggregation():
+    metrics = Metrics()
+    for elapsed in (0.5, 1.5, 1.0):
+        metrics.record("fetch", elapsed)
+
+    @metrics.timed()
+    def write():
+        return "written"
+
+    assert write() == "written"
+    with metrics.timer("fetch"):
+        pass
+
+    timers = metrics.report()["timers"]
+    assert timers["fetch"] == {"count": 4, "total": 3.0, "mean": 0.75, "max": 1.5}
+    assert timers["write"]["count"] == 1
+
+
+def test_counts_from_many_threads():
+    metrics = Metrics()
+
+    def count():
+        for _ in range(1000):
+            metrics.count("rows")
+
+    threads = [threading.Thread(target=count) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert metrics.report()["counters"] == {"rows": 4000}
+
+
+def test_report_merges_waits_and_details(tmp_path):
+    metrics = Metrics()
+    metrics.detail("requests", {"api": {"p50": 0.1}})
+    waits = WaitReport()
+    waits.record("login redirect", 5, 1.25)
+    waits.record("login redirect", 0, 0.5)
+
+    path = metrics.write_report(str(tmp_path / "out" / "metrics.json"), waits)
+    with open(path, encoding="utf-8") as f:
+        report = json.load(f)
+
+    assert report["waits"] == {"login redirect": {"fixed": 5.0, "waited": 1.75}}
+    assert report["requests"] == {"api": {"p50": 0.1}}
+    assert "waits" not in metrics.report()
+
+
+def test_reset_forgets_the_run():
+    metrics = Metrics()
+    metrics.record("fetch", 1.0)
+    metrics.count("rows")
+    metrics.reset()
+    report = metrics.report()
+    assert (report["timers"], report["counters"]) == ({}, {})
+
+
+def test_profiled_without_a_path_does_nothing(tmp_path, capsys):
+    with profiled(None):
+        total = sum(range(10))
+    assert total == 45
+    assert not capsys.readouterr().out
+    assert not list(tmp_path.iterdir())
+
+
+def test_profiled_saves_stats(tmp_path, capsys):
+    path = tmp_path / "export.prof"
+    with profiled(str(path), top=3):
+        sorted(range(1000), reverse=True)
+    assert path.stat().st_size > 0
+    assert "Profile written to" in capsys.readouterr().out
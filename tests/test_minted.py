@@ -0,0 +1,68 @@
+import importlib
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+import minted
+from minted_contact import Contact
+from minted_dedupe import find_duplicates
+
+
+@pytest.mark.parametrize("command", sorted(minted.COMMANDS))
+def test_command_runs_its_module_main(command, monkeypatch):
+    module = importlib.import_module(minted.COMMANDS[command][0])
+    calls = []
+    monkeypatch.setattr(module, "main", lambda argv: calls.append(argv) or 0)
+    monkeypatch.setattr(sys, "argv", ["minted.py"])
+
+    assert minted.main([command, "--output-dir", "out"]) == 0
+    assert calls == [["--output-dir", "out"]]
+    assert sys.argv[0] == f"minted.py {command}"
+
+
+def test_usage_and_unknown_commands(capsys):
+    assert minted.main([]) == 2
+    assert minted.main(["--help"]) == 0
+    assert "convert" in capsys.readouterr().out
+    assert minted.main(["frobnicate"]) == 2
+    assert "Unknown command 'frobnicate'" in capsys.readouterr().err
+
+
+def test_library_api():
+    assert minted.Contact is Contact
+    assert minted.find_duplicates is find_duplicates
+    assert "iter_contacts" in dir(minted)
+    with pytest.raises(AttributeError):
+        _ = minted.not_an_api
+
+
+def test_write_contacts(tmp_path):
+    contacts = [minted.Contact(id="C1", name="Ann Lee")]
+    count, paths = minted.write_contacts(contacts, str(tmp_path), formats=["jsonl"])
+    assert count == 1
+    with open(paths["jsonl"], encoding="utf-8") as f:
+        assert '"name": "Ann Lee"' in f.read()
+
+
+def _heavy_modules(code):
+    """Run code in a fresh interpreter; return the heavy modules it loaded."""
+    check = (
+        f"{code}\nimport sys\n"
+        "print(sorted({name.split('.')[0] for name in sys.modules} "
+        "& {'selenium', 'pandas'}))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", check],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.strip()
+
+
+def test_import_loads_no_selenium_or_pandas():
+    assert _heavy_modules("import minted") == "[]"
+    assert _heavy_modules("import minted; minted.convert") == "[]"
@@ -0,0 +1,83 @@
+from contextlib import closing
+from itertools import count
+import threading
+
+import pytest
+
+from minted_pipeline import background
+from minted_pipeline import Worker
+
+
+def _running(name):
+    return any(thread.name == name for thread in threading.enumerate())
+
+
+def test_producer_error_reaches_the_consumer():
+    def pages():
+        yield from range(250)
+        raise ValueError("page 3 failed")
+
+    received = []
+    with pytest.raises(ValueError, match="page 3 failed"):
+        for item in background(pages(), "fetch", chunk_size=100):
+            received.append(item)
+
+    # The last, partial chunk is lost with the error
+    assert received == list(range(200))
+    assert not _running("fetch")
+
+
+def test_interrupted_producer_stops_the_consumer():
+    def pages():
+        yield from range(10)
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        list(background(pages(), "fetch", chunk_size=3))
+    assert not _running("fetch")
+
+
+def test_interrupt_stops_every_stage_before_it():
+    closed = threading.Event()
+
+    def pages():
+        try:
+            yield from count()
+        finally:
+            closed.set()
+
+    records = background(pages(), "fetch", chunk_size=10, maxsize=2)
+    records = background((n * 2 for n in records), "normalize", chunk_size=10)
+    with pytest.raises(KeyboardInterrupt), closing(records):
+        for record in records:
+            if record == 100:
+                raise KeyboardInterrupt
+
+    # The endless source was closed on its own thread and both threads joined
+    assert closed.wait(1)
+    assert not _running("fetch") and not _running("normalize")
+
+
+def test_worker_aborts_after_a_failed_item():
+    handled, finished = [], []
+
+    def handle(item):
+        if item == 2:
+            raise OSError("disk full")
+        handled.append(item)
+
+    worker = Worker(
+        handle,
+        close=lambda: finished.append("close"),
+        abort=lambda: finished.append("abort"),
+        name="write csv",
+    )
+    worker.put(1)
+    worker.put(2)
+    assert isinstance(worker.drain(), OSError)
+    with pytest.raises(OSError, match="disk full"):
+        worker.put(3)
+
+    assert isinstance(worker.join(), OSError)
+    assert (handled, finished) == ([1], ["abort"])
+    assert not _running("write csv")
@@ -0,0 +1,86 @@
+import os
+
+from bs4 import BeautifulSoup
+
+from conftest import EXAMPLE_DIR
+from minted_print_page import iter_print_page
+from minted_print_page import print_page_frame
+from minted_standin import iter_print_page as standin_print_page
+from minted_standin import make_contacts
+
+PRINT_PAGE = os.path.join(EXAMPLE_DIR, "ex-print-page.html")
+
+
+def _saved_page():
+    with open(PRINT_PAGE, encoding="utf-8") as f:
+        return f.read()
+
+
+def _soup_records(html):
+    """The print page as the BeautifulSoup parser it replaced read it."""
+    listings = BeautifulSoup(html, "lxml").find("main")
+    names = listings.find_all("span", {"class": "contact-name"})
+    addresses = listings.find_all("span", {"class": "contact-address"})
+    return [
+        {
+            "name": name.text.strip(),
+            "address": " ".join(
+                "".join(address.text.strip().split("\n")[:-1]).strip().split()
+            ),
+            "locality": address.text.strip().split("\n")[-1].strip(),
+        }
+        for name, address in zip(names, addresses)
+    ]
+
+
+def test_saved_print_page():
+    with open(PRINT_PAGE, "rb") as f:
+        records = list(iter_print_page(f))
+
+    assert records == [
+        {
+            "name": "Mr. Santa Claus",
+            "address": "1 Candy Cane Ln.",
+            "locality": "North Pole, AK 99705",
+        },
+        {
+            "name": "Mrs. Claus & Family",
+            "address": "2 Candy Cane Ln.",
+            "locality": "North Pole, AK 99705-1234",
+        },
+        {
+            "name": "Rudolph",
+            "address": "10 Downing St",
+            "locality": "London SW1A 2AA, United Kingdom",
+        },
+    ]
+
+
+def test_locality_columns():
+    frame = print_page_frame(_saved_page(), expand_states=True)
+    assert list(frame["city"]) == ["North Pole", "North Pole", "London SW1A 2AA"]
+    assert list(frame["state"]) == ["Alaska", "Alaska", ""]
+    assert list(frame["zip4"]) == ["", "1234", ""]
+
+
+def test_matches_the_beautifulsoup_parser():
+    contacts = make_contacts(500)
+    contacts[7]["address2"] = "Apt 4"
+    contacts[9]["name"] = "Ann & Ben <Lee>"
+    html = "".join(standin_print_page(contacts))
+
+    assert list(iter_print_page(html)) == _soup_records(html)
+    assert list(iter_print_page(_saved_page())) == _soup_records(_saved_page())
+
+
+def test_contacts_outside_main_are_ignored():
+    html = (
+        '<html><body><span class="contact-name">Header</span><main>'
+        '<span class="contact-name">Ann Lee</span>'
+        '<span class="contact-address">1 Main St\nAlbany, NY 12207</span>'
+        '</main><span class="contact-address">2 Oak Ave\nAustin, TX 78701</span>'
+        "</body></html>"
+    )
+    assert list(iter_print_page(html)) == [
+        {"name": "Ann Lee", "address": "1 Main St", "locality": "Albany, NY 12207"}
+    ]
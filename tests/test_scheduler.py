@@ -0,0 +1,137 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from minted_address_export import stream_api_export
+from minted_api_client import make_session
+from minted_scheduler import CircuitOpenError
+from minted_scheduler import endpoint_key
+from minted_scheduler import RequestScheduler
+from minted_scheduler import retry_after
+from minted_scheduler import TokenBucket
+from minted_standin import API_PATH
+from minted_standin import Faults
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    """Retry straight away unless the server sends Retry-After."""
+    monkeypatch.setattr("minted_scheduler.backoff_delay", lambda attempt: 0.0)
+
+
+def _scheduler(**kwargs):
+    return RequestScheduler(make_session(), **kwargs)
+
+
+def _target(server, url):
+    """The path and query a request for url arrives with."""
+    return url[len(server.base_url) :]
+
+
+def test_transient_errors_are_retried(standin):
+    server = standin(10, faults=Faults(fail_first=2))
+    scheduler = _scheduler()
+    response = scheduler.get(server.api_url)
+
+    assert response.status_code == 200
+    assert server.request_counts[_target(server, server.api_url)] == 3
+    stats = scheduler.stats.summary()[endpoint_key(server.api_url)]
+    assert (stats["requests"], stats["retries"], stats["failures"]) == (1, 2, 0)
+
+
+def test_retries_run_out(standin):
+    server = standin(10, faults=Faults(error_rate=1.0))
+    scheduler = _scheduler(max_retries=3)
+    response = scheduler.get(server.api_url)
+
+    assert response.status_code == 503
+    assert server.request_counts[_target(server, server.api_url)] == 4
+    stats = scheduler.stats.summary()[endpoint_key(server.api_url)]
+    assert (stats["retries"], stats["failures"]) == (3, 1)
+
+
+def test_client_errors_are_not_retried(standin):
+    server = standin(10)
+    response = _scheduler().get(f"{server.base_url}/missing/")
+    assert response.status_code == 404
+    assert server.request_counts["/missing/"] == 1
+
+
+def test_retry_after_pauses_every_request(standin):
+    server = standin(10, faults=Faults(fail_first=1, retry_after=0.4, error_status=429))
+    scheduler = _scheduler()
+    start = time.monotonic()
+    assert scheduler.get(server.api_url).status_code == 200
+    assert time.monotonic() - start >= 0.4
+
+    # The pause applies to other requests too, not only the retried one
+    scheduler.bucket.pause(0.3)
+    start = time.monotonic()
+    assert scheduler.get(server.print_url).status_code == 200
+    assert time.monotonic() - start >= 0.3
+
+
+def test_retry_after_header_forms():
+    def response(value):
+        return SimpleNamespace(headers={"Retry-After": value} if value else {})
+
+    assert retry_after(response("2")) == 2.0
+    assert retry_after(response(None)) is None
+    assert retry_after(response("Wed, 21 Oct 2015 07:28:00 GMT")) == 0.0
+
+
+def test_circuit_opens_on_a_dead_endpoint(standin):
+    server = standin(10)
+    server.faults.dead_paths.add(API_PATH)
+    scheduler = _scheduler(max_retries=0, circuit=(3, 60))
+    for _ in range(3):
+        assert scheduler.get(server.api_url).status_code == 503
+    with pytest.raises(CircuitOpenError):
+        scheduler.get(server.api_url)
+    assert server.request_counts[_target(server, server.api_url)] == 3
+
+    # Other endpoints have their own circuit
+    assert scheduler.get(server.print_url).status_code == 200
+
+
+def test_circuit_closes_after_a_good_trial(standin):
+    server = standin(10, faults=Faults(fail_first=2))
+    scheduler = _scheduler(max_retries=0, circuit=(2, 0.2))
+    for _ in range(2):
+        scheduler.get(server.api_url)
+    with pytest.raises(CircuitOpenError):
+        scheduler.get(server.api_url)
+    time.sleep(0.25)
+    assert scheduler.get(server.api_url).status_code == 200
+    assert scheduler.breaker(server.api_url).opened_at is None
+
+
+def test_too_many_requests_does_not_open_the_circuit(standin):
+    server = standin(10, faults=Faults(fail_first=3, error_status=429))
+    scheduler = _scheduler(max_retries=5, circuit=(2, 30))
+    assert scheduler.get(server.api_url).status_code == 200
+
+
+def test_rate_limit_is_opt_in():
+    bucket = TokenBucket(None)
+    start = time.monotonic()
+    for _ in range(1000):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.5
+
+    bucket = TokenBucket(20, capacity=1)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.15
+
+
+def test_failed_stream_keeps_previous_export(standin, tmp_path):
+    server = standin(5000, page_size=100)
+    assert stream_api_export({}, tmp_path, ["csv"], endpoints=[server.api_url]) == 5000
+    before = (tmp_path / "minted-addresses.csv").read_text()
+
+    server.faults.dead_paths.add(f"{API_PATH}?format=json&page=30")
+    assert stream_api_export({}, tmp_path, ["csv"], endpoints=[server.api_url]) == 0
+    assert (tmp_path / "minted-addresses.csv").read_text() == before
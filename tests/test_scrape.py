@@ -0,0 +1,280 @@
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+import requests
+from selenium.common.exceptions import NoSuchElementException
+
+from conftest import EXAMPLE_DIR
+import minted_address_export
+from minted_address_export import bulk_extract_contacts
+from minted_address_export import BULK_EXTRACT_SCRIPT
+from minted_address_export import extract_contact_from_row
+from minted_address_export import extract_contacts_from_html
+from minted_address_export import extract_rows
+from minted_address_export import has_city_state_zip
+from minted_address_export import HYDRATED_STATE_SCRIPT
+from minted_address_export import scrape_address_book
+from minted_address_export import scrape_rows_sharded
+from minted_standin import make_contacts
+import minted_waits
+from minted_waits import WaitReport
+
+
+def _expected(records):
+    return [
+        {
+            "name": record["name"],
+            "street_line1": record["address1"],
+            "city": record["locality"],
+            "state": record["administrative_area"],
+            "zip": record["postal_code"],
+        }
+        for record in records
+    ]
+
+
+def test_saved_address_book_page():
+    with open(os.path.join(EXAMPLE_DIR, "ex-address-book.html"), encoding="utf-8") as f:
+        contacts = extract_contacts_from_html(f.read())
+
+    assert contacts == [
+        {
+            "name": "Mr. Santa Claus",
+            "street_line1": "1 Candy Cane Ln.",
+            "city": "North Pole",
+            "state": "AK",
+            "zip": "99705",
+        },
+        {
+            "name": "Mrs. Claus & Family",
+            "street_line1": "2 Candy Cane Ln.",
+            "city": "North Pole",
+            "state": "AK",
+            "zip": "99705-1234",
+        },
+        # No city, state ZIP line, so left for the per-row expansion
+        {"name": "Rudolph Reindeer", "street_line1": "The Stables"},
+    ]
+
+
+def test_hydrated_state_is_preferred():
+    state = {"props": {"pageProps": {"contacts": make_contacts(3)}}}
+    html = (
+        '<html><body><script id="__NEXT_DATA__" type="application/json">'
+        f"{json.dumps(state)}</script>"
+        '<div data-cy="abk_contactRow"><div class="css-f8pz0c">Ignored</div></div>'
+        "</body></html>"
+    )
+    contacts = extract_contacts_from_html(html)
+    assert [contact["name"] for contact in contacts] == [
+        record["name"] for record in make_contacts(3)
+    ]
+    assert contacts[0]["country"] == "US"
+
+
+def test_standin_address_book_page(standin):
+    server = standin(500)
+    response = requests.get(server.address_book_url, timeout=30)
+    response.raise_for_status()
+    assert extract_contacts_from_html(response.text) == _expected(server.contacts)
+
+
+def test_has_city_state_zip():
+    assert has_city_state_zip("Mr. Santa Claus\n1 Candy Cane Ln.\nNorth Pole, AK 99705")
+    assert has_city_state_zip(
+        "Mrs. Claus\n2 Candy Cane Ln.\n North Pole, AK 99705-1234 "
+    )
+    assert not has_city_state_zip("Rudolph Reindeer\nThe Stables")
+    assert not has_city_state_zip("North Pole, AK 99705 Expand")
+
+
+def _locality(record):
+    return (
+        f"{record['locality']}, {record['administrative_area']} "
+        f"{record['postal_code']}"
+    )
+
+
+class _Row:
+    """
+    An address book row whose city line shows once it is expanded.
+
+    With collapsed_city the city line shows while collapsed too.
+    """
+
+    def __init__(self, name, street, locality, collapsed_city=False):
+        self.name, self.street, self.locality = name, street, locality
+        self.collapsed_city = collapsed_city
+        self.expanded = False
+
+    @property
+    def text(self):
+        shown = self.expanded or self.collapsed_city
+        lines = [self.name, self.street] + ([self.locality] if shown else [])
+        return "\n".join(lines + ["Expand", "Edit"])
+
+    def find_element(self, _by, selector):
+        elements = {
+            ".css-f8pz0c": SimpleNamespace(text=self.name),
+            ".css-1mzdrva div:first-child": SimpleNamespace(text=self.street),
+            "[data-cy='abk_expandContactButton'] button": SimpleNamespace(row=self),
+        }
+        if selector not in elements:
+            raise NoSuchElementException(selector)
+        return elements[selector]
+
+
+class _Driver:
+    """
+    A WebDriver stand-in serving an address book of stand-in records.
+
+    Every other row shows its city line only once it is expanded, so a
+    scrape goes through both the bulk and the per-row extraction.
+    """
+
+    def __init__(self, records=()):
+        self.rows = [
+            _Row(record["name"], record["address1"], _locality(record), i % 2 == 0)
+            for i, record in enumerate(records)
+        ]
+        self.url = None
+
+    def get(self, url):
+        self.url = url
+
+    def get_cookies(self):
+        return [{"name": "sessionid", "value": "standin"}]
+
+    def execute_cdp_cmd(self, _cmd, _params):
+        return {}
+
+    def find_element(self, _by, selector):
+        return SimpleNamespace(selector=selector)
+
+    def find_elements(self, _by, _selector):
+        return self.rows
+
+    def execute_script(self, script, *args):
+        if script == HYDRATED_STATE_SCRIPT:
+            return None
+        if script == BULK_EXTRACT_SCRIPT:
+            return [
+                {
+                    "name": row.name,
+                    "street_line1": row.street,
+                    "lines": row.text.split("\n"),
+                }
+                for row in self.rows
+            ]
+        if script == "arguments[0].click();":
+            args[0].row.expanded = not args[0].row.expanded
+            return None
+        if script == "return document.readyState":
+            return "complete"
+        # The resource count network_idle() polls
+        return len(self.rows)
+
+    def quit(self):
+        self.rows = []
+
+
+def test_row_expand_waits_only_until_the_city_shows():
+    row = _Row("Mr. Santa Claus", "1 Candy Cane Ln.", "North Pole, AK 99705")
+    start = time.perf_counter()
+    contact = extract_contact_from_row(_Driver(), row, 0)
+    # The expand wait times out after 1s if it misses the city line
+    assert time.perf_counter() - start < 0.5
+    assert contact == {
+        "name": "Mr. Santa Claus",
+        "street_line1": "1 Candy Cane Ln.",
+        "city": "North Pole",
+        "state": "AK",
+        "zip": "99705",
+    }
+    assert not row.expanded
+
+
+def test_open_address_book_waits_for_the_rows(monkeypatch):
+    report = WaitReport()
+    monkeypatch.setattr(minted_waits, "REPORT", report)
+    driver = _Driver(make_contacts(5))
+    minted_address_export.open_address_book(driver)
+
+    assert driver.url == minted_address_export.ADDRESS_BOOK_URL
+    fixed, waited = report.phases["address book load"]
+    assert fixed == 2
+    assert waited < 1
+
+
+def test_scrape_without_chrome():
+    records = make_contacts(40)
+    driver = _Driver(records)
+    assert bulk_extract_contacts(driver)[0] == _expected(records)[0]
+    assert "city" not in bulk_extract_contacts(driver)[1]
+
+    assert scrape_address_book(driver) == _expected(records)
+    assert not any(row.expanded for row in driver.rows)
+
+
+def test_sharded_scrape_without_chrome(monkeypatch):
+    records = make_contacts(40)
+    shards = []
+
+    def setup_driver(headless):
+        assert headless
+        shards.append(_Driver(records))
+        return shards[-1]
+
+    monkeypatch.setattr(minted_address_export, "setup_driver", setup_driver)
+    driver = _Driver(records)
+    indices = list(range(1, 40, 2))
+    sharded = scrape_rows_sharded(driver, indices, shards=3)
+
+    assert len(shards) == 3
+    assert all(shard.url == minted_address_export.ADDRESS_BOOK_URL for shard in shards)
+    assert not any(shard.rows for shard in shards)
+    assert list(sharded) == indices
+    assert sharded == extract_rows(driver, indices)
+    assert scrape_address_book(_Driver(records), shards=3) == _expected(records)
+
+
+# The tests below drive Chrome and are skipped when it can't be started
+
+
+@pytest.fixture
+def address_book(standin, driver, monkeypatch):
+    """A 300-row stand-in address book open in the shared browser."""
+    server = standin(300)
+    monkeypatch.setattr(
+        minted_address_export, "ADDRESS_BOOK_URL", server.address_book_url
+    )
+    driver.get(server.base_url)
+    return server
+
+
+def test_scrape_standin_address_book(address_book, driver):
+    contacts = scrape_address_book(driver)
+    assert contacts == _expected(address_book.contacts)
+
+
+def test_row_extraction_matches_bulk(address_book, driver):
+    minted_address_export.open_address_book(driver)
+    indices = list(range(0, 300, 25))
+    rows = extract_rows(driver, indices)
+    expected = _expected(address_book.contacts)
+    assert sorted(rows) == indices
+    for i in indices:
+        assert {key: rows[i].get(key) for key in expected[i]} == expected[i]
+
+
+@pytest.mark.usefixtures("address_book")
+def test_sharded_rows_merge_in_page_order(driver):
+    minted_address_export.open_address_book(driver)
+    indices = list(range(0, 300, 10))
+    single = extract_rows(driver, indices)
+    sharded = scrape_rows_sharded(driver, indices, shards=3)
+    assert list(sharded) == list(single) == indices
+    assert sharded == single
@@ -0,0 +1,91 @@
+import json
+import os
+import stat
+import time
+
+import pytest
+
+import minted_session
+from minted_session import clear_session
+from minted_session import load_session
+from minted_session import save_session
+from minted_session import session_cache_path
+from minted_session import session_is_valid
+
+COOKIES = [
+    {"name": "sessionid", "value": "abc", "domain": ".minted.com"},
+    {"name": "csrftoken", "value": "def", "expiry": time.time() + 3600},
+]
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(minted_session, "CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_session_file_is_private(cache_dir):
+    save_session("Ann@Example.com ", COOKIES)
+    path = session_cache_path("ann@example.com")
+
+    assert path.startswith(str(cache_dir))
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert stat.S_IMODE(os.stat(os.path.dirname(path)).st_mode) == 0o700
+    assert load_session("ann@example.com") == COOKIES
+
+
+def test_existing_file_is_made_private():
+    path = session_cache_path("ann@example.com")
+    os.makedirs(os.path.dirname(path))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{}")
+    os.chmod(path, 0o644)
+
+    save_session("ann@example.com", COOKIES)
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_expired_session_is_removed():
+    save_session("ann@example.com", COOKIES, max_age=-1)
+    assert load_session("ann@example.com") is None
+    assert not os.path.exists(session_cache_path("ann@example.com"))
+
+
+def test_expired_cookies_are_dropped():
+    expired = {"name": "old", "value": "x", "expiry": time.time() - 1}
+    save_session("ann@example.com", COOKIES + [expired])
+    assert load_session("ann@example.com") == COOKIES
+
+    save_session("ann@example.com", [expired])
+    assert load_session("ann@example.com") is None
+
+
+def test_unreadable_or_missing_session():
+    assert load_session("ann@example.com") is None
+    path = session_cache_path("ann@example.com")
+    save_session("ann@example.com", COOKIES)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"cookies": [')
+    assert load_session("ann@example.com") is None
+
+    clear_session("ann@example.com")
+    clear_session("ann@example.com")
+    assert not os.path.exists(path)
+
+
+def test_accounts_have_their_own_file():
+    save_session("ann@example.com", COOKIES[:1])
+    save_session("ben@example.com", COOKIES[1:])
+    assert load_session("ann@example.com") == COOKIES[:1]
+    assert load_session("ben@example.com") == COOKIES[1:]
+    with open(session_cache_path("ben@example.com"), encoding="utf-8") as f:
+        assert json.load(f)["cookies"] == COOKIES[1:]
+
+
+def test_session_is_valid(standin):
+    server = standin(5)
+    assert session_is_valid(COOKIES, server.api_url)
+    # A login redirect or an error page means the session was rejected
+    assert not session_is_valid(COOKIES, f"{server.base_url}/missing/")
+    assert not session_is_valid(COOKIES, server.address_book_url)
+    assert not session_is_valid(COOKIES, "http://127.0.0.1:9/", timeout=1)
@@ -0,0 +1,94 @@
+import csv
+import os
+
+import openpyxl
+import pytest
+
+from minted_standin import make_contacts
+import minted_sync
+from minted_sync import sync_contacts
+
+
+def _rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def _ids(path):
+    return [row["id"] for row in _rows(path)]
+
+
+def test_new_contacts_are_appended(tmp_path):
+    records = make_contacts(30)
+    sync_contacts(records[:20], tmp_path)
+    csv_path = tmp_path / "minted-addresses.csv"
+    before = csv_path.read_bytes()
+
+    changed, deleted = sync_contacts(records, tmp_path)
+    assert (len(changed), deleted) == (10, set())
+    assert csv_path.read_bytes().startswith(before)
+    assert _ids(csv_path) == [record["id"] for record in records]
+    assert not (tmp_path / "minted-addresses.xlsx").exists()
+
+
+def test_updates_and_deletions_rewrite_the_csv(tmp_path):
+    records = make_contacts(30)
+    sync_contacts(records, tmp_path)
+
+    records[5] = dict(records[5], name="Renamed", updated_at="2026-01-01T00:00:00Z")
+    del records[7]
+    changed, deleted = sync_contacts(records, tmp_path)
+    assert [contact.id for contact in changed] == [records[5]["id"]]
+    assert deleted == {"STANDIN-000007"}
+
+    rows = {row["id"]: row for row in _rows(tmp_path / "minted-addresses.csv")}
+    assert len(rows) == 29
+    assert rows[records[5]["id"]]["name"] == "Renamed"
+    assert rows[records[0]["id"]]["labels"] == "standin"
+    assert sorted(os.listdir(tmp_path)) == [
+        ".minted-sync-state.json",
+        "minted-addresses.csv",
+    ]
+
+
+def test_excel_is_rewritten_only_when_asked(tmp_path):
+    records = make_contacts(30)
+    sync_contacts(records, tmp_path, excel=True)
+    excel_path = tmp_path / "minted-addresses.xlsx"
+    assert openpyxl.load_workbook(excel_path).active.max_row == 31
+
+    sync_contacts(records[:25], tmp_path)
+    assert openpyxl.load_workbook(excel_path).active.max_row == 31
+
+    sync_contacts(records[:25], tmp_path, excel=True)
+    assert openpyxl.load_workbook(excel_path).active.max_row == 26
+
+
+def test_append_is_repeatable_after_a_failed_state_save(tmp_path, monkeypatch):
+    records = make_contacts(30)
+    sync_contacts(records[:20], tmp_path)
+    csv_path = tmp_path / "minted-addresses.csv"
+
+    def save_state(*_):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as m:
+        m.setattr(minted_sync, "save_state", save_state)
+        with pytest.raises(OSError):
+            sync_contacts(records[:25], tmp_path)
+    assert len(_ids(csv_path)) == 25
+
+    changed, _ = sync_contacts(records, tmp_path)
+    assert len(changed) == 10
+    assert _ids(csv_path) == [record["id"] for record in records]
+
+    # One appended before the failed save and then changed is rewritten
+    with monkeypatch.context() as m:
+        m.setattr(minted_sync, "save_state", save_state)
+        with pytest.raises(OSError):
+            sync_contacts(records + make_contacts(31)[30:], tmp_path)
+    renamed = dict(make_contacts(31)[30], name="Renamed", updated_at="2026-01-01")
+    sync_contacts(records + [renamed], tmp_path)
+    rows = _rows(csv_path)
+    assert len({row["id"] for row in rows}) == len(rows) == 31
+    assert rows[-1]["name"] == "Renamed"
@@ -0,0 +1,119 @@
+import csv
+import os
+
+import pytest
+
+from minted_contact import Contact
+from minted_contact import CONTACT_FIELDS
+from minted_standin import make_contacts
+from minted_writers import JsonLinesWriter
+from minted_writers import write_records
+
+
+def _records(count, fail_at=None):
+    for i in range(count):
+        if i == fail_at:
+            raise ConnectionError("page failed")
+        yield {"id": f"C{i}", "name": f"Contact {i}"}
+
+
+def _rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+@pytest.mark.parametrize("pipeline", [True, False])
+def test_failed_stream_keeps_previous_files(tmp_path, monkeypatch, pipeline):
+    monkeypatch.setattr("minted_writers.PIPELINE", pipeline)
+    monkeypatch.setattr("minted_pipeline.PIPELINE", pipeline)
+    formats = ["csv", "jsonl", "xlsx"]
+    count, paths = write_records(_records(5000), tmp_path, "book", formats)
+    assert count == 5000
+
+    with pytest.raises(ConnectionError):
+        write_records(_records(5000, fail_at=2000), tmp_path, "book", formats)
+
+    assert len(_rows(paths["csv"])) == 5000
+    assert sorted(os.listdir(tmp_path)) == ["book.csv", "book.jsonl", "book.xlsx"]
+
+
+def test_failed_first_export_creates_nothing(tmp_path):
+    with pytest.raises(ConnectionError):
+        write_records(_records(100, fail_at=50), tmp_path, "book", ["csv"])
+    assert not os.listdir(tmp_path)
+
+
+def test_writer_error_aborts_every_format(tmp_path, monkeypatch):
+    write_records(_records(3000), tmp_path, "book", ["csv", "jsonl"])
+
+    def disk_full(self, records):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(JsonLinesWriter, "_write", disk_full)
+    with pytest.raises(OSError):
+        write_records(_records(10), tmp_path, "book", ["csv", "jsonl"])
+    assert len(_rows(tmp_path / "book.csv")) == 3000
+    assert sorted(os.listdir(tmp_path)) == ["book.csv", "book.jsonl"]
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_arrow_contact_schema_is_fixed(tmp_path, fmt):
+    pa = pytest.importorskip("pyarrow")
+    records = make_contacts(2500)
+    for record in records[:2000]:
+        # Empty in every row of the first chunks
+        record.update(external_id=None, labels=[], has_mailing_address=None)
+    contacts = (Contact.from_api(record).to_dict() for record in records)
+    _, paths = write_records(contacts, tmp_path, "book", [fmt], CONTACT_FIELDS)
+
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(paths[fmt])
+    else:
+        table = pa.ipc.open_file(paths[fmt]).read_all()
+    assert table.num_rows == 2500
+    assert table.schema.field("external_id").type == pa.int64()
+    assert table.schema.field("has_mailing_address").type == pa.bool_()
+    assert table.schema.field("labels").type == pa.list_(pa.string())
+    assert table.column("external_id")[2400].as_py() == records[2400]["external_id"]
+
+
+def test_arrow_widens_columns_empty_in_first_chunk(tmp_path):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    records = [{"key": i, "extra": None if i < 1500 else i} for i in range(2000)]
+    _, paths = write_records(records, tmp_path, "rows", ["parquet"])
+    table = pq.read_table(paths["parquet"])
+    assert table.column("key").to_pylist() == list(range(2000))
+    assert table.column("extra").to_pylist()[1999] == "1999"
+
+
+def test_formats_take_writer_arguments(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    formats = {
+        "csv": {"header": ["Key", "Name"]},
+        "xlsx": {"header": ["Key", "Name"], "columns": {"id": {"format": "@"}}},
+    }
+    _, paths = write_records(_records(3), tmp_path, "book", formats, ["id", "name"])
+
+    with open(paths["csv"], encoding="utf-8") as f:
+        assert f.readline() == "Key,Name\n"
+    sheet = openpyxl.load_workbook(paths["xlsx"]).active
+    assert [cell.value for cell in sheet[1]] == ["Key", "Name"]
+    assert sheet["A2"].number_format == "@"
+
+
+def test_arrow_integer_column_from_text(tmp_path):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    # external_id as read back from a CSV export
+    records = [
+        {"id": f"C{i}", "external_id": value}
+        for i, value in enumerate(["42", " 7 ", "", "n/a", "1.5"])
+    ]
+    _, paths = write_records(records, tmp_path, "book", ["parquet"], CONTACT_FIELDS)
+    table = pq.read_table(paths["parquet"])
+    assert table.column("external_id").to_pylist() == [42, 7, None, None, None]